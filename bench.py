@@ -0,0 +1,197 @@
+"""Benchmark the aggregation engines on a synthetic sheet and check they agree.
+
+    python bench.py --rows 100000 300000 --engines pandas polars duckdb sqlite
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import grn_data
+from grn_data import SHEET_COLUMNS, PandasBackend
+from grn_calendar import WorkCalendar, day_ordinals
+from grn_index import FilterIndex
+from grn_reconcile import add_pending
+from grn_turnaround import MAX_DAYS, PERCENTILES, TurnaroundSketch
+
+CUSTOMERS = [
+    "TATA MOTORS LTD -PIMPRI ERC",
+    "TATA MOTORS LTD -PIMPRI ERC (DEV)",
+    "TATA MOTORS LTD - DHARWAD",
+    "TATA MOTORS LTD - LUCKNOW",
+    "TATA MOTORS LTD - PANTNAGAR",
+    "TATA MOTORS LTD - ZARKHAND",
+]
+PLANTS = ["1001", "1004", "1500", "2100", "2500", "3100"]
+
+
+def synthetic_sheet(rows, parts=2000, days=400, seed=0, today=None):
+    """Sheet-shaped frame (string cells, NaN blanks) like load_google_sheet returns."""
+    rng = np.random.default_rng(seed)
+    today = grn_data.today_date() if today is None else today
+    cust = rng.integers(0, len(CUSTOMERS), rows)
+    part_ids = 278900000000 + rng.integers(0, parts, rows)
+    qty = rng.integers(1, 20, rows) * 60
+
+    challan = today - pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    receipt = challan + pd.to_timedelta(rng.integers(0, 6, rows), unit="D")
+    handover = receipt + pd.to_timedelta(rng.integers(0, 4, rows), unit="D")
+    tml = receipt + pd.to_timedelta(rng.integers(0, 40, rows), unit="D")
+    has_tml = (rng.random(rows) < 0.6) & (tml <= today)
+    has_handover = (rng.random(rows) < 0.8) & (handover <= today)
+    grn = np.where(rng.random(rows) < 0.8, qty, qty // 2)
+    has_grn = rng.random(rows) < 0.7
+
+    def fmt(dates, mask=None):
+        out = pd.Series(dates.strftime("%d.%m.%Y"), dtype=object)
+        return out.where(mask, np.nan) if mask is not None else out
+
+    avx_no = pd.Series(990000000 + np.arange(rows)).astype(str)
+    sheet = pd.DataFrame({
+        "Col0": pd.Series(part_ids).astype(str) + avx_no,
+        "Supplier Name": np.array(CUSTOMERS, dtype=object)[cust],
+        "PLANT": np.array(PLANTS, dtype=object)[cust],
+        "Inwarding PO": pd.Series(5500000000 + rng.integers(0, rows // 20 + 1, rows)).astype(str),
+        "Part No.": pd.Series(part_ids).astype(str),
+        "Part Description": "UREA LEVEL SENSOR (s)",
+        "Qty": pd.Series(qty).astype(str),
+        "Unit": "NOS",
+        "AVX Challan No.": avx_no,
+        "AVX Challan Date": fmt(challan),
+        "AVX PHY Material Recipt DATE": fmt(receipt),
+        "AVX Invoice Ack. Handover Date": fmt(handover, has_handover),
+        "AVX invoice Ack. Copy recevied by": np.nan,
+        "TML Challan No.": pd.Series(8800000000 + np.arange(rows)).astype(str).where(has_tml, np.nan),
+        "TML Challan Date": fmt(tml, has_tml),
+        "Qty (GRN)": pd.Series(grn).astype(str).where(has_grn, np.nan),
+        "TML INVOICE RECEIVE DATE": np.nan,
+        "GRN Days": np.nan,
+    })
+    return sheet[SHEET_COLUMNS]
+
+
+def make_backend(engine, tml_full, calendar=None):
+    if engine == "pandas":
+        return PandasBackend(tml_full, calendar=calendar)
+    if engine == "polars":
+        from grn_polars import PolarsBackend
+        return PolarsBackend(tml_full, calendar=calendar)
+    from grn_sql import SqlBackend
+    return SqlBackend(tml_full, engine=engine, calendar=calendar)
+
+
+def best_of(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_queries(backend, filters, today):
+    out = []
+    for f in filters:
+        out.append((
+            backend.row_count(**f),
+            backend.kpis(**f, today=today),
+            backend.part_pending(**f),
+            backend.ageing(**f, today=today),
+            backend.material(**f, today=today),
+        ))
+    return out
+
+
+def assert_same(expected, actual, label):
+    for f_exp, f_act in zip(expected, actual):
+        assert f_exp[0] == f_act[0], f"{label}: row_count {f_exp[0]} != {f_act[0]}"
+        assert f_exp[1] == f_act[1], f"{label}: kpis {f_exp[1]} != {f_act[1]}"
+        for exp, act in zip(f_exp[2:], f_act[2:]):
+            if exp is None or act is None:
+                assert exp is act, f"{label}: ageing presence differs"
+            else:
+                pd.testing.assert_frame_equal(exp.reset_index(drop=True), act.reset_index(drop=True), check_dtype=False, check_names=False, obj=label)
+
+
+def check_load(expected, actual):
+    assert len(expected) == len(actual), "load_tml row counts differ"
+    for col in ["PART_NO", "CUSTOMER", "SUPPLIER_QTY", "GRN_QTY", "AVX_CHALLAN_DATE", "HANDOVER_DATE",
+                "TML_CHALLAN_DATE", "PHY_RCPT_DATE", "AGE_DAYS", "Q_MINUS_N_DAYS"]:
+        exp, act = expected[col].reset_index(drop=True), actual[col].reset_index(drop=True)
+        if col.endswith("_DATE"):
+            exp, act = exp.astype("datetime64[us]"), act.astype("datetime64[us]")
+        elif col.endswith("_DAYS"):
+            exp, act = exp.astype("Float64"), act.astype("Float64")
+        pd.testing.assert_series_equal(exp, act, check_dtype=False, obj=f"load_tml {col}")
+
+
+def check_percentiles(tml_full, sketch, calendar):
+    days = day_ordinals(tml_full, "TML_CHALLAN_DATE", calendar) - day_ordinals(tml_full, "PHY_RCPT_DATE", calendar)
+    days = np.clip(days[~np.isnan(days)], 0, MAX_DAYS)
+    expected = [int(np.percentile(days, p, method="inverted_cdf")) for p in PERCENTILES]
+    actual = sketch.percentiles().iloc[0, 2:].tolist()
+    assert actual == expected, f"turnaround percentiles {actual} != {expected}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 300_000])
+    parser.add_argument("--engines", nargs="+", default=["pandas", "polars", "duckdb", "sqlite"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--calendar", help="working-day calendar JSON (see grn_calendar)")
+    args = parser.parse_args()
+    calendar = WorkCalendar.from_file(args.calendar) if args.calendar else None
+
+    today = grn_data.today_date()
+    month = (today - pd.DateOffset(months=1)).strftime("%b-%Y")
+    filters = [
+        dict(customer="All", month="All"),
+        dict(customer=CUSTOMERS[0], month="All"),
+        dict(customer="All", month=month),
+        dict(customer=CUSTOMERS[1], month=month),
+        dict(customer=CUSTOMERS[:3], month="All", plant=PLANTS[1:4],
+             dates=(today - pd.Timedelta(days=120), today - pd.Timedelta(days=30))),
+        dict(customer="All", month=month, plant=[PLANTS[4]], dates=(today - pd.Timedelta(days=45), today)),
+    ]
+
+    for rows in args.rows:
+        sheet = synthetic_sheet(rows, today=today)
+        print(f"\n== {rows:,} rows ==")
+
+        load_s, tml_full = best_of(lambda: grn_data.load_tml(sheet.copy(), today, calendar), args.repeat)
+        print(f"{'load_tml pandas':<22}{load_s * 1000:>10.1f} ms")
+        if "polars" in args.engines:
+            from grn_polars import load_tml as load_tml_polars
+            pl_s, tml_pl = best_of(lambda: load_tml_polars(sheet.copy(), today, calendar), args.repeat)
+            check_load(tml_full, tml_pl)
+            print(f"{'load_tml polars':<22}{pl_s * 1000:>10.1f} ms  x{load_s / pl_s:.1f}  (equal)")
+
+        fifo_s, tml_full = best_of(lambda: add_pending(tml_full), args.repeat)
+        print(f"{'fifo reconcile':<22}{fifo_s * 1000:>10.1f} ms")
+
+        sketch_s, sketch = best_of(lambda: TurnaroundSketch.from_tml(tml_full, calendar), 1)
+        pct_s, pct = best_of(lambda: sketch.percentiles("PART_NO", **filters[-2]), args.repeat)
+        check_percentiles(tml_full, sketch, calendar)
+        print(f"{'turnaround sketch':<22}{pct_s * 1000:>10.2f} ms  (build {sketch_s * 1000:.0f} ms, exact)")
+
+        index = FilterIndex(tml_full)
+        combine_s, _ = best_of(lambda: index.positions(CUSTOMERS[:3], PLANTS[1:4], *filters[-2]["dates"]), args.repeat)
+        print(f"{'filter index':<22}{combine_s * 1000:>10.2f} ms  (customers x plants x date range)")
+
+        expected, base = None, None
+        for engine in args.engines:
+            build_s, backend = best_of(lambda: make_backend(engine, tml_full, calendar), 1)
+            query_s, result = best_of(lambda: run_queries(backend, filters, today), args.repeat)
+            if expected is None:
+                expected, base = result, query_s
+                note = ""
+            else:
+                assert_same(expected, result, engine)
+                note = f"  x{base / query_s:.1f}  (equal)"
+            print(f"{engine:<22}{query_s * 1000:>10.1f} ms  (build {build_s * 1000:.0f} ms){note}")
+
+
+if __name__ == "__main__":
+    main()
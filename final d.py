@@ -1,14 +1,105 @@
 import streamlit as st  
 import pandas as pd
-from datetime import datetime
 import base64
 import os
 
+import grn_polars
+from grn_data import (
+    AGE_BUCKETS, PandasBackend, add_today_columns, dataset_version, month_range, normalize_tml,
+    receipt_range, selection, today_date,
+)
+from grn_alerts import AlertMonitor, make_sink, schedule
+from grn_api import dataset_url, export_url, mounted as api_mounted, register as register_api
+from grn_cache import LAYERS, shared_cache
+from grn_calendar import WorkCalendar, day_number
+from grn_client import CSS as CLIENT_CSS, JS as CLIENT_JS, encode as encode_client
+from grn_export import (
+    FORMATS as EXPORT_FORMATS, XLSX_MAX_ROWS, Rows, available as export_available, stream as export_stream,
+)
+from grn_index import FilterIndex
+from grn_match import ChallanMatcher, match_challans, open_issues
+from grn_offload import OffloadTimeout, QueryPool, html_table
+from grn_polars import PolarsBackend
+from grn_reconcile import add_pending
+from grn_render import AGEING_COLORS, FONTS, KPI_CSS, ageing_html, kpi_cards
+from grn_rollup import ReceiptRollup
+from grn_search import DRILL_COLUMNS, SearchIndex
+from grn_shared import SharedDataset
+from grn_sql import SqlBackend
+from grn_snapshots import SnapshotStore
+from grn_sync import DeltaSync, row_keys
+from grn_tenants import alert_sinks, load_tenants, read_sheet, tenant_path
+from grn_trends import AVG_DAYS, PENDING, TrendRollup, downsample
+from grn_turnaround import GROUP_LABELS, TurnaroundSketch
+
 # Set wide layout for full width
 st.set_page_config(layout="wide")
 
 # YOUR GOOGLE SHEET ID
 GOOGLE_SHEET_ID = "1T0Vm1acvcXqHlMkcKi3NgNRiJERMLGLM"
+SHEET_NAME = "BTST - AVX AND TML"
+
+# One dashboard, several sheets: GRN_TENANTS names a JSON file of tenants (see
+# grn_tenants), each picked with ?tenant=NAME. All tenants share one cache of
+# GRN_CACHE_MB; a tenant's "cache_mb" caps its own share.
+TENANTS = load_tenants(os.environ.get("GRN_TENANTS", ""), GOOGLE_SHEET_ID, SHEET_NAME)
+TENANT = st.query_params.get("tenant", next(iter(TENANTS)))
+CACHE_MB = int(os.environ.get("GRN_CACHE_MB", 2048))
+# Optional caps per cache layer (fetch, normalize, aggregate, render), e.g. "render=256,aggregate=1024"
+CACHE_LAYER_MB = {
+    layer.strip(): int(mb) for layer, mb in
+    (item.split("=") for item in os.environ.get("GRN_CACHE_LAYER_MB", "").split(",") if item.strip())
+}
+
+# Aggregation engine: "pandas" (default), "polars", "duckdb" or "sqlite"
+BACKEND = os.environ.get("GRN_BACKEND", "pandas")
+SQL_PATH = os.environ.get("GRN_SQL_PATH", ":memory:")
+
+# Live mode for wall displays: KPI cards and ageing counts refresh every N
+# seconds. Set per screen with ?live=60 or for every session with GRN_LIVE_REFRESH.
+LIVE_REFRESH = st.query_params.get("live", os.environ.get("GRN_LIVE_REFRESH"))
+LIVE_REFRESH = int(LIVE_REFRESH) if LIVE_REFRESH else None
+
+# Client mode (?client=1 or GRN_CLIENT_FILTERS=1): the browser gets the table once per dataset
+# version as a compact payload and filters KPIs, pending, ageing and receipts itself (grn_client)
+CLIENT_FILTERS = st.query_params.get("client", os.environ.get("GRN_CLIENT_FILTERS", "0")) == "1"
+
+# Re-normalize only appended/modified sheet rows on refresh (GRN_DELTA_SYNC=0 to disable)
+DELTA_SYNC = os.environ.get("GRN_DELTA_SYNC", "1") == "1"
+
+# Daily snapshots for the "As of" selector ("" disables)
+SNAPSHOT_DB = os.environ.get("GRN_SNAPSHOT_DB", "grn_snapshots.db")
+SNAPSHOT_RETENTION_DAYS = int(os.environ.get("GRN_SNAPSHOT_RETENTION_DAYS", 400))
+LIVE = "Live"
+AS_OF = "as-of "
+
+# Heavy aggregations and table HTML in a pool of N worker processes (0 = in the script
+# thread); a call still running after GRN_OFFLOAD_TIMEOUT seconds shows a notice instead
+OFFLOAD_WORKERS = int(os.environ.get("GRN_OFFLOAD_WORKERS", 0))
+OFFLOAD_TIMEOUT = float(os.environ.get("GRN_OFFLOAD_TIMEOUT", 30))
+
+# Several replicas on one host: "python grn_shared.py DIR" downloads and normalizes the
+# sheets once and publishes them as Arrow files; replicas with GRN_SHARED_DIR=DIR map them
+SHARED_DIR = os.environ.get("GRN_SHARED_DIR", "")
+
+# Ageing and GRN average days in working days, per plant (JSON calendar, see grn_calendar)
+CALENDAR_PATH = os.environ.get("GRN_CALENDAR", "")
+CALENDAR = WorkCalendar.from_file(CALENDAR_PATH) if CALENDAR_PATH else None
+DAYS_LABEL = "Working Days" if CALENDAR else "Days"
+AGEING_NOTE = " (working days)" if CALENDAR else ""
+
+# Ageing alerts on every refresh: comma-separated sinks, "file:PATH", "http(s)://..." webhook
+# or "smtp://host:port/recipient" ("" disables)
+ALERT_SINKS = [spec.strip() for spec in os.environ.get("GRN_ALERTS", "file:grn_alerts.jsonl").split(",") if spec.strip()]
+ALERT_STALE_DAYS = int(os.environ.get("GRN_ALERT_STALE_DAYS", 14))
+# Seconds between alert checks; they run in the background, not when a page renders
+ALERT_EVERY = int(os.environ.get("GRN_ALERT_EVERY", 300))
+
+if TENANT not in TENANTS:
+    st.error(f"❌ Unknown tenant: {TENANT}")
+    st.stop()
+# A tenant's own "alerts" list replaces GRN_ALERTS; alert files get the tenant's name
+TENANT_ALERT_SINKS = alert_sinks(TENANT, TENANTS[TENANT], ALERT_SINKS)
 
 # Custom CSS for full page coverage and table styling + FILTER POSITIONING
 st.markdown(
@@ -97,6 +188,7 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+@st.cache_data
 def get_base64(bin_file):
     if os.path.exists(bin_file):
         with open(bin_file, 'rb') as f:
@@ -114,99 +206,238 @@ def norm(s: str) -> str:
     return s
 
 # Session state
+if st.session_state.get('tenant') != TENANT:
+    st.session_state.df = st.session_state.source = st.session_state.version = None
+    st.session_state.tenant = TENANT
 if 'df' not in st.session_state:
     st.session_state.df = None
 if 'source' not in st.session_state:
     st.session_state.source = None
+if 'version' not in st.session_state:
+    st.session_state.version = None
 
 # ✅ AUTO-LOAD FROM GOOGLE SHEET (NO BUTTONS NEEDED)
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_google_sheet():
+def load_google_sheet(tenant, raise_errors=False):
     try:
-        url = f"https://docs.google.com/spreadsheets/d/{GOOGLE_SHEET_ID}/gviz/tq?tqx=out:csv&sheet=BTST%20-%20AVX%20AND%20TML"
-        df_temp = pd.read_csv(url, header=None)
-        
-        df_temp.columns = [
-            'Col0', 'Supplier Name', 'PLANT', 'Inwarding PO', 'Part No.', 
-            'Part Description', 'Qty', 'Unit', 'AVX Challan No.', 'AVX Challan Date', 
-            'AVX PHY Material Recipt DATE', 'AVX Invoice Ack. Handover Date', 
-            'AVX invoice Ack. Copy recevied by', 'TML Challan No.', 'TML Challan Date', 
-            'Qty (GRN)', 'TML INVOICE RECEIVE DATE', 'GRN Days'
-        ][:len(df_temp.columns)]
-        
-        df_temp = df_temp.iloc[2:].reset_index(drop=True)
-        df_temp = df_temp.dropna(how='all')
-        return df_temp
+        return read_sheet(TENANTS[tenant])
     except Exception as e:
+        if raise_errors:  # off the script thread there is no page for st.error
+            raise
         st.error(f"❌ Google Sheet loading failed: {str(e)}")
         return None
 
+# Every cached result lives in one memory-bounded LRU per process, keyed per tenant and layer
+def tenant_cache():
+    budgets = {name: tenant["cache_mb"] * 2**20 for name, tenant in TENANTS.items() if "cache_mb" in tenant}
+    return shared_cache(CACHE_MB * 2**20, budgets, {layer: mb * 2**20 for layer, mb in CACHE_LAYER_MB.items()})
+
+def tenant_cached(layer, ttl=None, release=None):
+    return tenant_cache().memoize(TENANT, layer, ttl, release)
+
+# Stateful per-tenant objects (delta sync, alert monitor, ...): never evicted
+def tenant_pinned():
+    return tenant_cache().pin(TENANT)
+
+# Newest sheet and its version (cached for 5 minutes), shared by all sessions: live
+# screens polling this between refreshes cost a dictionary lookup, not a download or a hash.
+@tenant_cached("fetch", ttl=300)
+def fetched_dataset(_raise_errors=False):
+    df_temp = load_google_sheet(TENANT, _raise_errors)
+    if df_temp is None:
+        return None, None
+    version = dataset_version(df_temp)
+    tenant_cache().new_version(TENANT, version)  # results of older sheets are dropped
+    return version, df_temp
+
+# Replicas map the normalized table the refresher published instead (grn_shared)
+@tenant_pinned()
+def shared_dataset():
+    return SharedDataset(SHARED_DIR, TENANT)
+
+@tenant_cached("normalize")
+def mapped_tml(version):
+    return shared_dataset().load(version)
+
+def latest_dataset():
+    if not SHARED_DIR:
+        return fetched_dataset()
+    version = shared_dataset().current()
+    if version is None:
+        return None, None
+    tenant_cache().new_version(TENANT, version)
+    return version, mapped_tml(version)
+
+def follow_latest():
+    """Move this session to the newest dataset version; True if it changed."""
+    version, df_temp = latest_dataset()
+    if version is None or version == st.session_state.version:
+        return False
+    st.session_state.df, st.session_state.version = df_temp, version
+    return True
+
 # ✅ AUTOMATICALLY LOAD DATA ON STARTUP
 if st.session_state.df is None:
     with st.spinner("🔄 Auto-loading from Google Sheet..."):
-        df_temp = load_google_sheet()
-        if df_temp is not None:
-            st.session_state.df = df_temp
-            st.session_state.source = "Google Sheet (Auto-loaded)"
-            st.success(f"✅ Auto-loaded {len(df_temp)} rows from Google Sheet")
+        if follow_latest():
+            df_temp = st.session_state.df
+            st.session_state.source = "Shared dataset" if SHARED_DIR else "Google Sheet (Auto-loaded)"
+            st.success(f"✅ Auto-loaded {len(df_temp)} rows from {st.session_state.source}")
+        elif SHARED_DIR:
+            st.error(f"❌ Nothing published in {SHARED_DIR} yet. Is the refresher (grn_shared.py) running?")
+            st.stop()
         else:
             st.error("❌ Failed to load Google Sheet. Please check your internet connection.")
             st.stop()
 
 df = st.session_state.df
-st.caption(f"📊 Auto-loaded: **{st.session_state.source}** ({len(df)} rows)")
-
-def load_tml(df):
-    KEY_CUSTOMER = "Supplier Name"
-    KEY_PART_NO = "Part No."
-    KEY_SUPP_QTY = "Qty"
-    KEY_GRN_QTY = "Qty (GRN)"
-    KEY_AVX_CHALLAN = "AVX Challan Date"
-    KEY_HANDOVER = "AVX Invoice Ack. Handover Date"
-    KEY_TML_CHALLAN = "TML Challan Date"
-    KEY_PHY_RCPT = "AVX PHY Material Recipt DATE"
-
-    required_cols = [KEY_CUSTOMER, KEY_PART_NO, KEY_SUPP_QTY, KEY_GRN_QTY]
-    missing = [col for col in required_cols if col not in df.columns]
-    if missing:
-        st.error(f"❌ Missing columns: {missing}")
-        st.write("Available:", list(df.columns))
-        st.stop()
-
-    df["AVX_CHALLAN_DATE"] = pd.to_datetime(df[KEY_AVX_CHALLAN], errors="coerce", dayfirst=True)
-    df["HANDOVER_DATE"] = pd.to_datetime(df[KEY_HANDOVER], errors="coerce", dayfirst=True)
-    df["TML_CHALLAN_DATE"] = pd.to_datetime(df[KEY_TML_CHALLAN], errors="coerce", dayfirst=True)
-    df["PHY_RCPT_DATE"] = pd.to_datetime(df[KEY_PHY_RCPT], errors="coerce", dayfirst=True)
-
-    df["SUPPLIER_QTY"] = pd.to_numeric(df[KEY_SUPP_QTY], errors="coerce")
-    df["GRN_QTY"] = pd.to_numeric(df[KEY_GRN_QTY], errors="coerce")
-
-    df["PART_NO"] = df[KEY_PART_NO].apply(lambda x: str(int(x)) if pd.notna(x) and float(x).is_integer() else str(x) if pd.notna(x) else "")
-    df["CUSTOMER"] = df[KEY_CUSTOMER].astype(str).fillna("").replace("nan","")
-
-    df = df[df["PART_NO"].str.strip() != ""]
-
-    today = pd.to_datetime(datetime.today().date())
-    
-    df["AGE_DAYS"] = pd.NA
-    mask_q = df["TML_CHALLAN_DATE"].notna()
-    df.loc[mask_q, "AGE_DAYS"] = (today - df.loc[mask_q, "TML_CHALLAN_DATE"]).dt.days
-
-    df["Q_MINUS_N_DAYS"] = pd.NA
-    mask_qn = df["TML_CHALLAN_DATE"].notna() & df["PHY_RCPT_DATE"].notna()
-    df.loc[mask_qn, "Q_MINUS_N_DAYS"] = (df.loc[mask_qn, "TML_CHALLAN_DATE"] - df.loc[mask_qn, "PHY_RCPT_DATE"]).dt.days
-
-    mask_no_challan = df["TML_CHALLAN_DATE"].isna() & df["PHY_RCPT_DATE"].notna()
-    df.loc[mask_no_challan, "Q_MINUS_N_DAYS"] = (today - df.loc[mask_no_challan, "PHY_RCPT_DATE"]).dt.days
+title = f" — {TENANTS[TENANT].get('title', TENANT)}" if len(TENANTS) > 1 else ""
+st.caption(f"📊 Auto-loaded: **{st.session_state.source}**{title} ({len(df)} rows)")
+
+# Shared across sessions and reruns; treat the cached frames as read-only.
+# Normalization is keyed on the dataset version only, the today-relative
+# columns additionally on the calendar day, so they roll over at midnight.
+@tenant_pinned()
+def delta_sync(engine):
+    return DeltaSync(grn_polars.normalize_tml if engine == "polars" else normalize_tml, CALENDAR)
+
+@tenant_pinned()
+def snapshot_store():
+    return SnapshotStore(tenant_path(SNAPSHOT_DB, TENANT), retention_days=SNAPSHOT_RETENTION_DAYS)
+
+@st.cache_resource(max_entries=64)
+def compact_snapshots(tenant, day):
+    snapshot_store().compact(day)
+
+# Remembers the table it saw last and the day each row's next alert falls due
+@tenant_pinned()
+def alert_monitor(engine):
+    return AlertMonitor([make_sink(spec) for spec in TENANT_ALERT_SINKS], ALERT_STALE_DAYS, CALENDAR)
+
+@tenant_cached("normalize")
+def normalized_tml(version, engine, _df):
+    if version.startswith(AS_OF):
+        return add_pending(snapshot_store().as_of(version[len(AS_OF):]))
+    if SHARED_DIR:
+        return mapped_tml(version)
+    if DELTA_SYNC:
+        sync = delta_sync(engine)
+        sync.update(_df)
+        tml = sync.normalized(version)
+        if tml is not None:
+            return tml
+    normalize = grn_polars.normalize_tml if engine == "polars" else normalize_tml
+    return add_pending(normalize(_df.set_axis(row_keys(_df)).copy()))
+
+@tenant_cached("normalize")
+def tml_for_day(version, engine, day, _df):
+    tml = normalized_tml(version, engine, _df)
+    # With GRN_SHARED_DIR the refresher records snapshots and sends alerts, not every replica
+    if SNAPSHOT_DB and not SHARED_DIR and not version.startswith(AS_OF):
+        # Once per (version, day): only rows that changed since the last snapshot are written
+        compact_snapshots(TENANT, day)
+        snapshot_store().record(tml, day, version)
+    return add_today_columns(tml, day, CALENDAR)
+
+# Ageing alerts follow the newest sheet on their own timer (alert_schedule), so they
+# fire with no page open and a slow webhook or SMTP server never holds up a render
+def check_alerts(engine):
+    # A failed fetch ends this round; the schedule records it in the monitor's errors
+    version, df_temp = fetched_dataset(_raise_errors=True)
+    monitor = alert_monitor(engine)
+    day = today_date()
+    if version is None or (version, day_number(day)) == (monitor.version, monitor.day):
+        return
+    tml = normalized_tml(version, engine, df_temp)
+    # Changed rows plus the timers falling due; without the sync at this version, a hash diff
+    sync = delta_sync(engine) if DELTA_SYNC else None
+    changed = sync.changed_since(monitor.version) if sync is not None and sync.version == version else None
+    monitor.update(tml, day, changed, version)
+
+@tenant_pinned()
+def alert_schedule(engine):
+    return schedule(lambda: check_alerts(engine), ALERT_EVERY, alert_monitor(engine).errors, f"grn-alerts-{TENANT}")
+
+# With GRN_SHARED_DIR the refresher sends the alerts, not every replica
+if TENANT_ALERT_SINKS and not SHARED_DIR:
+    alert_schedule(BACKEND)
+
+# Receipt-date order plus customer/plant bitmaps: filter combinations without scanning rows
+@tenant_cached("aggregate")
+def filter_index(version, engine, _df):
+    return FilterIndex(normalized_tml(version, engine, _df))
+
+# AVX <-> TML challan matching; a refresh only re-matches parts whose rows changed
+@tenant_pinned()
+def challan_matcher(engine):
+    return ChallanMatcher()
+
+@tenant_cached("aggregate")
+def challan_issues(version, engine, _df):
+    tml = normalized_tml(version, engine, _df)
+    if version.startswith(AS_OF):
+        return match_challans(tml)
+    return challan_matcher(engine).update(tml)
+
+# Part / PO / challan search: prefix and trigram lookups, rows grouped per value
+@tenant_cached("aggregate")
+def search_index(version, engine, _df):
+    return SearchIndex(normalized_tml(version, engine, _df))
+
+# Prefix sums per part over calendar days: any receipt date range is a subtraction
+@tenant_cached("aggregate")
+def receipt_rollup(version, engine, _df):
+    return ReceiptRollup(normalized_tml(version, engine, _df))
+
+# Turnaround percentiles: one-day histograms per cell, kept in step by the delta sync
+@tenant_cached("aggregate")
+def turnaround_sketch(version, engine, _df):
+    if DELTA_SYNC and not version.startswith(AS_OF):
+        sketch = delta_sync(engine).turnaround_sketch(version)
+        if sketch is not None:
+            return sketch
+    return TurnaroundSketch.from_tml(normalized_tml(version, engine, _df), CALENDAR)
+
+# Daily pending / ageing / GRN-days series per customer and plant, up to the day
+@tenant_cached("aggregate")
+def trend_rollup(version, engine, day, _df):
+    return TrendRollup(normalized_tml(version, engine, _df), day, CALENDAR)
+
+# Each tenant gets its own database file and each version its own table in it;
+# the table is dropped with the cache entry (eviction, TTL or a retired version)
+@tenant_cached("aggregate", release=lambda backend: backend.close())
+def sql_backend(version, engine, path, _tml):
+    path = path if path == ":memory:" else tenant_path(path, TENANT)
+    return SqlBackend(_tml, engine=engine, path=path, calendar=CALENDAR, version=version)
+
+@tenant_cached("aggregate")
+def polars_backend(version, _tml):
+    return PolarsBackend(_tml, calendar=CALENDAR)
+
+def get_backend(version, day, df):
+    if BACKEND in ("duckdb", "sqlite"):
+        return sql_backend(version, BACKEND, SQL_PATH, normalized_tml(version, BACKEND, df))
+    if BACKEND == "polars":
+        return polars_backend(version, normalized_tml(version, BACKEND, df))
+    rollup = delta_sync(BACKEND).pending_rollup(version) if DELTA_SYNC else None
+    return PandasBackend(tml_for_day(version, BACKEND, day, df), day, pending_rollup=rollup,
+                         index=filter_index(version, BACKEND, df), calendar=CALENDAR)
+
+today = today_date()
+version = st.session_state.version
+
+try:
+    tml_full = tml_for_day(version, BACKEND, today, df)
+except KeyError as e:
+    st.error(f"❌ {e.args[0]}")
+    st.write("Available:", list(df.columns))
+    st.stop()
 
-    return df
-
-tml_full = load_tml(df)
 
 # ✅ FIXED: Extract months from PHY_RCPT_DATE data - NO .tolist() ERROR
-def get_available_months(df):
+@tenant_cached("render")
+def get_available_months(version, _df):
     try:
-        df_copy = df.copy()
+        df_copy = _df.copy()
         df_copy['PHY_RCPT_DATE'] = pd.to_datetime(df_copy['AVX PHY Material Recipt DATE'], errors='coerce', dayfirst=True)
         valid_dates = df_copy['PHY_RCPT_DATE'].dropna()
         if valid_dates.empty:
@@ -218,242 +449,481 @@ def get_available_months(df):
     except:
         return ['All']
 
-available_months = get_available_months(df)
-
-# ✅ FINAL: Left=Month, Right=Customer (PERFECT POSITIONING)
-col1, col2 = st.columns([1, 1])
-with col1:
-    st.markdown("<div style='padding: 10px 0;'>", unsafe_allow_html=True)
-    selected_month = st.selectbox("**Month**", available_months, key="month_filter")
-    st.markdown("</div>", unsafe_allow_html=True)
-
-with col2:
-    st.markdown("<div style='padding: 10px 0; text-align: right;'>", unsafe_allow_html=True)
-    selected_customer = st.selectbox("**Customer**", ["All"] + sorted(tml_full["CUSTOMER"].dropna().unique().tolist()), key="customer_filter")
-    st.markdown("</div>", unsafe_allow_html=True)
-
-# Apply filters
-tml = tml_full.copy()
-if selected_customer != "All":
-    tml = tml[tml["CUSTOMER"] == selected_customer].copy()
-
-if selected_month != "All":
-    tml['PHY_RCPT_DATE'] = pd.to_datetime(tml['AVX PHY Material Recipt DATE'], errors='coerce', dayfirst=True)
-    tml = tml[tml['PHY_RCPT_DATE'].dt.strftime('%b-%Y') == selected_month].copy()
-
-st.caption(f"Rows: {len(tml)} (Customer: {selected_customer}, Month: {selected_month})")
-
-# Metrics (filtered)
-btst_invoice_qty = int(tml["AVX_CHALLAN_DATE"].notna().sum())
-btst_handover_status = int(tml["HANDOVER_DATE"].notna().sum())
-btst_tml_grn_status = int(tml["TML_CHALLAN_DATE"].notna().sum())
-avg_days = 0 if tml["Q_MINUS_N_DAYS"].dropna().empty else round(tml["Q_MINUS_N_DAYS"].dropna().mean())
-
-# FIXED HTML CARDS - with proper spacing
-html_template = f"""
-<!doctype html>
-<html><head><meta charset="utf-8"><link href="https://fonts.googleapis.com/css2?family=Fredoka:wght@400;600;700;900&display=swap" rel="stylesheet"><style>
-:root {{
-    --blue1: #8ad1ff;
-    --blue2: #4ca0ff;
-    --blue3: #0d6efd;
-}}
-body {{
-    margin: 0;
-    padding: 0;
-    font-family: "Fredoka", sans-serif;
-    background: none !important;
-}}
-.container {{
-    box-sizing: border-box;
-    width: 100%;
-    padding: 20px 20px 0 20px;
-    display: grid;
-    grid-template-columns: 1fr 1fr 1fr 1fr;
-    gap: 20px;
-    max-width: 1700px;
-    margin: auto;
-}}
-.card {{
-    position: relative;
-    border-radius: 20px;
-    padding: 0;
-    display: flex;
-    flex-direction: column;
-    justify-content: center;
-    align-items: center;
-    backdrop-filter: blur(12px) saturate(180%);
-    background: rgba(255,255,255,0.08);
-    border: 1px solid rgba(0,0,0,0.15);
-    box-shadow: 0 0 15px rgba(0,0,0,0.28), 0 10px 30px rgba(0,0,0,0.5), inset 0 0 20px rgba(255,255,255,0.12);
-    overflow: hidden;
-    text-align: center;
-}}
-.value-blue {{
-    font-size: 60px !important;
-    font-weight: 1000;
-    background: linear-gradient(180deg, var(--blue1), var(--blue2), var(--blue3));
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    display: block;
-    width: 100%;
-}}
-.title-black {{
-    color: black !important;
-    font-size: 18px;
-    font-weight: 800;
-    margin-top: 6px;
-    text-align: center;
-    width: 100%;
-}}
-</style></head><body><div class="container">
-    <div class="card">
-        <div class="value-blue">{btst_invoice_qty}</div>
-        <div class="title-black">BTST Invoice Qty Rec'd from AVX</div>
-    </div>
-    <div class="card">
-        <div class="value-blue">{btst_handover_status}</div>
-        <div class="title-black">BTST Invoice Handover Status</div>
-    </div>
-    <div class="card">
-        <div class="value-blue">{btst_tml_grn_status}</div>
-        <div class="title-black">BTST TML GRN Status</div>
-    </div>
-    <div class="card">
-        <div class="value-blue">{avg_days}</div>
-        <div class="title-black">TML GRN Average Days</div>
-    </div>
-</div></body></html>
-"""
-st.markdown(html_template, unsafe_allow_html=True)
-
-# Second Row
-r2c1, r2c2 = st.columns([1, 1])
-
-with r2c1:
-    tml_valid = tml[tml["PART_NO"].str.strip() != ""].copy()
-    diff = (tml_valid["SUPPLIER_QTY"].fillna(0) - tml_valid["GRN_QTY"].fillna(0))
-    tml_valid["PENDING_QTY"] = diff.apply(lambda x: x if x > 0 else 0).astype(int)
-    part_pending = tml_valid.groupby("PART_NO")["PENDING_QTY"].sum().reset_index()
-    part_pending.columns = ["Part No", "GRN Pending Qty"]
-    
+@tenant_cached("render")
+def get_filter_values(version, col, _df):
+    return filter_index(version, BACKEND, _df).values(col)
+
+available_months = get_available_months(version, df)
+available_customers = get_filter_values(version, "CUSTOMER", df)
+available_plants = get_filter_values(version, "PLANT", df)
+
+# One pool per server process; workers map the normalized table from an Arrow file
+@st.cache_resource
+def query_pool():
+    return QueryPool(OFFLOAD_WORKERS, OFFLOAD_TIMEOUT)
+
+# A spilled file and the offloaded results nobody collected yet go with this entry, not before:
+# workers may be asked to map the file for as long as the page can hand out its path
+@tenant_cached("normalize", release=lambda path: query_pool().release(path))
+def offload_path(version, engine, _df):
+    if SHARED_DIR and not version.startswith(AS_OF):
+        return shared_dataset().path(version)
+    return query_pool().spill((TENANT, version, engine), normalized_tml(version, engine, _df))
+
+# Filters are pushed down into the selected backend
+with st.spinner(f"🔄 Preparing {len(tml_full)} rows for {BACKEND}..."):
+    if OFFLOAD_WORKERS:
+        offload_path(version, BACKEND, df)
+    else:
+        get_backend(version, today, df)
+
+# Aggregates are memoized per (dataset version, engine, day, filters), so
+# rerunning a fragment whose inputs did not change is a cache lookup and the
+# backend is only touched on a miss.
+@tenant_cached("render")
+def cached_query(name, version, engine, day, customer, month, plant, dates, _df, html=False):
+    kwargs = dict(customer=customer, month=month, plant=plant, dates=dates)
+    if name in ("kpis", "ageing", "material"):
+        kwargs["today"] = day
+    if OFFLOAD_WORKERS:
+        return query_pool().query(offload_path(version, engine, _df), engine, day, CALENDAR_PATH, name, kwargs, html)
+    result = getattr(get_backend(version, day, _df), name)(**kwargs)
+    return html_table(result) if html else result
+
+@tenant_cached("render")
+def cached_receipts(version, engine, customer, plant, start, end, _df, html=False):
+    if OFFLOAD_WORKERS:
+        return query_pool().receipts(offload_path(version, engine, _df), customer, start, end, plant, html)
+    result = receipt_rollup(version, engine, _df).matrix(customer, start, end, plant)
+    return html_table(result) if html else result
+
+@tenant_cached("render")
+def cached_search(version, engine, text, _df):
+    return search_index(version, engine, _df).search(text)
+
+@tenant_cached("render")
+def cached_turnaround(version, engine, by, customer, month, plant, dates, _df):
+    return turnaround_sketch(version, engine, _df).percentiles(by, customer, month, plant, dates)
+
+# LTTB-downsampled, so a chart ships at most TREND_POINTS points per series
+@tenant_cached("render")
+def cached_trend(version, engine, day, customer, plant, start, end, _df):
+    return downsample(trend_rollup(version, engine, day, _df).trend(customer, plant, start, end))
+
+def current_dataset(filters):
+    # Resolved per call so fragments that rerun on their own see the
+    # session's current dataset version (or "as of" snapshot) and calendar day
+    as_of = filters.get("as_of", LIVE)
+    if as_of != LIVE:
+        return AS_OF + as_of, pd.Timestamp(as_of), None
+    return st.session_state.version, today_date(), st.session_state.df
+
+def query(name, filters, html=False):
+    """Backend result (its HTML table with ``html``); None after a notice if the pool timed out."""
+    version, day, df = current_dataset(filters)
+    try:
+        return cached_query(name, version, BACKEND, day, filters["customer"], filters["month"],
+                            filters["plant"], filters["dates"], df, html=html)
+    except OffloadTimeout as e:
+        st.warning(f"⏳ {name.replace('_', ' ').title()} {e}; it shows on the next rerun once ready.")
+
+def receipts(filters, start, end, html=False):
+    version, _, df = current_dataset(filters)
+    try:
+        return cached_receipts(version, BACKEND, filters["customer"], filters["plant"],
+                               pd.Timestamp(start), pd.Timestamp(end), df, html=html)
+    except OffloadTimeout as e:
+        st.warning(f"⏳ Receipt matrix {e}; it shows on the next rerun once ready.")
+
+# The client mode payload: dictionary codes, day offsets and quantities, gzip-compressed
+@tenant_cached("aggregate")
+def client_payload(version, engine, day, _df):
+    return encode_client(tml_for_day(version, engine, day, _df), version, day)
+
+# Tables as files: aggregates from the caches above; the filtered rows are the cached table
+# plus the filter index's positions, which grn_export reads a chunk at a time
+def export_result(name, filters, version, day, df):
+    if name == "rows":
+        bounds = receipt_range(filters["month"], filters["dates"]) or (None, None)
+        positions = filter_index(version, BACKEND, df).positions(
+            selection(filters["customer"]), selection(filters["plant"]), *bounds)
+        return Rows(normalized_tml(version, BACKEND, df), positions)
+    if name == "client":
+        return client_payload(version, BACKEND, day, df)
+    if name == "receipts":
+        start, end = filters["range"]
+        return cached_receipts(version, BACKEND, filters["customer"], filters["plant"],
+                               pd.Timestamp(start), pd.Timestamp(end), df)
+    return cached_query(name, version, BACKEND, day, filters["customer"], filters["month"],
+                        filters["plant"], filters["dates"], df)
+
+# Read-only HTTP API (grn_api, mounted by server.py): the live dataset through the same caches
+def api_version():
+    return latest_dataset()[0]
+
+def api_query(name, filters):
+    if filters["as_of"] != LIVE:
+        return export_result(name, filters, AS_OF + filters["as_of"], pd.Timestamp(filters["as_of"]), None)
+    version, df = latest_dataset()
+    return export_result(name, filters, version, today_date(), df)
+
+register_api(TENANT, api_version, api_query, default=TENANT == next(iter(TENANTS)))
+
+# Each block is a fragment so it can rerun on its own; the page config, CSS
+# and data loading above only run on a full rerun.
+@st.fragment(run_every=LIVE_REFRESH)
+def kpi_row(filters):
+    if LIVE_REFRESH:
+        follow_latest()
+
+    # Metrics (filtered)
+    kpis = query("kpis", filters)
+    if kpis is None:
+        return
+    st.markdown(f"""
+    <!doctype html>
+    <html><head><meta charset="utf-8">{FONTS}<style>{KPI_CSS}</style></head><body>
+    {kpi_cards(kpis, DAYS_LABEL)}
+    </body></html>
+    """, unsafe_allow_html=True)
+
+@st.fragment
+def pending_table(filters):
+    pending_html = query("part_pending", filters, html=True)
+    if pending_html is None:
+        return
+
     st.markdown(f"""
     <div class="glass-table glass-table-red fixed-height">
         <h3>TML Part Wise GRN Pending Qty</h3>
-        <div style='text-align: center;'>{part_pending.to_html(escape=False, index=False)}</div>
+        <div style='text-align: center;'>{pending_html}</div>
     </div>
     """, unsafe_allow_html=True)
 
-with r2c2:
-    age_df = tml_valid.dropna(subset=["CUSTOMER", "PHY_RCPT_DATE"]).copy()
-    age_df["AGEING_DAYS"] = pd.NA
-    mask_with_challan = age_df["TML_CHALLAN_DATE"].notna()
-    age_df.loc[mask_with_challan, "AGEING_DAYS"] = (age_df.loc[mask_with_challan, "TML_CHALLAN_DATE"] - age_df.loc[mask_with_challan, "PHY_RCPT_DATE"]).dt.days
-    mask_no_challan = age_df["TML_CHALLAN_DATE"].isna()
-    age_df.loc[mask_no_challan, "AGEING_DAYS"] = (pd.to_datetime(datetime.today().date()) - age_df.loc[mask_no_challan, "PHY_RCPT_DATE"]).dt.days
-
-    def age_bucket(d):
-        if pd.isna(d): return "No Data"
-        d = int(d)
-        if d <= 7: return "0-7"
-        if d <= 15: return "8-15"
-        if d <= 25: return "16-25"
-        return ">25"
-
-    if not age_df.empty:
-        age_df["AGE_BUCKET"] = age_df["AGEING_DAYS"].apply(age_bucket)
-        age_pivot = age_df.pivot_table(
-            index="AGE_BUCKET",
-            columns="CUSTOMER",
-            values="AGEING_DAYS",
-            aggfunc="count",
-            fill_value=0
-        )
-        age_pivot = age_pivot.reindex(index=["0-7", "8-15", "16-25", ">25"]).fillna(0)
-        age_pivot["Total"] = age_pivot.sum(axis=1).astype(int)
-        age_pivot = age_pivot.reset_index().rename(columns={"AGE_BUCKET": "Bucket"})
-
-        for col in age_pivot.columns[1:]:
-            age_pivot[col] = pd.to_numeric(age_pivot[col], errors='coerce').fillna(0).astype(int)
-
-        color_map = {
-            "0-7": {"bg": "#8ceba7", "color": "#000000"},
-            "8-15": {"bg": "#fae698", "color": "#000000"},
-            "16-25": {"bg": "#f7be99", "color": "#000000"},
-            ">25": {"bg": "#f78e8e", "color": "#000000"}
-        }
-
-        html_rows = ""
-        for _, row in age_pivot.iterrows():
-            bucket = row["Bucket"]
-            bgcolor = color_map.get(bucket, {}).get("bg", "#ffffff")
-            txtcolor = color_map.get(bucket, {}).get("color", "#ffffff")
-            html_rows += "<tr style='background-color:{}; color:{}; font-weight: bold;'>".format(bgcolor, txtcolor)
-            html_rows += f"<td style='font-weight: bold; font-size: 14px;'>{bucket}</td>"
-            for col_name in age_pivot.columns[1:]:
-                val = int(row[col_name])
-                html_rows += f"<td style='font-weight: bold; font-size: 14px;'>{val}</td>"
-            html_rows += "</tr>"
-
-        table_html = "<table style='margin:auto; border-collapse: collapse; color:black;'>"
-        table_html += "<tr style='background-color: #4ca0ff; color: white;'>"
-        table_html += "<th style='padding:8px; border:1px solid rgba(0,0,0,0.3); font-weight: bold;'>Bucket</th>"
-        for col in age_pivot.columns[1:]:
-            table_html += f"<th style='padding:8px; border:1px solid rgba(0,0,0,0.3); font-weight: bold;'>{col}</th>"
-        table_html += "</tr>"
-        table_html += html_rows
-        table_html += "</table>"
-    else:
-        table_html = "<div style='text-align: center;'>No ageing data</div>"
+@st.fragment(run_every=LIVE_REFRESH)
+def ageing_table(filters):
+    if LIVE_REFRESH:
+        follow_latest()
+    age_pivot = query("ageing", filters)
+    if age_pivot is None:
+        return
+
+    table_html = ageing_html(age_pivot)
 
     st.markdown(f"""
     <div class="glass-table fixed-height">
-        <h3>TML GRN Ageing Day</h3>
+        <h3>TML GRN Ageing Day{AGEING_NOTE}</h3>
         {table_html}
     </div>
     """, unsafe_allow_html=True)
 
-# Third Row: Partwise Material Receipt Qty
-st.write("---")
-
-tml_valid = tml[tml["PART_NO"].str.strip() != ""].copy()
-df_age = tml_valid.dropna(subset=["PHY_RCPT_DATE"]).copy()
-df_age = df_age[df_age["SUPPLIER_QTY"].fillna(0) > 0]
-
-df_age["RCPT_DAY"] = df_age["PHY_RCPT_DATE"].dt.day.astype(int)
-
-today = pd.to_datetime(datetime.today().date())
-month_end = today.replace(day=pd.Period(today, freq='M').days_in_month)
-days = list(range(1, month_end.day + 1))
-
-mat_pivot = df_age.pivot_table(
-    index="PART_NO",
-    columns="RCPT_DAY",
-    values="SUPPLIER_QTY",
-    aggfunc="sum",
-    fill_value=0
-).reindex(columns=days, fill_value=0)
-
-mat_pivot = mat_pivot.reindex(tml_valid["PART_NO"].unique(), fill_value=0)
-mat_pivot.columns = [str(d) for d in mat_pivot.columns]
-
-def format_qty(x):
-    if x == 0 or pd.isna(x):
-        return ""
-    return str(int(x))
-
-mat_pivot = mat_pivot.applymap(format_qty)
-mat_pivot = mat_pivot.reset_index()
-
-table_html = mat_pivot.to_html(escape=False, index=False)
-table_html = table_html.replace('<th>PART_NO</th>', '<th style="font-size: 12px;">PART NO</th>')
+@st.fragment
+def search_panel(filters):
+    text = st.text_input("🔎 **Search Part No / Inwarding PO / Challan No**", key="search_text",
+                         placeholder="Start typing a part, PO or challan number")
+    if not text.strip():
+        return
+
+    version, _, df = current_dataset(filters)
+    matches = cached_search(version, BACKEND, text, df)
+    if matches.empty:
+        st.info("No matching part, PO or challan.")
+        return
+
+    st.caption("Select a match to see its rows (all customers, plants and dates).")
+    picked = st.dataframe(matches, hide_index=True, on_select="rerun", selection_mode="single-row",
+                          key="search_matches")
+    if not picked.selection.rows:
+        return
+
+    match = matches.iloc[picked.selection.rows[0]]
+    positions = search_index(version, BACKEND, df).rows(match["Field"], match["Value"])
+    rows = normalized_tml(version, BACKEND, df).iloc[positions][DRILL_COLUMNS]
+    st.markdown(f"**{match['Field']} {match['Value']}** — {len(rows)} rows")
+    st.dataframe(rows, hide_index=True)
+
+@st.fragment
+def challan_matching(filters):
+    panel = st.expander("**AVX ↔ TML Challan Matching**", key="matching_open", on_change="rerun")
+    if not panel.open:
+        return
+
+    version, day, df = current_dataset(filters)
+    issues = open_issues(challan_issues(version, BACKEND, df), day)
+    for col, key in (("CUSTOMER", "customer"), ("PLANT", "plant")):
+        if selection(filters[key]):
+            issues = issues[issues[col].isin(selection(filters[key]))]
+    if issues.empty:
+        panel.success("✅ Every AVX challan is matched to its TML challan.")
+        return
+
+    counts = issues["ISSUE"].value_counts()
+    kind = panel.radio("Issue", counts.index.tolist(), horizontal=True, key="matching_issue",
+                       format_func=lambda issue: f"{issue} ({counts[issue]})")
+    panel.dataframe(issues[issues["ISSUE"] == kind].drop(columns="ISSUE"), hide_index=True)
+
+@st.fragment
+def turnaround_sla(filters):
+    panel = st.expander("**GRN Turnaround P50 / P90 / P99**", key="turnaround_open", on_change="rerun")
+    if not panel.open:
+        return
+
+    by = panel.radio("By", list(GROUP_LABELS), horizontal=True, key="turnaround_by",
+                     format_func=GROUP_LABELS.get)
+    version, _, df = current_dataset(filters)
+    table = cached_turnaround(version, BACKEND, by, filters["customer"], filters["month"],
+                              filters["plant"], filters["dates"], df)
+    if table.empty:
+        panel.info("No closed GRNs for these filters.")
+        return
+    panel.caption(f"{DAYS_LABEL} from physical receipt to TML challan, closed GRNs; slowest P90 first.")
+    panel.dataframe(table, hide_index=True)
+
+@st.fragment
+def backlog_trend(filters):
+    panel = st.expander("**GRN Backlog Trend**", key="trend_open", on_change="rerun")
+    if not panel.open:
+        return
+
+    version, day, df = current_dataset(filters)
+    start, end = receipt_range(filters["month"], filters["dates"]) or (None, None)
+    trend = cached_trend(version, BACKEND, day, filters["customer"], filters["plant"], start, end, df)
+    if trend.empty:
+        panel.info("No received rows for these filters.")
+        return
+
+    panel.caption("State of the backlog on each day (month / receipt dates pick the window).")
+    c1, c2, c3 = panel.columns(3)
+    c1.markdown(f"**{PENDING}**")
+    c1.line_chart(trend[trend["SERIES"] == PENDING], x="DATE", y="VALUE")
+    c2.markdown(f"**Ageing Buckets** ({DAYS_LABEL.lower()})")
+    c2.line_chart(trend[trend["SERIES"].isin(AGE_BUCKETS)], x="DATE", y="VALUE", color="SERIES")
+    c3.markdown(f"**Average GRN {DAYS_LABEL}**")
+    c3.line_chart(trend[trend["SERIES"] == AVG_DAYS], x="DATE", y="VALUE")
+
+@st.fragment
+def ageing_alerts(filters):
+    panel = st.expander("**Ageing Alerts**", key="alerts_open", on_change="rerun")
+    if not panel.open:
+        return
+    if not TENANT_ALERT_SINKS:
+        panel.info("Alerts are off (GRN_ALERTS).")
+        return
+    if SHARED_DIR:
+        panel.info(f"Alerts are sent by the refresher (grn_shared.py) to {', '.join(TENANT_ALERT_SINKS)}.")
+        return
+
+    monitor = alert_monitor(BACKEND)
+    for error in monitor.errors:
+        panel.warning(f"⚠️ {error}")
+    alerts = pd.DataFrame(list(monitor.recent))
+    for col, key in (("CUSTOMER", "customer"), ("PLANT", "plant")):
+        if selection(filters[key]) and not alerts.empty:
+            alerts = alerts[alerts[col].isin(selection(filters[key]))]
+    if alerts.empty:
+        panel.success("✅ No new ageing alerts.")
+        return
+    panel.caption(f"Latest {len(alerts)} alerts, newest last (checked every {ALERT_EVERY // 60} min); "
+                  f"also sent to {', '.join(TENANT_ALERT_SINKS)}.")
+    panel.dataframe(alerts, hide_index=True)
+
+# Below the fold: only computed once the user opens it
+@st.fragment
+def material_matrix(filters):
+    matrix = st.expander("**Partwise Material Receipt Qty**", key="material_open", on_change="rerun")
+    if not matrix.open:
+        return
+
+    # Defaults to the page's receipt range (the current month when unfiltered); any range works
+    bounds = receipt_range(filters["month"], filters["dates"]) or month_range(today_date().strftime("%b-%Y"))
+    picked = matrix.date_input("**Matrix dates**", bounds, format="DD.MM.YYYY",
+                               key=f"receipt_range_{filters['month']}_{filters['dates']}")
+    if len(picked) != 2:
+        matrix.info("Pick the end date of the range.")
+        return
+
+    table_html = receipts(filters, *picked, html=True)
+    if table_html is None:
+        return
+    table_html = table_html.replace('<th>PART_NO</th>', '<th style="font-size: 12px;">PART NO</th>')
+
+    matrix.markdown(f"""
+    <div class="glass-table">
+        <h3>Partwise Material Receipt Qty (Only Non-Zero)</h3>
+        <div style='text-align: center;'>{table_html}</div>
+    </div>
+    """, unsafe_allow_html=True)
 
-st.markdown(f"""
-<div class="glass-table">
-    <h3>Partwise Material Receipt Qty (Only Non-Zero)</h3>
-    <div style='text-align: center;'>{table_html}</div>
-</div>
-""", unsafe_allow_html=True)
+EXPORTS = {
+    "rows": "Filtered rows", "kpis": "KPIs", "part_pending": "Part Wise GRN Pending Qty",
+    "ageing": "GRN Ageing", "receipts": "Partwise Material Receipt Qty",
+}
+
+# Served by server.py, the buttons link to /api, which streams the file; under plain
+# "streamlit run" it is built on click and held by Streamlit while the session lasts
+@st.fragment
+def downloads(filters):
+    panel = st.expander("**Download**", key="export_open", on_change="rerun")
+    if not panel.open:
+        return
+
+    version, day, df = current_dataset(filters)
+    filters = {**filters, "range": receipt_range(filters["month"], filters["dates"])
+               or month_range(today_date().strftime("%b-%Y"))}
+    rows = len(export_result("rows", filters, version, day, df))
+    panel.caption("Filters as above; the material receipt matrix covers the page's receipt range "
+                  "(the current month when unfiltered).")
+    for name, label in EXPORTS.items():
+        cols = panel.columns([3, 1, 1, 1])
+        cols[0].markdown(f"{label} ({rows:,})" if name == "rows" else label)
+        for col, fmt in zip(cols[1:], ("csv", "xlsx", "parquet")):
+            key = f"export_{name}_{fmt}"
+            if not export_available(fmt) or (name == "rows" and fmt == "xlsx" and rows > XLSX_MAX_ROWS):
+                col.button(fmt.upper(), key=key, disabled=True, help="Not available here")
+            elif api_mounted():
+                col.link_button(fmt.upper(), export_url(name, filters, fmt, TENANT))
+            else:
+                col.download_button(
+                    fmt.upper(), lambda name=name, fmt=fmt: b"".join(
+                        export_stream(export_result(name, filters, version, day, df), fmt)),
+                    file_name=f"{TENANT}-{name.replace('_', '-')}.{EXPORT_FORMATS[fmt][1]}",
+                    mime=EXPORT_FORMATS[fmt][0], on_click="ignore", key=key)
+
+# Ops view of the cache; the same counters are scraped from /metrics (server.py)
+@st.fragment
+def cache_stats():
+    panel = st.expander("**Cache Stats**", key="cache_open", on_change="rerun")
+    if not panel.open:
+        return
+
+    stats = tenant_cache().stats()
+    total = stats["Bytes"].sum() / 2**20
+    stats = stats[stats["Tenant"] == TENANT].set_index("Layer").reindex([*LAYERS, "pinned"]).dropna(how="all")
+    looked_up = stats["hits"] + stats["misses"]
+    stats.insert(2, "MB", stats.pop("Bytes") / 2**20)
+    stats.insert(3, "Hit Rate", stats["hits"] / looked_up.where(looked_up > 0))
+    panel.caption(f"All tenants: {total:.0f} of {CACHE_MB} MB; least recently used results are dropped first, "
+                  "and results of sheets older than the last two versions on refresh.")
+    panel.dataframe(stats.drop(columns="Tenant"), column_config={
+        "MB": st.column_config.NumberColumn(format="%.1f"),
+        "Hit Rate": st.column_config.NumberColumn(format="percent"),
+    })
+
+def as_of_options():
+    past_days = [d for d in snapshot_store().days() if d < today.strftime("%Y-%m-%d")] if SNAPSHOT_DB else []
+    return [LIVE] + past_days[::-1]
+
+def server_dashboard():
+    # ✅ FINAL: Left=Month + Receipt dates, Middle=As of, Right=Plant + Customer (PERFECT POSITIONING)
+    col1, col_dates, col_as_of, col_plant, col2 = st.columns([1, 1, 1, 1, 2])
+    with col1:
+        st.markdown("<div style='padding: 10px 0;'>", unsafe_allow_html=True)
+        selected_month = st.selectbox("**Month**", available_months, key="month_filter")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col_dates:
+        st.markdown("<div style='padding: 10px 0;'>", unsafe_allow_html=True)
+        selected_dates = st.date_input("**Receipt dates**", (), format="DD.MM.YYYY", key="dates_filter")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col_as_of:
+        st.markdown("<div style='padding: 10px 0; text-align: center;'>", unsafe_allow_html=True)
+        selected_as_of = st.selectbox("**As of**", as_of_options(), key="as_of_filter")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col_plant:
+        st.markdown("<div style='padding: 10px 0; text-align: right;'>", unsafe_allow_html=True)
+        selected_plants = st.multiselect("**Plant**", available_plants, placeholder="All", key="plant_filter")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col2:
+        st.markdown("<div style='padding: 10px 0; text-align: right;'>", unsafe_allow_html=True)
+        selected_customers = st.multiselect("**Customer**", available_customers, placeholder="All", key="customer_filter")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # Nothing picked means "All"; a half-picked date range is ignored until it has an end
+    filters = dict(
+        customer=tuple(selected_customers) or "All",
+        plant=tuple(selected_plants) or "All",
+        month=selected_month,
+        dates=tuple(pd.Timestamp(d) for d in selected_dates) if len(selected_dates) == 2 else None,
+        as_of=selected_as_of,
+    )
+    dates_label = " - ".join(d.strftime("%d.%m.%Y") for d in filters["dates"]) if filters["dates"] else "All"
+
+    st.caption(
+        f"Rows: {query('row_count', filters)} (Customer: {', '.join(selected_customers) or 'All'}, "
+        f"Plant: {', '.join(selected_plants) or 'All'}, Month: {selected_month}, "
+        f"Receipt dates: {dates_label}, As of: {selected_as_of})"
+    )
+
+    kpi_row(filters)
+
+    # Second Row
+    r2c1, r2c2 = st.columns([1, 1])
+    with r2c1:
+        pending_table(filters)
+    with r2c2:
+        ageing_table(filters)
+    return filters
+
+# Client mode: filters, KPIs, pending, ageing and the receipt matrix drawn by grn_client.js
+browser_view = st.components.v2.component(
+    "grn_browser", html=FONTS, css=KPI_CSS + CLIENT_CSS, js=CLIENT_JS, isolate_styles=False)
+KPI_SLOTS = {key: f'<span data-kpi="{key}"></span>'
+             for key in ("btst_invoice_qty", "btst_handover_status", "btst_tml_grn_status", "avg_days")}
+
+def browser_dashboard():
+    """The in-browser view; returns the filters last applied to the panels below it."""
+    col_as_of, _ = st.columns([1, 5])
+    with col_as_of:
+        selected_as_of = st.selectbox("**As of**", as_of_options(), key="as_of_filter")
+
+    version, day, df = current_dataset({"as_of": selected_as_of})
+    payload = client_payload(version, BACKEND, day, df)  # built now, so the browser's request is a cache hit
+    if api_mounted():
+        source = {"url": dataset_url(version, day, selected_as_of, TENANT)}
+    else:
+        # Under plain "streamlit run" there is no /api: the payload travels with the component
+        source = {"version": f"{version}@{day:%Y-%m-%d}", "payload": base64.b64encode(payload).decode()}
+    applied = (st.session_state.get("browser") or {}).get("filters") or {}
+    browser_view(key="browser", default={"filters": None}, on_filters_change=lambda: None, data={
+        **source, "as_of": selected_as_of, "filters": applied, "kpis": kpi_cards(KPI_SLOTS, DAYS_LABEL),
+        "ageing_title": f"TML GRN Ageing Day{AGEING_NOTE}", "colors": AGEING_COLORS,
+    })
+    st.caption(f"Filtering in the browser: {len(payload) / 2**10:,.0f} KB loaded once per dataset version.")
+
+    return dict(
+        customer=tuple(applied.get("customer", ())) or "All",
+        plant=tuple(applied.get("plant", ())) or "All",
+        month=applied.get("month", "All"),
+        dates=tuple(pd.Timestamp(d) for d in applied["dates"]) if applied.get("dates") else None,
+        as_of=selected_as_of,
+    )
+
+# Changing a filter reruns this fragment (and the blocks inside it) only
+@st.fragment
+def dashboard():
+    if today_date() != today:
+        st.rerun(scope="app")  # day rolled over: rebuild the day columns
+
+    filters = browser_dashboard() if CLIENT_FILTERS else server_dashboard()
+
+    st.write("---")
+    search_panel(filters)
+    challan_matching(filters)
+    ageing_alerts(filters)
+    turnaround_sla(filters)
+    backlog_trend(filters)
+
+    # Partwise Material Receipt
+    st.write("---")
+    if not CLIENT_FILTERS:
+        material_matrix(filters)  # client mode draws it in the browser
+    downloads(filters)
+    cache_stats()
+
+dashboard()
 
 st.markdown("---")
 st.caption("✅ **PERFECT: Month (LEFT) + Customer (RIGHT) filters working! All data filtered correctly.**")
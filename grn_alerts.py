@@ -0,0 +1,263 @@
+"""Ageing alerts: report challans that cross an ageing bucket or whose pending qty stalls.
+
+AlertMonitor follows the dataset one (version, day) at a time. Every open row
+has up to two timers: the day its age passes the next bucket limit and the day
+its pending qty will have stood still for ``stale_days``. Timers are filed per
+day, so a refresh only touches the rows whose timers fall due and the rows that
+changed (row keys from DeltaSync.changed_since, or a hash diff of the alert
+columns without it). The first dataset is the baseline: whatever is already
+breached then is not reported. New alerts go to every sink (file, webhook, SMTP)
+from a sender thread, so a slow sink never holds up update(). schedule() runs
+the checks on a timer, whether or not anyone has the page open.
+"""
+import collections
+import json
+import queue
+import smtplib
+import threading
+import time
+import urllib.parse
+import urllib.request
+from email.message import EmailMessage
+
+import numpy as np
+import pandas as pd
+
+from grn_calendar import EPOCH, day_number, day_ordinals, days_old_on, today_ordinals
+from grn_data import AGE_BUCKETS, AGE_LIMITS, row_pending
+
+STALE = 0  # timer kind; 1..3 are the buckets a row moves into
+RECENT_ALERTS = 500
+# Columns whose change can move a row's bucket or pending qty
+ALERT_COLUMNS = ["PLANT", "PHY_RCPT_DATE", "TML_CHALLAN_DATE", "PENDING_QTY", "SUPPLIER_QTY", "GRN_QTY"]
+ALERT_FIELDS = ["CUSTOMER", "PLANT", "PART_NO", "Inwarding PO", "AVX Challan No.", "PHY_RCPT_DATE"]
+
+
+class FileSink:
+    """Appends alerts as JSON lines."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alerts):
+        with open(self.path, "a") as f:
+            f.write(alerts.to_json(orient="records", lines=True, date_format="iso").rstrip("\n") + "\n")
+
+
+class WebhookSink:
+    """POSTs {"alerts": [...]} as JSON."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        body = json.dumps({"alerts": json.loads(alerts.to_json(orient="records", date_format="iso"))}).encode()
+        request = urllib.request.Request(self.url, body, {"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class SmtpSink:
+    """One plain-text mail per batch."""
+
+    def __init__(self, host, port, to, sender="grn-dashboard@localhost", timeout=10):
+        self.host, self.port, self.to, self.sender, self.timeout = host, port, to, sender, timeout
+
+    def send(self, alerts):
+        message = EmailMessage()
+        message["Subject"] = f"{len(alerts)} new GRN alert(s)"
+        message["From"], message["To"] = self.sender, self.to
+        message.set_content(alerts.to_string(index=False))
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+
+def make_sink(spec):
+    """Sink from "file:PATH", "http(s)://..." or "smtp://host:port/recipient"."""
+    if spec.startswith("file:"):
+        return FileSink(spec[len("file:"):])
+    if spec.startswith(("http://", "https://")):
+        return WebhookSink(spec)
+    if spec.startswith("smtp://"):
+        url = urllib.parse.urlsplit(spec)
+        return SmtpSink(url.hostname, url.port or 25, urllib.parse.unquote(url.path.lstrip("/")))
+    raise ValueError(f"Unknown alert sink: {spec}")
+
+
+def schedule(check, every, errors, name="grn-alerts"):
+    """Daemon thread calling ``check()`` now and then every ``every`` seconds.
+
+    A failed round is appended to ``errors`` (an AlertMonitor's, so the page shows it) and the
+    schedule goes on.
+    """
+    def loop():
+        while True:
+            try:
+                check()
+            except Exception as e:  # a failed round must not end the schedule
+                errors.append(f"{pd.Timestamp.now():%d.%m.%Y %H:%M} alert check: {e}")
+            time.sleep(every)
+
+    thread = threading.Thread(target=loop, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def alert_keys(old, new):
+    """Row keys whose alert columns differ between two tables (added and removed rows included)."""
+    cols = [c for c in ALERT_COLUMNS if c in old.columns and c in new.columns]
+    before = pd.Series(pd.util.hash_pandas_object(old[cols], index=False).to_numpy(), index=old.index)
+    after = pd.Series(pd.util.hash_pandas_object(new[cols], index=False).to_numpy(), index=new.index)
+    common = after.index.intersection(before.index)
+    same = common[before[common].to_numpy() == after[common].to_numpy()]
+    return after.index.union(before.index).difference(same)
+
+
+class AlertMonitor:
+    def __init__(self, sinks=(), stale_days=14, calendar=None):
+        self.sinks = list(sinks)
+        self.stale_days = stale_days
+        self.calendar = calendar
+        self.version = None
+        self.tml = None
+        self.day = None
+        self.since = None  # row key -> day number its pending qty last changed
+        self.timers = collections.defaultdict(list)  # day number -> [(row keys, kinds)]
+        self.recent = collections.deque(maxlen=RECENT_ALERTS)
+        self.errors = collections.deque(maxlen=20)
+        self.last_run = None
+        self._lock = threading.Lock()
+        self._outbox = queue.Queue()  # alert batches waiting for the sender thread
+        self._sender = None
+
+    def _send(self):
+        while True:
+            alerts = self._outbox.get()
+            for sink in self.sinks:
+                try:
+                    sink.send(alerts)
+                except Exception as e:  # a sink being down must not stop the others
+                    self.errors.append(f"{pd.Timestamp.now():%d.%m.%Y %H:%M} {type(sink).__name__}: {e}")
+            self._outbox.task_done()
+
+    def flush(self):
+        """Wait until every batch so far has been offered to the sinks."""
+        self._outbox.join()
+
+    def _open(self, rows):
+        return (rows["TML_CHALLAN_DATE"].isna() & rows["PHY_RCPT_DATE"].notna()).to_numpy()
+
+    def _buckets(self, rows, day):
+        """Bucket index of each row on ``day``; -1 for closed or undated rows."""
+        age = today_ordinals(rows, EPOCH + day, self.calendar) - day_ordinals(rows, "PHY_RCPT_DATE", self.calendar)
+        return np.where(self._open(rows), np.searchsorted(AGE_LIMITS, np.nan_to_num(age), "left"), -1)
+
+    def _crossing(self, rows, kinds):
+        """Day number on which each row moves into bucket ``kinds`` (1..3)."""
+        due = np.full(len(rows), np.nan)
+        for kind in range(1, len(AGE_BUCKETS)):
+            picked = kinds == kind
+            if picked.any():
+                due[picked] = days_old_on(rows[picked], "PHY_RCPT_DATE", AGE_LIMITS[kind - 1] + 1, self.calendar)
+        return due
+
+    def _file(self, keys, kinds, due, after):
+        keep = due > after  # NaN (no date) is never due
+        keys, kinds, due = np.asarray(keys)[keep], np.asarray(kinds)[keep], due[keep].astype(int)
+        order = np.argsort(due, kind="stable")
+        days, starts = np.unique(due[order], return_index=True)
+        for day, chunk in zip(days, np.split(order, starts[1:])):
+            self.timers[int(day)].append((keys[chunk], kinds[chunk]))
+
+    def _schedule(self, rows, today):
+        """Timers for the next bucket crossing and the stale-pending check of ``rows`` after ``today``."""
+        buckets = self._buckets(rows, today)
+        upcoming = (buckets >= 0) & (buckets < len(AGE_BUCKETS) - 1)
+        self._file(rows.index[upcoming], buckets[upcoming] + 1,
+                   self._crossing(rows[upcoming], buckets[upcoming] + 1), today)
+        pending = row_pending(rows).to_numpy() > 0
+        since = self.since.reindex(rows.index[pending]).to_numpy(dtype=float)
+        self._file(rows.index[pending], np.full(pending.sum(), STALE), since + self.stale_days, today)
+
+    def _report(self, rows, day, labels):
+        age = today_ordinals(rows, EPOCH + day, self.calendar) - day_ordinals(rows, "PHY_RCPT_DATE", self.calendar)
+        alerts = pd.DataFrame({"DAY": pd.Timestamp(EPOCH + day), "ALERT": labels, "ROW_KEY": rows.index})
+        for col in ALERT_FIELDS:
+            alerts[col] = rows[col].to_numpy() if col in rows.columns else ""
+        alerts["AGE_DAYS"] = pd.array(age).astype("Int64")
+        alerts["PENDING_QTY"] = row_pending(rows).to_numpy()
+        return alerts
+
+    def _changed(self, tml, today, changed):
+        """Alerts from rows that changed; resets their pending clock and timers."""
+        found = tml.index.get_indexer(changed)
+        new = tml.iloc[found[found >= 0]]
+        found = self.tml.index.get_indexer(new.index)
+        old = self.tml.iloc[found[found >= 0]]
+        before = pd.Series(self._buckets(old, today), index=old.index).reindex(new.index, fill_value=-1).to_numpy()
+        after = self._buckets(new, today)
+        moved = (after >= 1) & (after > before)
+
+        pending_before = row_pending(old).reindex(new.index)
+        restart = (row_pending(new) != pending_before).to_numpy() | pending_before.isna().to_numpy()
+        since = self.since.reindex(new.index).fillna(today).where(~restart, today)
+        self.since = pd.concat([self.since.drop(changed, errors="ignore"), since])
+
+        self._schedule(new, today)
+        return self._report(new[moved], today, [f"Ageing {AGE_BUCKETS[b]}" for b in after[moved]])
+
+    def _due(self, tml, today):
+        """Alerts from timers falling due up to ``today``; bucket timers chain to the next bucket."""
+        reports = []
+        while True:
+            days = sorted(d for d in self.timers if d <= today)
+            if not days:
+                return reports
+            day = days[0]
+            chunks = self.timers.pop(day)
+            timers = pd.DataFrame({
+                "KEY": np.concatenate([k for k, _ in chunks]), "KIND": np.concatenate([k for _, k in chunks]),
+            }).drop_duplicates()
+            found = tml.index.get_indexer(timers["KEY"])
+            rows = tml.iloc[found[found >= 0]]
+            kinds = timers["KIND"].to_numpy()[found >= 0]
+
+            # A timer still counts only if the row (which may have changed since) still falls due that day
+            crossing = self._open(rows) & (kinds != STALE) & (self._crossing(rows, kinds) == day)
+            stale = (kinds == STALE) & (row_pending(rows).to_numpy() > 0) & (
+                self.since.reindex(rows.index).to_numpy(dtype=float) + self.stale_days == day)
+            reports.append(self._report(rows[crossing], day, [f"Ageing {AGE_BUCKETS[k]}" for k in kinds[crossing]]))
+            reports.append(self._report(rows[stale], day, f"Pending unchanged {self.stale_days} days"))
+
+            chain = crossing & (kinds < len(AGE_BUCKETS) - 1)
+            self._file(rows.index[chain], kinds[chain] + 1, self._crossing(rows[chain], kinds[chain] + 1), day)
+
+    def update(self, tml, today, changed=None, version=None):
+        """Move to ``tml`` (indexed by row key) on ``today``; queues the new alerts for the sinks and returns them.
+
+        ``changed``: row keys that differ from the table seen last, None to diff here.
+        """
+        with self._lock:
+            today = day_number(today)
+            if self.tml is None:
+                self.since = pd.Series(float(today), index=tml.index)
+                self._schedule(tml, today)
+                alerts = self._report(tml.iloc[:0], today, [])
+            else:
+                changed = alert_keys(self.tml, tml) if changed is None else changed
+                reports = [self._changed(tml, today, changed)] if len(changed) else []
+                reports += self._due(tml, today)
+                reports = [r for r in reports if len(r)]
+                alerts = pd.concat(reports, ignore_index=True) if reports else self._report(tml.iloc[:0], today, [])
+            self.tml, self.day, self.version = tml, today, version
+            self.last_run = {"changed": 0 if changed is None else len(changed), "alerts": len(alerts)}
+
+            if len(alerts):
+                self.recent.extend(alerts.to_dict("records"))
+                if self.sinks:
+                    if self._sender is None:
+                        self._sender = threading.Thread(target=self._send, name="grn-alert-sinks", daemon=True)
+                        self._sender.start()
+                    self._outbox.put(alerts)
+            return alerts
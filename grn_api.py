@@ -0,0 +1,174 @@
+"""Read-only HTTP API: the page's KPIs, tables and rows as JSON or files, mounted by server.py.
+
+    GET /api/kpis | /api/part-pending | /api/ageing | /api/material-receipts | /api/rows
+        ?tenant=NAME&customer=..&customer=..&plant=..&month=Jan-2026
+        &start=2026-01-01&end=2026-01-31&as_of=2026-01-15
+        &format=json|arrow|csv|xlsx|parquet
+    GET /api/dataset?tenant=NAME&as_of=2026-01-15&version=V&day=2026-01-31
+
+customer and plant repeat for several values; start/end filter receipt dates
+(material-receipts: month and start/end give the matrix range as on the page,
+the current month by default); as_of reads a daily snapshot. rows are the
+filtered detail rows, as files only. Files are streamed chunk by chunk
+(grn_export); csv, xlsx and parquet come as attachments, which is what the
+page's download buttons link to. Answers come from the same caches as the
+page: every page run registers its tenant's query function here, so a tenant
+is served once the page has loaded it in this process (503 before). The ETag
+is the dataset version, day and request, so a poller's If-None-Match is
+answered with 304 without touching the tables. dataset is the page's client
+mode payload (grn_client); its URL names the version and day, so while they
+are current the browser keeps it without asking again.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import urllib.parse
+
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import grn_export
+from grn_data import month_range, receipt_range, selection, today_date
+from grn_offload import OffloadTimeout
+
+ENDPOINTS = {
+    "kpis": "kpis", "part-pending": "part_pending", "ageing": "ageing", "material-receipts": "receipts",
+    "rows": "rows", "dataset": "client",
+}
+LIVE = "Live"
+
+_providers = {}  # tenant -> (version(), query(name, filters))
+_default = None
+_mounted = False
+_lock = threading.Lock()
+
+
+def routes():
+    """Starlette routes for st.App; the page links its downloads here once they are mounted."""
+    global _mounted
+    _mounted = True
+    return [Route("/api/{name}", endpoint)]
+
+
+def mounted():
+    return _mounted
+
+
+def export_url(name, filters, fmt, tenant=None):
+    """Relative URL of query ``name`` under the page's ``filters``, as ``fmt``."""
+    params = [("tenant", tenant)] if tenant else []
+    for key in ("customer", "plant"):
+        params += [(key, value) for value in selection(filters[key]) or []]
+    if filters["month"] != "All":
+        params.append(("month", filters["month"]))
+    if filters["dates"]:
+        params += [("start", f"{filters['dates'][0]:%Y-%m-%d}"), ("end", f"{filters['dates'][1]:%Y-%m-%d}")]
+    if filters.get("as_of", LIVE) != LIVE:
+        params.append(("as_of", filters["as_of"]))
+    path = next(path for path, query in ENDPOINTS.items() if query == name)
+    return f"/api/{path}?" + urllib.parse.urlencode(params + [("format", fmt)])
+
+
+def dataset_url(version, day, as_of=LIVE, tenant=None):
+    """Relative URL of the client mode payload of ``version`` on ``day``."""
+    params = [("tenant", tenant)] if tenant else []
+    if as_of != LIVE:
+        params.append(("as_of", as_of))
+    return "/api/dataset?" + urllib.parse.urlencode(params + [("version", version), ("day", f"{day:%Y-%m-%d}")])
+
+
+def register(tenant, version, query, default=False):
+    """Serve ``tenant`` with the page's ``version()`` and ``query(name, filters)``."""
+    global _default
+    with _lock:
+        _providers[tenant] = (version, query)
+        if default:
+            _default = tenant
+
+
+def request_filters(params, name):
+    """Page-style filters from the query string; raises ValueError on bad dates."""
+    start, end = params.get("start"), params.get("end")
+    dates = (pd.Timestamp(start), pd.Timestamp(end)) if start and end else None
+    filters = dict(
+        customer=tuple(params.getlist("customer")) or "All",
+        plant=tuple(params.getlist("plant")) or "All",
+        month=params.get("month", "All"),
+        dates=dates,
+        as_of=params.get("as_of", LIVE),
+    )
+    if filters["as_of"] != LIVE:
+        filters["as_of"] = f"{pd.Timestamp(filters['as_of']):%Y-%m-%d}"
+    if name == "receipts":
+        filters["range"] = receipt_range(filters["month"], dates) or month_range(today_date().strftime("%b-%Y"))
+    return filters
+
+
+def to_json(result):
+    if isinstance(result, dict):
+        return json.dumps(result, default=lambda v: v.item() if hasattr(v, "item") else str(v))
+    return "[]" if result is None else result.to_json(orient="records", date_format="iso")
+
+
+async def endpoint(request):
+    name = ENDPOINTS.get(request.path_params["name"])
+    tenant = request.query_params.get("tenant", _default)
+    fmt = request.query_params.get("format", "json")
+    if name is None:
+        return JSONResponse({"error": f"unknown endpoint, use one of {sorted(ENDPOINTS)}"}, 404)
+    if fmt != "json" and not grn_export.available(fmt):
+        return JSONResponse({"error": f"format is json or one of {sorted(grn_export.FORMATS)} "
+                                      "(arrow and parquet need pyarrow, xlsx openpyxl)"}, 400)
+    if name == "rows" and fmt == "json":
+        return JSONResponse({"error": "rows come as files: format=csv, xlsx, parquet or arrow"}, 400)
+    if tenant is None:
+        return JSONResponse({"error": "pass ?tenant=NAME"}, 400)
+    if tenant not in _providers:
+        return JSONResponse({"error": f"tenant {tenant} is not loaded yet"}, 503, {"Retry-After": "30"})
+    try:
+        filters = request_filters(request.query_params, name)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, 400)
+
+    version, query = _providers[tenant]
+    current = await run_in_threadpool(version)
+    if current is None:
+        return JSONResponse({"error": "dataset not available"}, 503, {"Retry-After": "30"})
+    request_key = sorted(request.query_params.multi_items())
+    etag = '"' + hashlib.sha1(repr((current, str(today_date()), name, request_key)).encode()).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Dataset-Version": current}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        result = await run_in_threadpool(query, name, filters)
+    except OffloadTimeout as e:
+        return JSONResponse({"error": str(e)}, 503, {"Retry-After": "10"})
+    if name == "client":
+        return dataset_response(request, result, current, headers)
+    if fmt == "json":
+        return Response(to_json(result), media_type="application/json", headers=headers)
+    if fmt == "xlsx" and isinstance(result, grn_export.Rows) and len(result) > grn_export.XLSX_MAX_ROWS:
+        return JSONResponse({"error": f"{len(result):,} rows do not fit in one sheet; use csv or parquet"}, 400)
+    media_type, extension = grn_export.FORMATS[fmt]
+    if fmt != "arrow":
+        headers["Content-Disposition"] = f'attachment; filename="{tenant}-{request.path_params["name"]}.{extension}"'
+    return StreamingResponse(grn_export.stream(result, fmt), media_type=media_type, headers=headers)
+
+
+def dataset_response(request, payload, current, headers):
+    """The gzip payload as is (decompressed for clients that do not take gzip)."""
+    params = request.query_params
+    day = params.get("as_of") or f"{today_date():%Y-%m-%d}"
+    if params.get("day") == day and (params.get("as_of") or params.get("version") == current):
+        # The URL names what it holds: nothing to revalidate until the version or day moves on
+        headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    headers["Vary"] = "Accept-Encoding"
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        payload = gzip.decompress(payload)
+    return Response(payload, media_type="application/octet-stream", headers=headers)
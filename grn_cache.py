@@ -0,0 +1,273 @@
+"""Memoized results of every tenant, per layer, under one memory budget.
+
+Entries are keyed on (tenant, layer, function, arguments); arguments whose
+name starts with "_" are left out of the key, as with st.cache_*. Layers are
+the stages of the page: the sheet fetch, normalization, aggregate structures
+(indexes, rollups, backends) and rendered views (query results). Every hit
+moves an entry to the back, so when a tenant or a layer goes over its own
+budget, or the cache over the global one, the least recently used entries are
+dropped first. Sizes are estimated once, when an entry is stored.
+
+An entry also ends when its TTL runs out or when its dataset version is
+retired: the cache keeps the last KEEP_VERSIONS live versions per tenant
+(new_version), so sessions still on the previous sheet keep their hits.
+Entries built with a ``release`` callback hand their value to it on the way
+out, however they go (files written for the entry are deleted there).
+
+Stateful objects that must outlive eviction (delta sync, alert monitor, ...)
+are pinned instead: never dropped, measured when stats() is asked for, and
+counted against the global budget from then on.
+
+One cache serves the whole process (shared_cache), so the scrape endpoint in
+server.py reads the same counters the page updates.
+"""
+import collections
+import functools
+import inspect
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+LAYERS = ("fetch", "normalize", "aggregate", "render")
+PINNED = "pinned"
+KEEP_VERSIONS = 2
+COUNTERS = ("hits", "misses", "evictions", "expired", "invalidated")
+
+_MISS = object()
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def estimate_bytes(obj, seen=None):
+    """Rough deep size of ``obj``; objects reached twice are counted once.
+
+    Objects holding memory Python cannot see (Polars frames, embedded databases)
+    report it in an ``nbytes`` attribute, set when they are built.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_bytes(k, seen) + estimate_bytes(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+        return sys.getsizeof(obj) + sum(estimate_bytes(v, seen) for v in obj)
+    if isinstance(getattr(obj, "nbytes", None), int):
+        return sys.getsizeof(obj) + obj.nbytes
+    if hasattr(obj, "__dict__") and not isinstance(obj, type) and not callable(obj):
+        return sys.getsizeof(obj) + estimate_bytes(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+
+class Entry:
+    __slots__ = ("value", "nbytes", "expires", "version", "release")
+
+    def __init__(self, value, nbytes, expires, version, release=None):
+        self.value, self.nbytes, self.expires, self.version = value, nbytes, expires, version
+        self.release = release
+
+
+class TenantCache:
+    def __init__(self, budget_bytes, tenant_budgets=None, layer_budgets=None):
+        self.budget = budget_bytes
+        self.tenant_budgets = dict(tenant_budgets or {})
+        self.layer_budgets = dict(layer_budgets or {})
+        self._entries = collections.OrderedDict()  # (tenant, layer, name, args) -> Entry
+        self._bytes = collections.Counter()  # (tenant, layer) -> bytes held
+        self._counts = collections.defaultdict(collections.Counter)  # (tenant, layer) -> COUNTERS
+        self._versions = collections.defaultdict(collections.deque)  # tenant -> live versions, newest last
+        self._pinned = {}
+        self._pinned_bytes = collections.Counter()  # tenant -> bytes, as of the last stats()
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISS
+        if entry.expires is not None and entry.expires < time.monotonic():
+            self._drop(key, "expired")
+            return _MISS
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def _drop(self, key, reason):
+        entry = self._entries.pop(key)
+        self._bytes[key[:2]] -= entry.nbytes
+        self._counts[key[:2]][reason] += 1
+        if entry.release is not None:
+            entry.release(entry.value)
+
+    def _held(self, tenant=None, layer=None):
+        return sum(n for (t, l), n in self._bytes.items()
+                   if (tenant is None or t == tenant) and (layer is None or l == layer))
+
+    def _evict(self, keep):
+        tenant, layer = keep[:2]
+        scopes = [
+            (self.tenant_budgets.get(tenant), lambda k: k[0] == tenant,
+             lambda: self._held(tenant=tenant) + self._pinned_bytes[tenant]),
+            (self.layer_budgets.get(layer), lambda k: k[1] == layer, lambda: self._held(layer=layer)),
+            (self.budget, lambda k: True, lambda: self._held() + sum(self._pinned_bytes.values())),
+        ]
+        for limit, within, held in scopes:
+            if limit is None:
+                continue
+            for key in [k for k in self._entries if within(k) and k != keep]:
+                if held() <= limit:
+                    break
+                self._drop(key, "evictions")
+
+    def get(self, tenant, layer, name, args, build, ttl=None, version=None, release=None):
+        """Cached ``build()`` for (tenant, layer, name, args); one build at a time per key."""
+        key = (tenant, layer, name, args)
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISS:
+                self._counts[key[:2]]["hits"] += 1
+                return value
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISS:
+                    self._counts[key[:2]]["hits"] += 1
+                    return value
+                self._counts[key[:2]]["misses"] += 1
+            try:
+                value = build()
+                size = estimate_bytes(value)
+                with self._lock:
+                    expires = None if ttl is None else time.monotonic() + ttl
+                    self._entries[key] = Entry(value, size, expires, version, release)
+                    self._bytes[key[:2]] += size
+                    self._evict(key)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return value
+
+    def memoize(self, tenant, layer, ttl=None, release=None):
+        """Decorator: like st.cache_resource, but in this cache under ``tenant`` and ``layer``.
+
+        A ``version`` argument ties the entry to that dataset version (see new_version);
+        ``release(value)`` is called when the entry is dropped.
+        """
+        def decorate(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = tuple((k, v) for k, v in bound.arguments.items() if not k.startswith("_"))
+                return self.get(tenant, layer, func.__qualname__, key, lambda: func(*args, **kwargs), ttl,
+                                bound.arguments.get("version"), release)
+            return wrapper
+        return decorate
+
+    def new_version(self, tenant, version, keep=KEEP_VERSIONS):
+        """Record ``version`` as the tenant's newest; entries of versions before the last ``keep`` go."""
+        with self._lock:
+            versions = self._versions[tenant]
+            if version in versions:
+                return
+            versions.append(version)
+            retired = set()
+            while len(versions) > keep:
+                retired.add(versions.popleft())
+            for key in [k for k, e in self._entries.items() if k[0] == tenant and e.version in retired]:
+                self._drop(key, "invalidated")
+
+    def pinned(self, tenant, name, args, build):
+        """The one ``build()`` for (tenant, name, args), kept for good; built outside the cache lock."""
+        key = (tenant, name, args)
+        with self._lock:
+            if key in self._pinned:
+                return self._pinned[key]
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                if key in self._pinned:
+                    return self._pinned[key]
+            try:
+                value = build()
+                with self._lock:
+                    self._pinned[key] = value
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return value
+
+    def pin(self, tenant):
+        """Decorator: one result per arguments under ``tenant``, never evicted."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                return self.pinned(tenant, func.__qualname__, args, lambda: func(*args))
+            return wrapper
+        return decorate
+
+    def stats(self, measure_pinned=True):
+        """Entries, bytes and counters per (tenant, layer); pinned objects are measured now."""
+        if measure_pinned:
+            with self._lock:
+                pinned = dict(self._pinned)
+            sizes = collections.Counter()
+            for (tenant, _, _), value in pinned.items():
+                sizes[tenant] += estimate_bytes(value)
+            with self._lock:
+                self._pinned_bytes = sizes
+        with self._lock:
+            entries = collections.Counter(k[:2] for k in self._entries)
+            pinned = collections.Counter(k[0] for k in self._pinned)
+            rows = [
+                {"Tenant": t, "Layer": l, "Entries": entries[t, l], "Bytes": self._bytes[t, l],
+                 **{c: self._counts[t, l][c] for c in COUNTERS}}
+                for t, l in sorted(set(self._bytes) | set(self._counts))
+            ] + [
+                {"Tenant": t, "Layer": PINNED, "Entries": pinned[t], "Bytes": self._pinned_bytes[t],
+                 **{c: 0 for c in COUNTERS}}
+                for t in sorted(pinned)
+            ]
+        return pd.DataFrame(rows, columns=["Tenant", "Layer", "Entries", "Bytes", *COUNTERS])
+
+    def metrics(self):
+        """Prometheus text exposition of stats() (pinned sizes as last measured)."""
+        stats = self.stats(measure_pinned=False)
+        lines = []
+        series = [("Entries", "entries", "gauge"), ("Bytes", "bytes", "gauge")]
+        for col, name, kind in series + [(c, f"{c}_total", "counter") for c in COUNTERS]:
+            lines.append(f"# TYPE grn_cache_{name} {kind}")
+            for row in stats.itertuples(index=False):
+                labels = f'tenant="{row.Tenant}",layer="{row.Layer}"'
+                lines.append(f"grn_cache_{name}{{{labels}}} {getattr(row, col)}")
+        lines.append("# TYPE grn_cache_budget_bytes gauge")
+        lines.append(f'grn_cache_budget_bytes{{scope="all"}} {self.budget}')
+        for scope, budgets in (("tenant", self.tenant_budgets), ("layer", self.layer_budgets)):
+            for name, limit in sorted(budgets.items()):
+                lines.append(f'grn_cache_budget_bytes{{scope="{scope}",{scope}="{name}"}} {limit}')
+        return "\n".join(lines) + "\n"
+
+
+def shared_cache(budget_bytes, tenant_budgets=None, layer_budgets=None):
+    """The process-wide cache, made by the first call (later calls get it as is)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TenantCache(budget_bytes, tenant_budgets, layer_budgets)
+        return _shared
+
+
+def current_cache():
+    """The process-wide cache, or None before the page made it."""
+    return _shared
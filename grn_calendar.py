@@ -0,0 +1,108 @@
+"""Working-day calendars per plant, for ageing in business days.
+
+Every date gets an ordinal: the number of working days between 1970-01-01
+and that date under its plant's calendar (np.busday_count). The working days
+from a to b are then ordinal(b) - ordinal(a), so ageing stays a plain
+subtraction in every engine. Without a calendar the ordinal is the calendar
+day number and nothing changes.
+
+Calendar file (JSON), plant entries add to the default holidays:
+
+    {
+      "default": {"weekmask": "Mon Tue Wed Thu Fri Sat", "holidays": ["2026-01-26"]},
+      "plants": {"1001": {"weekmask": "Mon Tue Wed Thu Fri", "holidays": ["2026-03-04"]}}
+    }
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from grn_index import text_values
+
+EPOCH = np.datetime64("1970-01-01", "D")
+DEFAULT_WEEKMASK = "Mon Tue Wed Thu Fri Sat"
+
+
+def day_number(ts):
+    return int((np.datetime64(pd.Timestamp(ts), "D") - EPOCH).astype(int))
+
+
+class WorkCalendar:
+    def __init__(self, default=None, plants=None):
+        default = default or {}
+        weekmask = default.get("weekmask", DEFAULT_WEEKMASK)
+        holidays = list(default.get("holidays", []))
+        self.default = np.busdaycalendar(weekmask=weekmask, holidays=holidays)
+        self.plants = {
+            str(plant): np.busdaycalendar(
+                weekmask=spec.get("weekmask", weekmask),
+                holidays=holidays + list(spec.get("holidays", [])),
+            )
+            for plant, spec in (plants or {}).items()
+        }
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec.get("default"), spec.get("plants"))
+
+    def _groups(self, plants):
+        """(rows, busdaycalendar) for every plant calendar plus the default one."""
+        own = np.zeros(len(plants), dtype=bool)
+        for plant, cal in self.plants.items():
+            rows = plants == plant
+            own |= rows
+            yield rows, cal
+        yield ~own, self.default
+
+    def ordinals(self, dates, plants):
+        """Working-day ordinal of each date under its plant's calendar; NaN where the date is missing."""
+        days = np.asarray(dates, dtype="datetime64[D]")
+        plants = np.asarray(plants, dtype=object)
+        out = np.full(len(days), np.nan)
+        dated = ~np.isnat(days)
+        for rows, cal in self._groups(plants):
+            rows &= dated
+            out[rows] = np.busday_count(EPOCH, days[rows], busdaycal=cal)
+        return out
+
+    def today_ordinals(self, today, plants):
+        """Ordinal of ``today`` for each plant in ``plants``, and for any other plant."""
+        day = np.datetime64(pd.Timestamp(today), "D")
+        default = int(np.busday_count(EPOCH, day, busdaycal=self.default))
+        return {p: int(np.busday_count(EPOCH, day, busdaycal=self.plants.get(p, self.default))) for p in plants}, default
+
+
+def day_ordinals(tml, col, calendar=None):
+    """Ordinal of a date column: working days with a calendar, calendar days without."""
+    days = tml[col].to_numpy(dtype="datetime64[D]")
+    if calendar is None:
+        return np.where(np.isnat(days), np.nan, (days - EPOCH).astype(float))
+    return calendar.ordinals(days, text_values(tml, "PLANT").to_numpy())
+
+
+def today_ordinals(tml, today, calendar=None):
+    """Ordinal of ``today`` for every row (it depends on the row's plant with a calendar)."""
+    if calendar is None:
+        return np.full(len(tml), float(day_number(today)))
+    plants = text_values(tml, "PLANT")
+    by_plant, _ = calendar.today_ordinals(today, plants.unique())
+    return plants.map(by_plant).to_numpy(dtype=float)
+
+
+def days_old_on(tml, col, days, calendar=None):
+    """Calendar day number on which each date in ``col`` becomes ``days`` (>= 1) days old."""
+    dates = tml[col].to_numpy(dtype="datetime64[D]")
+    if calendar is None:
+        return np.where(np.isnat(dates), np.nan, (dates - EPOCH).astype(float) + days)
+    # Age is ordinal(D) - ordinal(date), the working days in [date, D): one past the days-th working day
+    plants = text_values(tml, "PLANT").to_numpy()
+    out = np.full(len(dates), np.nan)
+    dated = ~np.isnat(dates)
+    for rows, cal in calendar._groups(plants):
+        rows &= dated
+        reached = np.busday_offset(dates[rows], days - 1, roll="forward", busdaycal=cal)
+        out[rows] = (reached - EPOCH).astype(float) + 1
+    return out
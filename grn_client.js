@@ -0,0 +1,367 @@
+// In-browser filtering for the page's client mode: decodes the grn_client.py payload once per
+// dataset version and recomputes the KPIs, the part-wise pending table, the ageing buckets and the
+// receipt matrix on every filter change, with the same rules as the pandas backend.
+
+const TYPES = {
+  u1: Uint8Array, u2: Uint16Array, u4: Uint32Array, i2: Int16Array, i4: Int32Array, f8: Float64Array,
+};
+const MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+const DAY_MS = 86400000;
+const datasets = new Map(); // source -> Promise of the decoded dataset
+
+const escape = (text) => String(text).replace(/[&<>"']/g, (c) => `&#${c.charCodeAt(0)};`);
+const isoDay = (day) => new Date(day * DAY_MS).toISOString().slice(0, 10);
+const epochDay = (iso) => Math.floor(Date.parse(`${iso}T00:00:00Z`) / DAY_MS);
+const byText = (names) => (a, b) => (names[a] < names[b] ? -1 : names[a] > names[b] ? 1 : 0);
+
+// Python's round(): halves go to the even neighbour
+function roundHalfEven(x) {
+  const r = Math.round(x);
+  return Math.abs(x % 1) === 0.5 && r % 2 !== 0 ? r - 1 : r;
+}
+
+// format_qty(): blank for zero, whole units otherwise
+const formatQty = (x) => (x === 0 ? "" : String(Math.trunc(x)));
+
+async function bytesOf(data) {
+  let bytes;
+  if (data.url) {
+    const response = await fetch(data.url, { credentials: "same-origin" });
+    if (!response.ok) throw new Error(`${response.status} ${await response.text()}`);
+    bytes = new Uint8Array(await response.arrayBuffer());
+  } else {
+    bytes = Uint8Array.from(atob(data.payload), (c) => c.charCodeAt(0));
+  }
+  if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+    // still gzip: inline payloads, or a response whose Content-Encoding was not applied
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+    bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+  }
+  return bytes;
+}
+
+async function decode(data) {
+  const bytes = await bytesOf(data);
+  if (new TextDecoder().decode(bytes.subarray(0, 4)) !== "GRN1") throw new Error("not a GRN payload");
+  const length = new DataView(bytes.buffer, bytes.byteOffset + 4, 4).getUint32(0, true);
+  const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + length)));
+  const buffer = bytes.buffer.slice(bytes.byteOffset + 8 + length, bytes.byteOffset + bytes.byteLength);
+  const columns = {};
+  const missing = {};
+  for (const [name, [type, offset, count, marker]] of Object.entries(header.columns)) {
+    columns[name] = new TYPES[type](buffer, offset, count);
+    missing[name] = marker;
+  }
+  return { ...header, columns, missing };
+}
+
+function load(data) {
+  const source = data.url || data.version;
+  if (!datasets.has(source)) {
+    datasets.set(source, decode(data));
+    datasets.get(source).catch(() => datasets.delete(source));
+  }
+  return datasets.get(source);
+}
+
+// Receipt-day bounds (epoch days) of the month and date filters, like grn_data.receipt_range
+function receiptRange(month, dates) {
+  let start = null;
+  let end = null;
+  if (month !== "All") {
+    const [name, year] = month.split("-");
+    const m = MONTHS.indexOf(name);
+    start = Date.UTC(+year, m, 1) / DAY_MS;
+    end = Date.UTC(+year, m + 1, 0) / DAY_MS;
+  }
+  if (dates) {
+    const [first, last] = dates.map(epochDay);
+    start = start === null ? first : Math.max(start, first);
+    end = end === null ? last : Math.min(end, last);
+  }
+  return start === null ? null : [start, end];
+}
+
+// Lookup table of the picked codes, or null for "All"
+function picked(names, selected) {
+  if (!selected.length) return null;
+  const wanted = new Uint8Array(names.length);
+  selected.forEach((name) => {
+    const code = names.indexOf(name);
+    if (code >= 0) wanted[code] = 1;
+  });
+  return wanted;
+}
+
+function rowFilter(ds, customers, plants, bounds) {
+  const { customer, plant, rcpt } = ds.columns;
+  const gone = ds.missing.rcpt;
+  const wantCustomer = picked(ds.customers, customers);
+  const wantPlant = picked(ds.plants, plants);
+  const lo = bounds && bounds[0] - ds.day0;
+  const hi = bounds && bounds[1] - ds.day0;
+  return (i) => {
+    if (wantCustomer && !wantCustomer[customer[i]]) return false;
+    if (wantPlant && !wantPlant[plant[i]]) return false;
+    if (!bounds) return true;
+    const r = rcpt[i];
+    return r !== gone && r >= lo && r <= hi; // NaN (float columns) fails the comparisons
+  };
+}
+
+function summarize(ds, filters) {
+  const { part, rcpt, age, flags, pending, customer } = ds.columns;
+  const keep = rowFilter(ds, filters.customer, filters.plant, receiptRange(filters.month, filters.dates));
+  const noAge = ds.missing.age;
+  const noRcpt = ds.missing.rcpt;
+  const partPending = new Float64Array(ds.parts.length);
+  const partSeen = new Uint8Array(ds.parts.length);
+  const buckets = ds.buckets.length;
+  const counts = new Float64Array((buckets + 1) * ds.customers.length); // last row: "No Data"
+  const customerSeen = new Uint8Array(ds.customers.length);
+  let rows = 0;
+  const kpis = { btst_invoice_qty: 0, btst_handover_status: 0, btst_tml_grn_status: 0 };
+  let ageSum = 0;
+  let ageCount = 0;
+
+  for (let i = 0; i < ds.rows; i++) {
+    if (!keep(i)) continue;
+    rows++;
+    kpis.btst_invoice_qty += flags[i] & 1;
+    kpis.btst_handover_status += (flags[i] >> 1) & 1;
+    kpis.btst_tml_grn_status += (flags[i] >> 2) & 1;
+    const days = age[i];
+    const hasAge = days !== noAge && days === days;
+    if (hasAge) {
+      ageSum += days;
+      ageCount++;
+    }
+    partPending[part[i]] += pending[i];
+    partSeen[part[i]] = 1;
+    const r = rcpt[i];
+    if (r !== noRcpt && r === r) {
+      let bucket = buckets;
+      if (hasAge) {
+        bucket = ds.limits.findIndex((limit) => days <= limit);
+        if (bucket < 0) bucket = buckets - 1;
+      }
+      counts[bucket * ds.customers.length + customer[i]]++;
+      customerSeen[customer[i]] = 1;
+    }
+  }
+  kpis.avg_days = ageCount ? roundHalfEven(ageSum / ageCount) : 0;
+
+  const parts = [];
+  partSeen.forEach((seen, code) => seen && parts.push(code));
+  parts.sort(byText(ds.parts));
+  const customers = [];
+  customerSeen.forEach((seen, code) => seen && customers.push(code));
+  customers.sort(byText(ds.customers));
+  return {
+    rows,
+    kpis,
+    pending: parts.map((code) => [ds.parts[code], Math.trunc(partPending[code])]),
+    ageing: customers.length ? { customers, counts } : null,
+  };
+}
+
+// Receipt qty per part and calendar day between two epoch days, like grn_rollup.ReceiptRollup.matrix
+function matrix(ds, filters, start, end) {
+  const { part, rcpt, qty } = ds.columns;
+  const keep = rowFilter(ds, filters.customer, filters.plant, null);
+  const gone = ds.missing.rcpt;
+  const days = end - start + 1;
+  const first = new Map(); // part code -> its first row among the picked customers and plants
+  const sums = new Map(); // part code -> daily qty
+  for (let i = 0; i < ds.rows; i++) {
+    if (!keep(i)) continue;
+    if (!first.has(part[i])) first.set(part[i], i);
+    const day = rcpt[i] + ds.day0 - start;
+    if (!qty[i] || rcpt[i] === gone || !(day >= 0 && day < days)) continue;
+    let daily = sums.get(part[i]);
+    if (!daily) sums.set(part[i], (daily = new Float64Array(days)));
+    daily[day] += qty[i];
+  }
+  // the rollup lists parts in the order their (customer, plant, part) rows first appear
+  const parts = [...sums.keys()].sort((a, b) => first.get(a) - first.get(b));
+  return { parts, sums, days };
+}
+
+function table(head, rows) {
+  return `<table border="1" class="dataframe"><thead><tr style="text-align: right;">${head.join("")}</tr></thead>`
+    + `<tbody>${rows.map((cells) => `<tr>${cells.map((c) => `<td>${escape(c)}</td>`).join("")}</tr>`).join("")}`
+    + "</tbody></table>";
+}
+
+function ageingTable(ds, ageing, colors) {
+  // grn_reports.ageing_html
+  if (!ageing) return "<div style='text-align: center;'>No ageing data</div>";
+  const th = "<th style='padding:8px; border:1px solid rgba(0,0,0,0.3); font-weight: bold;'>";
+  const td = "<td style='font-weight: bold; font-size: 14px;'>";
+  const n = ds.customers.length;
+  let html = "<table style='margin:auto; border-collapse: collapse; color:black;'>"
+    + `<tr style='background-color: #4ca0ff; color: white;'>${th}Bucket</th>`
+    + ageing.customers.map((code) => `${th}${escape(ds.customers[code])}</th>`).join("")
+    + `${th}Total</th></tr>`;
+  ds.buckets.forEach((bucket, b) => {
+    const color = colors[bucket] || { bg: "#ffffff", color: "#ffffff" };
+    const values = ageing.customers.map((code) => ageing.counts[b * n + code]);
+    html += `<tr style='background-color:${color.bg}; color:${color.color}; font-weight: bold;'>${td}${escape(bucket)}</td>`
+      + [...values, values.reduce((a, v) => a + v, 0)].map((v) => `${td}${v}</td>`).join("") + "</tr>";
+  });
+  return `${html}</table>`;
+}
+
+function multiPick(label, names) {
+  const options = names.filter((name) => name).sort();
+  return `<details data-pick="${label.toLowerCase()}"><summary>${label}: <span>All</span></summary><div>`
+    + options.map((name) => `<label><input type="checkbox" value="${escape(name)}"> ${escape(name)}</label>`).join("")
+    + "</div></details>";
+}
+
+function mount(view, ds, data, setStateValue) {
+  const saved = view.parentNode.grnFilters || data.filters || {};
+  const filters = {
+    customer: (saved.customer || []).filter((name) => ds.customers.includes(name)),
+    plant: (saved.plant || []).filter((name) => ds.plants.includes(name)),
+    month: ds.months.includes(saved.month) ? saved.month : "All",
+    dates: saved.dates || null,
+  };
+  const today = epochDay(ds.day);
+
+  view.innerHTML = `
+    <div class="grn-filters">
+      <label>Month<select data-filter="month">${["All", ...ds.months].map((m) => `<option>${m}</option>`).join("")}</select></label>
+      <label>Receipt dates<input type="date" data-filter="from"></label>
+      <label>&nbsp;<input type="date" data-filter="to"></label>
+      <div>${multiPick("Plant", ds.plants)}${multiPick("Customer", ds.customers)}</div>
+    </div>
+    <div class="grn-caption" data-out="caption"></div>
+    ${data.kpis}
+    <div class="grn-row">
+      <div class="glass-table glass-table-red fixed-height">
+        <h3>TML Part Wise GRN Pending Qty</h3>
+        <div style='text-align: center;' data-out="pending"></div>
+      </div>
+      <div class="glass-table fixed-height">
+        <h3>${escape(data.ageing_title)}</h3>
+        <div data-out="ageing"></div>
+      </div>
+    </div>
+    <details data-out="matrix">
+      <summary><b>Partwise Material Receipt Qty</b></summary>
+      <div class="grn-filters">
+        <label>Matrix dates<input type="date" data-matrix="from"></label>
+        <label>&nbsp;<input type="date" data-matrix="to"></label>
+      </div>
+      <div class="glass-table">
+        <h3>Partwise Material Receipt Qty (Only Non-Zero)</h3>
+        <div style='text-align: center;' data-out="receipts"></div>
+      </div>
+    </details>
+    <button type="button" data-out="apply">Filter the panels below</button>
+    <span class="grn-caption">Search, matching, alerts, turnaround, trend and downloads use these filters once applied.</span>`;
+
+  const $ = (selector) => view.querySelector(selector);
+  $("[data-filter=month]").value = filters.month;
+  if (filters.dates) [$("[data-filter=from]").value, $("[data-filter=to]").value] = filters.dates;
+  for (const key of ["plant", "customer"]) {
+    view.querySelectorAll(`[data-pick=${key}] input`).forEach((box) => {
+      box.checked = filters[key].includes(box.value);
+    });
+  }
+
+  // Defaults to the page's receipt range (the current month when unfiltered), like the server view
+  function resetMatrixDates() {
+    const bounds = receiptRange(filters.month, filters.dates)
+      || [epochDay(`${ds.day.slice(0, 8)}01`), Date.UTC(+ds.day.slice(0, 4), +ds.day.slice(5, 7), 0) / DAY_MS];
+    $("[data-matrix=from]").value = isoDay(bounds[0]);
+    $("[data-matrix=to]").value = isoDay(bounds[1]);
+  }
+
+  function renderMatrix() {
+    if (!$("[data-out=matrix]").open) return;
+    const from = $("[data-matrix=from]").value;
+    const to = $("[data-matrix=to]").value;
+    if (!from || !to) {
+      $("[data-out=receipts]").textContent = "Pick the end date of the range.";
+      return;
+    }
+    const start = epochDay(from);
+    const end = epochDay(to);
+    const { parts, sums, days } = matrix(ds, filters, start, end);
+    // The year is added when the range crosses one, like grn_rollup.day_label_format
+    const withYear = from.slice(0, 4) !== to.slice(0, 4);
+    const labels = Array.from({ length: Math.max(days, 0) }, (_, k) => {
+      const date = new Date((start + k) * DAY_MS);
+      const label = `${String(date.getUTCDate()).padStart(2, "0")}-${MONTHS[date.getUTCMonth()]}`;
+      return withYear ? `${label}-${date.getUTCFullYear()}` : label;
+    });
+    const head = ['<th style="font-size: 12px;">PART NO</th>', ...[...labels, "Total"].map((l) => `<th>${l}</th>`)];
+    $("[data-out=receipts]").innerHTML = table(head, parts.map((code) => {
+      const daily = [...sums.get(code)];
+      return [ds.parts[code], ...daily.map(formatQty), formatQty(daily.reduce((a, v) => a + v, 0))];
+    }));
+  }
+
+  function render() {
+    const result = summarize(ds, filters);
+    const datesLabel = filters.dates
+      ? filters.dates.map((d) => d.split("-").reverse().join(".")).join(" - ") : "All";
+    $("[data-out=caption]").textContent = `Rows: ${result.rows} (Customer: ${filters.customer.join(", ") || "All"}, `
+      + `Plant: ${filters.plant.join(", ") || "All"}, Month: ${filters.month}, Receipt dates: ${datesLabel}, `
+      + `As of: ${data.as_of}) — filtered in the browser`;
+    view.querySelectorAll("[data-kpi]").forEach((el) => {
+      el.textContent = result.kpis[el.dataset.kpi];
+    });
+    $("[data-out=pending]").innerHTML = table(["<th>Part No</th>", "<th>GRN Pending Qty</th>"], result.pending);
+    $("[data-out=ageing]").innerHTML = ageingTable(ds, result.ageing, data.colors);
+    for (const key of ["plant", "customer"]) {
+      $(`[data-pick=${key}] summary span`).textContent = filters[key].join(", ") || "All";
+    }
+    renderMatrix();
+  }
+
+  function update() {
+    const from = $("[data-filter=from]").value;
+    const to = $("[data-filter=to]").value;
+    const dates = from && to ? [from, to] : null; // a half-picked range is ignored until it has an end
+    const rangeChanged = $("[data-filter=month]").value !== filters.month || String(dates) !== String(filters.dates);
+    filters.month = $("[data-filter=month]").value;
+    filters.dates = dates;
+    for (const key of ["plant", "customer"]) {
+      filters[key] = [...view.querySelectorAll(`[data-pick=${key}] input:checked`)].map((box) => box.value);
+    }
+    view.parentNode.grnFilters = { ...filters };
+    if (rangeChanged) resetMatrixDates();
+    render();
+  }
+
+  view.querySelectorAll(".grn-filters [data-filter], [data-pick] input").forEach((el) => {
+    el.addEventListener("change", update);
+  });
+  view.querySelectorAll("[data-matrix]").forEach((el) => el.addEventListener("change", renderMatrix));
+  $("[data-out=matrix]").addEventListener("toggle", renderMatrix);
+  $("[data-out=apply]").addEventListener("click", () => setStateValue("filters", { ...filters }));
+
+  resetMatrixDates();
+  render();
+}
+
+export default function (component) {
+  const { data, parentElement, setStateValue } = component;
+  const source = data.url || data.version;
+  let view = parentElement.querySelector(".grn-browser");
+  if (view && view.dataset.source === source) return; // same dataset: keep the filters and tables
+  if (view) view.remove();
+  view = document.createElement("div");
+  view.className = "grn-browser";
+  view.dataset.source = source;
+  view.innerHTML = "<div class='grn-caption'>🔄 Loading the dataset into the browser...</div>";
+  parentElement.appendChild(view);
+  load(data)
+    .then((ds) => mount(view, ds, data, setStateValue))
+    .catch((error) => {
+      view.innerHTML = `<div class='grn-caption'>❌ The dataset could not be loaded: ${escape(error.message)}</div>`;
+    });
+}
@@ -0,0 +1,152 @@
+"""In-browser filtering: the normalized table as one compact columnar payload.
+
+The page's client mode (?client=1) sends this payload to the browser once per
+dataset version and day, and grn_client.js computes the KPIs, the part-wise
+pending table, the ageing buckets and the receipt matrix there, so changing a
+filter never reaches the server. Customers, plants and parts are dictionary
+codes, receipt dates day offsets from the earliest receipt, and the ageing
+days and quantities small integers; each column is the narrowest
+little-endian type its values fit in.
+
+    "GRN1" | uint32 header length | header JSON | columns, each 8-byte aligned
+
+The header names every column's type, byte offset, length and missing-value
+marker, plus the dictionaries. The whole payload is gzip-compressed.
+"""
+import gzip
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from grn_data import AGE_BUCKETS, AGE_LIMITS, row_pending
+from grn_index import text_values
+
+MAGIC = b"GRN1"
+FLAG_COLUMNS = {"AVX_CHALLAN_DATE": 1, "HANDOVER_DATE": 2, "TML_CHALLAN_DATE": 4}  # KPI counts
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "grn_client.js"), encoding="utf-8") as f:
+    JS = f.read()
+
+CSS = """
+    .grn-filters {
+        display: grid;
+        grid-template-columns: 1fr 1fr 1fr 2fr;
+        gap: 16px;
+        align-items: end;
+        padding: 10px 0;
+    }
+    .grn-filters label, .grn-filters summary {
+        font-weight: bold;
+    }
+    .grn-filters select, .grn-filters input[type=date], .grn-filters details {
+        width: 100%;
+        box-sizing: border-box;
+        padding: 6px;
+        border: 1px solid rgba(0,0,0,0.2);
+        border-radius: 8px;
+        background: white;
+    }
+    .grn-filters details {
+        position: relative;
+    }
+    .grn-filters details div {
+        position: absolute;
+        z-index: 10;
+        left: 0;
+        right: 0;
+        max-height: 300px;
+        overflow-y: auto;
+        padding: 6px;
+        background: white;
+        border: 1px solid rgba(0,0,0,0.2);
+        border-radius: 8px;
+    }
+    .grn-filters details label {
+        display: block;
+        font-weight: normal;
+    }
+    .grn-row {
+        display: grid;
+        grid-template-columns: 1fr 1fr;
+        gap: 16px;
+    }
+    .grn-caption {
+        color: rgba(49, 51, 63, 0.6);
+        font-size: 14px;
+    }
+"""
+
+
+def _fits(dtype, low, high):
+    info = np.iinfo(dtype)
+    return info.min <= low and high <= info.max
+
+
+def _narrow(values, missing=None, signed=False):
+    """Integer ``values`` (NaN where ``missing`` is given) in the narrowest type; (array, marker)."""
+    present = values[~np.isnan(values)] if missing is not None else values
+    low, high = (present.min(), present.max()) if len(present) else (0, 0)
+    for dtype in (("<i2", "<i4") if signed else ("<u1", "<u2", "<u4")):
+        # the missing marker takes the type's first (signed) or last (unsigned) value
+        marker = None if missing is None else (np.iinfo(dtype).min if signed else np.iinfo(dtype).max)
+        if _fits(dtype, low - (signed and missing is not None), high + (not signed and missing is not None)):
+            break
+    else:
+        return values.astype("<f8"), None  # NaN marks missing values
+    if missing is not None:
+        values = np.where(np.isnan(values), marker, values)
+    return values.astype(dtype), marker
+
+
+def _quantity(values):
+    """Non-negative quantities: small unsigned integers when whole, float64 otherwise."""
+    values = np.nan_to_num(values.astype(float))
+    if np.array_equal(values, np.floor(values)) and (values >= 0).all():
+        return _narrow(values)[0]
+    return values.astype("<f8")
+
+
+def encode(tml, version, day):
+    """The payload of ``tml`` (day columns for ``day``, as tml_for_day gives them), gzip-compressed."""
+    customers, customer_names = pd.factorize(text_values(tml, "CUSTOMER").to_numpy())
+    plants, plant_names = pd.factorize(text_values(tml, "PLANT").to_numpy())
+    parts, part_names = pd.factorize(tml["PART_NO"].astype(str).to_numpy())
+
+    received = tml["PHY_RCPT_DATE"].to_numpy(dtype="datetime64[D]")
+    dated = ~np.isnat(received)
+    day0 = int(received[dated].min().astype(np.int64)) if dated.any() else 0
+    rcpt = np.where(dated, received.astype(np.int64) - day0, np.nan)
+    months = [f"{pd.Timestamp(month):%b-%Y}" for month in np.unique(received[dated].astype("datetime64[M]"))]
+
+    flags = np.zeros(len(tml), dtype="<u1")
+    for col, bit in FLAG_COLUMNS.items():
+        flags |= np.where(tml[col].notna().to_numpy(), bit, 0).astype("<u1")
+    qty = tml["SUPPLIER_QTY"].to_numpy(dtype=float)
+
+    columns = {
+        "customer": _narrow(customers.astype(float)),
+        "plant": _narrow(plants.astype(float)),
+        "part": _narrow(parts.astype(float)),
+        "rcpt": _narrow(rcpt, missing=True),
+        "age": _narrow(tml["Q_MINUS_N_DAYS"].to_numpy(dtype=float, na_value=np.nan), missing=True, signed=True),
+        "flags": (flags, None),
+        "pending": (_quantity(row_pending(tml).to_numpy(dtype=float)), None),
+        "qty": (_quantity(np.where(qty > 0, qty, 0)), None),  # the receipt matrix only counts qty > 0
+    }
+
+    layout, blobs, offset = {}, [], 0
+    for name, (values, marker) in columns.items():
+        data = np.ascontiguousarray(values).tobytes()
+        layout[name] = [values.dtype.str[1:], offset, len(values), marker]
+        blobs.append(data + b"\0" * (-len(data) % 8))
+        offset += len(blobs[-1])
+
+    header = json.dumps({
+        "version": version, "day": f"{pd.Timestamp(day):%Y-%m-%d}", "rows": len(tml), "day0": day0,
+        "customers": list(customer_names), "plants": list(plant_names), "parts": list(part_names),
+        "months": months, "buckets": AGE_BUCKETS, "limits": AGE_LIMITS, "columns": layout,
+    }, allow_nan=False).encode()
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+    return gzip.compress(b"".join([MAGIC, len(header).to_bytes(4, "little"), header, *blobs]), 6)
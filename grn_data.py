@@ -0,0 +1,315 @@
+"""Sheet normalization and the dashboard aggregations (pandas path)."""
+import hashlib
+from datetime import datetime
+
+import pandas as pd
+import numpy as np
+from pandas.tseries.api import guess_datetime_format
+
+from grn_calendar import day_ordinals, today_ordinals
+from grn_index import FilterIndex
+
+SHEET_COLUMNS = [
+    'Col0', 'Supplier Name', 'PLANT', 'Inwarding PO', 'Part No.', 
+    'Part Description', 'Qty', 'Unit', 'AVX Challan No.', 'AVX Challan Date', 
+    'AVX PHY Material Recipt DATE', 'AVX Invoice Ack. Handover Date', 
+    'AVX invoice Ack. Copy recevied by', 'TML Challan No.', 'TML Challan Date', 
+    'Qty (GRN)', 'TML INVOICE RECEIVE DATE', 'GRN Days'
+]
+
+KEY_CUSTOMER = "Supplier Name"
+KEY_PART_NO = "Part No."
+KEY_SUPP_QTY = "Qty"
+KEY_GRN_QTY = "Qty (GRN)"
+KEY_AVX_CHALLAN = "AVX Challan Date"
+KEY_HANDOVER = "AVX Invoice Ack. Handover Date"
+KEY_TML_CHALLAN = "TML Challan Date"
+KEY_PHY_RCPT = "AVX PHY Material Recipt DATE"
+
+AGE_BUCKETS = ["0-7", "8-15", "16-25", ">25"]
+AGE_LIMITS = [7, 15, 25]  # last day of each bucket but the oldest
+
+
+def today_date():
+    return pd.to_datetime(datetime.today().date())
+
+
+DATE_KEYS = {
+    "AVX_CHALLAN_DATE": KEY_AVX_CHALLAN,
+    "HANDOVER_DATE": KEY_HANDOVER,
+    "TML_CHALLAN_DATE": KEY_TML_CHALLAN,
+    "PHY_RCPT_DATE": KEY_PHY_RCPT,
+}
+
+
+def row_hashes(df):
+    return pd.util.hash_pandas_object(df.astype(str), index=False)
+
+
+def dataset_version(df, hashes=None):
+    """Content hash of the raw sheet; every cache of derived data is keyed on it."""
+    hashed = (row_hashes(df) if hashes is None else hashes).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+
+
+def date_formats(df):
+    """The format pandas infers (from the first non-null value) for each sheet date column."""
+    formats = {}
+    for key in DATE_KEYS.values():
+        first = df[key].dropna()
+        formats[key] = guess_datetime_format(str(first.iloc[0]), dayfirst=True) if not first.empty else None
+    return formats
+
+
+def parse_date(values, fmt=None):
+    if fmt is None:
+        return pd.to_datetime(values, errors="coerce", dayfirst=True)
+    return pd.to_datetime(values, errors="coerce", format=fmt)
+
+
+def normalize_tml(df, formats=None):
+    """Time-independent part of load_tml: parsed dates, keys and quantities.
+
+    Pass ``formats`` (from date_formats on the full sheet) when normalizing a
+    subset of rows, so the subset parses its dates the same way.
+    """
+    required_cols = [KEY_CUSTOMER, KEY_PART_NO, KEY_SUPP_QTY, KEY_GRN_QTY]
+    missing = [col for col in required_cols if col not in df.columns]
+    if missing:
+        raise KeyError(f"Missing columns: {missing}")
+
+    formats = date_formats(df) if formats is None else formats
+    for out, key in DATE_KEYS.items():
+        df[out] = parse_date(df[key], formats[key])
+
+    df["SUPPLIER_QTY"] = pd.to_numeric(df[KEY_SUPP_QTY], errors="coerce")
+    df["GRN_QTY"] = pd.to_numeric(df[KEY_GRN_QTY], errors="coerce")
+
+    df["PART_NO"] = df[KEY_PART_NO].apply(lambda x: str(int(x)) if pd.notna(x) and float(x).is_integer() else str(x) if pd.notna(x) else "")
+    df["CUSTOMER"] = df[KEY_CUSTOMER].astype(str).fillna("").replace("nan","")
+
+    return df[df["PART_NO"].str.strip() != ""]
+
+
+def add_today_columns(tml, today=None, calendar=None):
+    """Day counts relative to today. Cheap and vectorized, so it is redone once per calendar day.
+
+    AGE_DAYS: today - TML challan date.
+    Q_MINUS_N_DAYS: TML challan - receipt, or today - receipt while the challan is missing
+    (this is also the ageing block's AGEING_DAYS).
+    AGE_BUCKET: Q_MINUS_N_DAYS bucketed, "No Data" without a receipt date.
+    With a grn_calendar.WorkCalendar all three count working days at the row's plant.
+    """
+    today = today_date() if today is None else today
+    rcpt = day_ordinals(tml, "PHY_RCPT_DATE", calendar)
+    grn = day_ordinals(tml, "TML_CHALLAN_DATE", calendar)
+    now = today_ordinals(tml, today, calendar)
+    q_minus_n = pd.Series(np.where(np.isnan(grn), now, grn) - rcpt, index=tml.index)
+    return tml.assign(
+        AGE_DAYS=pd.Series(now - grn, index=tml.index).astype("Int64"),
+        Q_MINUS_N_DAYS=q_minus_n.astype("Int64"),
+        AGE_BUCKET=age_bucket_codes(q_minus_n),
+    )
+
+
+def load_tml(df, today=None, calendar=None):
+    return add_today_columns(normalize_tml(df), today, calendar)
+
+
+def month_range(month):
+    """First and last day of a 'Dec-2025' style month label."""
+    start = pd.to_datetime(month, format="%b-%Y")
+    return start, start + pd.offsets.MonthEnd(0)
+
+
+def selection(value):
+    """A Customer/Plant filter as a list of values, or None for "All" (or nothing picked)."""
+    if value is None or isinstance(value, str):
+        return None if value in (None, "All") else [value]
+    return list(value) or None
+
+
+def receipt_range(month="All", dates=None):
+    """Receipt-date bounds from the month filter and an optional (start, end) range, or None."""
+    start = end = None
+    if month != "All":
+        start, end = month_range(month)
+    if dates:
+        first, last = pd.Timestamp(dates[0]), pd.Timestamp(dates[1])
+        start = first if start is None else max(start, first)
+        end = last if end is None else min(end, last)
+    return None if start is None else (start, end)
+
+
+def month_days(today):
+    month_end = today.replace(day=pd.Period(today, freq='M').days_in_month)
+    return list(range(1, month_end.day + 1))
+
+
+def age_bucket_codes(days):
+    """Vectorized age_bucket(): NaN maps to "No Data", everything else to AGE_BUCKETS."""
+    days = pd.to_numeric(days, errors="coerce")
+    buckets = np.select(
+        [days <= AGE_LIMITS[0], days <= AGE_LIMITS[1], days <= AGE_LIMITS[2], days > AGE_LIMITS[2]],
+        AGE_BUCKETS,
+        default="No Data",
+    )
+    return pd.Series(buckets, index=days.index)
+
+
+def row_pending(tml):
+    """Pending qty per row: the FIFO PENDING_QTY once grn_reconcile has run, else max(Qty - Qty (GRN), 0)."""
+    if "PENDING_QTY" in tml.columns:
+        return tml["PENDING_QTY"]
+    diff = tml["SUPPLIER_QTY"].fillna(0) - tml["GRN_QTY"].fillna(0)
+    return diff.clip(lower=0).astype(int)
+
+
+# Shared shaping so every backend returns byte-identical tables
+
+def shape_kpis(invoice, handover, grn, avg):
+    return {
+        "btst_invoice_qty": int(invoice),
+        "btst_handover_status": int(handover),
+        "btst_tml_grn_status": int(grn),
+        "avg_days": 0 if avg is None or pd.isna(avg) else round(avg),
+    }
+
+
+def shape_part_pending(pending):
+    """pending: PART_NO, PENDING_QTY (already summed, sorted by part)."""
+    part_pending = pending[["PART_NO", "PENDING_QTY"]].reset_index(drop=True)
+    part_pending["PENDING_QTY"] = part_pending["PENDING_QTY"].astype(int)
+    part_pending.columns = ["Part No", "GRN Pending Qty"]
+    return part_pending
+
+
+def shape_ageing(counts):
+    """counts: AGE_BUCKET, CUSTOMER, COUNT. Returns None when there is no ageing data."""
+    if counts.empty:
+        return None
+    age_pivot = counts.pivot_table(
+        index="AGE_BUCKET",
+        columns="CUSTOMER",
+        values="COUNT",
+        aggfunc="sum",
+        fill_value=0
+    )
+    age_pivot = age_pivot.reindex(index=AGE_BUCKETS).fillna(0)
+    age_pivot["Total"] = age_pivot.sum(axis=1).astype(int)
+    age_pivot = age_pivot.reset_index().rename(columns={"AGE_BUCKET": "Bucket"})
+
+    for col in age_pivot.columns[1:]:
+        age_pivot[col] = pd.to_numeric(age_pivot[col], errors='coerce').fillna(0).astype(int)
+    return age_pivot
+
+
+def format_qty(x):
+    if x == 0 or pd.isna(x):
+        return ""
+    return str(int(x))
+
+
+def format_qty_frame(frame):
+    """format_qty over every cell of a numeric frame, without a Python call per cell."""
+    values = frame.to_numpy(dtype=float, na_value=np.nan)
+    text = np.full(values.shape, "", dtype=object)
+    shown = (values != 0) & ~np.isnan(values)  # most cells of a receipt matrix are blank
+    text[shown] = values[shown].astype(np.int64).astype(str)
+    return pd.DataFrame(text, index=frame.index, columns=frame.columns)
+
+
+def shape_material(sums, parts, today):
+    """sums: PART_NO, RCPT_DAY, SUPPLIER_QTY; parts: every part in the selection, in display order."""
+    days = month_days(today)
+    index = pd.Index(parts, name="PART_NO")
+    grid = np.zeros((len(index), len(days)))
+    if not sums.empty:
+        rows = index.get_indexer(sums["PART_NO"])
+        cols = pd.Index(days).get_indexer(sums["RCPT_DAY"])
+        keep = (rows >= 0) & (cols >= 0)
+        np.add.at(grid, (rows[keep], cols[keep]), sums["SUPPLIER_QTY"].to_numpy(dtype=float)[keep])
+    mat_pivot = pd.DataFrame(grid, index=index, columns=days)
+    mat_pivot.columns = [str(d) for d in mat_pivot.columns]
+
+    mat_pivot = format_qty_frame(mat_pivot)
+    return mat_pivot.reset_index()
+
+
+class PandasBackend:
+    """Default engine: boolean masks and groupby over the in-memory frame.
+
+    tml_full comes from load_tml / add_today_columns for ``today``; asking for
+    another day re-derives the day columns instead of using stale ones.
+    pending_rollup (from grn_sync) answers part_pending without touching rows.
+    Filters go through a grn_index.FilterIndex; pass ``index`` to share one
+    built for the same rows. ``calendar`` is the one tml_full's day columns use.
+    """
+
+    name = "pandas"
+
+    def __init__(self, tml_full, today=None, pending_rollup=None, index=None, calendar=None):
+        self.tml_full = tml_full
+        self.today = today_date() if today is None else today
+        self.pending_rollup = pending_rollup
+        self.index = index
+        self.calendar = calendar
+
+    def filtered(self, customer="All", month="All", today=None, plant="All", dates=None):
+        today = self.today if today is None else today
+        customers, plants, bounds = selection(customer), selection(plant), receipt_range(month, dates)
+        tml = self.tml_full
+        if customers or plants or bounds:
+            if self.index is None:
+                self.index = FilterIndex(self.tml_full)
+            tml = tml.iloc[self.index.positions(customers, plants, *(bounds or (None, None)))]
+        if today != self.today:
+            tml = add_today_columns(tml, today, self.calendar)
+        return tml
+
+    def row_count(self, customer="All", month="All", plant="All", dates=None):
+        return len(self.filtered(customer, month, plant=plant, dates=dates))
+
+    def kpis(self, customer="All", month="All", today=None, plant="All", dates=None):
+        tml = self.filtered(customer, month, today, plant, dates)
+        q = tml["Q_MINUS_N_DAYS"].dropna()
+        return shape_kpis(
+            tml["AVX_CHALLAN_DATE"].notna().sum(),
+            tml["HANDOVER_DATE"].notna().sum(),
+            tml["TML_CHALLAN_DATE"].notna().sum(),
+            None if q.empty else q.astype(float).mean(),
+        )
+
+    def part_pending(self, customer="All", month="All", plant="All", dates=None):
+        # The rollup is per customer and receipt month; plant and date ranges need the rows
+        if self.pending_rollup is not None and selection(plant) is None and not dates:
+            rollup = self.pending_rollup.reset_index()
+            if selection(customer):
+                rollup = rollup[rollup["CUSTOMER"].isin(selection(customer))]
+            if month != "All":
+                rollup = rollup[rollup["RCPT_MONTH"] == month]
+            return shape_part_pending(rollup.groupby("PART_NO")["PENDING_QTY"].sum().reset_index())
+
+        tml = self.filtered(customer, month, plant=plant, dates=dates)
+        pending = pd.DataFrame({"PART_NO": tml["PART_NO"], "PENDING_QTY": row_pending(tml)})
+        return shape_part_pending(pending.groupby("PART_NO")["PENDING_QTY"].sum().reset_index())
+
+    def ageing(self, customer="All", month="All", today=None, plant="All", dates=None):
+        age_df = self.filtered(customer, month, today, plant, dates).dropna(subset=["CUSTOMER", "PHY_RCPT_DATE"])
+        counts = age_df.groupby(["AGE_BUCKET", "CUSTOMER"]).size().rename("COUNT").reset_index()
+        return shape_ageing(counts)
+
+    def material(self, customer="All", month="All", today=None, plant="All", dates=None):
+        today = self.today if today is None else today
+        tml = self.filtered(customer, month, plant=plant, dates=dates)
+        df_age = tml.dropna(subset=["PHY_RCPT_DATE"])
+        df_age = df_age[df_age["SUPPLIER_QTY"].fillna(0) > 0]
+        sums = (
+            pd.DataFrame({
+                "PART_NO": df_age["PART_NO"],
+                "RCPT_DAY": df_age["PHY_RCPT_DATE"].dt.day.astype(int),
+                "SUPPLIER_QTY": df_age["SUPPLIER_QTY"],
+            })
+            .groupby(["PART_NO", "RCPT_DAY"])["SUPPLIER_QTY"].sum().reset_index()
+        )
+        return shape_material(sums, tml["PART_NO"].unique(), today)
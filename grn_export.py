@@ -0,0 +1,160 @@
+"""Streaming exports of the filtered rows and the aggregate tables: CSV, XLSX, Parquet, Arrow.
+
+Detail rows are never gathered into one frame: Rows keeps the cached
+normalized table and the filter index's positions, and the writers take
+CHUNK_ROWS rows at a time, so an export of 500k rows holds one chunk plus the
+writer's buffer. CSV and Arrow chunks go out as they are encoded, Parquet one
+row group per chunk; XLSX rows are appended to openpyxl's write-only workbook,
+which spools them to a temporary file, and the finished file is read back in
+blocks. Aggregate tables are small and go through the same writers as one chunk.
+"""
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from grn_search import DRILL_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+try:
+    import openpyxl
+except ImportError:  # optional dependency
+    openpyxl = None
+
+CHUNK_ROWS = 50_000
+BLOCK_BYTES = 1 << 20
+XLSX_MAX_ROWS = 1_048_575  # a sheet's rows below the header
+FORMATS = {  # format -> (media type, file extension)
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+def available(fmt):
+    """Whether the package ``fmt`` needs is installed."""
+    if fmt in ("parquet", "arrow"):
+        return pa is not None
+    if fmt == "xlsx":
+        return openpyxl is not None
+    return fmt in FORMATS
+
+
+class Rows:
+    """The rows at ``positions`` of ``tml`` (sheet order), read CHUNK_ROWS at a time."""
+
+    def __init__(self, tml, positions, columns=DRILL_COLUMNS):
+        self.tml, self.positions = tml, positions
+        self.columns = [col for col in columns if col in tml.columns]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def chunks(self, size=CHUNK_ROWS):
+        if not len(self.positions):
+            yield self.tml[self.columns].iloc[:0]
+        for start in range(0, len(self.positions), size):
+            yield self.tml[self.columns].iloc[self.positions[start:start + size]]
+
+
+def frames(result):
+    """DataFrame chunks of a query result: Rows, a DataFrame, a dict (KPIs) or None."""
+    if isinstance(result, Rows):
+        return result.chunks()
+    if isinstance(result, dict):
+        return iter([pd.DataFrame([result])])
+    return iter([pd.DataFrame() if result is None else result])
+
+
+def _csv(chunks):
+    for i, chunk in enumerate(chunks):
+        yield chunk.to_csv(index=False, header=i == 0, date_format="%Y-%m-%d").encode()
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose bytes are taken out after every write of the writer."""
+
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _text(chunk):
+    # Object columns mix numbers and strings and can be all blank in one chunk: as text
+    # they get the same Arrow type in every chunk
+    return chunk.astype({col: "string" for col in chunk.columns if chunk[col].dtype == object})
+
+
+def _arrow(chunks, parquet):
+    sink, writer, schema = _Drain(), None, None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(_text(chunk), schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(sink, schema) if parquet else pa.ipc.new_stream(sink, schema)
+            writer.write_table(table)
+            yield sink.take()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.take()
+
+
+def _cell(value):
+    if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.date() if value == value.normalize() else value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+
+def _xlsx(chunks):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            sheet.append([str(col) for col in chunk.columns])
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append([_cell(value) for value in row])
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while block := f.read(BLOCK_BYTES):
+                yield block
+    finally:
+        os.remove(path)
+
+
+def stream(result, fmt):
+    """Bytes of ``result`` as ``fmt``, chunk by chunk.
+
+    Raises ValueError right away, before any workbook is started, for more rows than an XLSX sheet holds.
+    """
+    if fmt == "xlsx" and isinstance(result, (Rows, pd.DataFrame)) and len(result) > XLSX_MAX_ROWS:
+        raise ValueError(f"more than {XLSX_MAX_ROWS:,} rows do not fit in one sheet; use CSV or Parquet")
+    chunks = frames(result)
+    if fmt == "csv":
+        return _csv(chunks)
+    if fmt == "xlsx":
+        return _xlsx(chunks)
+    return _arrow(chunks, parquet=fmt == "parquet")
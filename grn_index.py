@@ -0,0 +1,76 @@
+"""Row index behind the dashboard filters (pandas engine).
+
+Rows are ordered by receipt date (undated rows last) and the receipt dates
+kept as a sorted array, so a date range is two binary searches giving a
+contiguous slice. Customer and plant keep one boolean bitmap per value in that
+same order: a multi-select ORs its bitmaps over the slice only, separate fields
+are ANDed, and the surviving slots map back to sheet positions.
+"""
+import numpy as np
+import pandas as pd
+
+BITMAP_COLUMNS = ["CUSTOMER", "PLANT"]
+
+
+def text_values(tml, col):
+    """Categorical column as plain strings, blanks as "" (same for every engine)."""
+    if col not in tml.columns:
+        return pd.Series("", index=tml.index)
+    return tml[col].fillna("").astype(str)
+
+
+class FilterIndex:
+    def __init__(self, tml):
+        self.n = len(tml)
+        days = tml["PHY_RCPT_DATE"].to_numpy(dtype="datetime64[D]")
+        dated = ~np.isnat(days)
+        self.order = np.concatenate([
+            np.flatnonzero(dated)[np.argsort(days[dated], kind="stable")],
+            np.flatnonzero(~dated),
+        ])
+        self.days = days[self.order[:dated.sum()]]
+
+        self.bitmaps = {}
+        for col in BITMAP_COLUMNS:
+            codes, uniques = pd.factorize(text_values(tml, col).to_numpy()[self.order])
+            self.bitmaps[col] = {value: codes == i for i, value in enumerate(uniques)}
+
+    def values(self, col):
+        return sorted(value for value in self.bitmaps[col] if value)
+
+    def date_slice(self, start=None, end=None):
+        """Slots (receipt-date order) of rows received between start and end, inclusive.
+
+        Unbounded on both sides it also covers the rows without a receipt date.
+        """
+        if start is None and end is None:
+            return slice(0, self.n)
+        lo = 0 if start is None else np.searchsorted(self.days, np.datetime64(pd.Timestamp(start), "D"), "left")
+        hi = len(self.days) if end is None else np.searchsorted(self.days, np.datetime64(pd.Timestamp(end), "D"), "right")
+        return slice(lo, max(lo, hi))
+
+    def mask(self, col, selected, slots=slice(None)):
+        """OR of the selected values' bitmaps over ``slots``; None when the field is not filtered."""
+        if selected is None:
+            return None
+        bitmaps = self.bitmaps[col]
+        out = np.zeros(len(self.order[slots]), dtype=bool)
+        for value in selected:
+            if value in bitmaps:
+                out |= bitmaps[value][slots]
+        return out
+
+    def positions(self, customers=None, plants=None, start=None, end=None):
+        """Row positions, in sheet order, matching every given filter."""
+        if customers is None and plants is None and start is None and end is None:
+            return np.arange(self.n)
+        slots = self.date_slice(start, end)
+        combined = None
+        for mask in (self.mask("CUSTOMER", customers, slots), self.mask("PLANT", plants, slots)):
+            if mask is not None:
+                combined = mask if combined is None else combined & mask
+
+        rows = self.order[slots]
+        if combined is not None:
+            rows = rows[np.flatnonzero(combined)]
+        return np.sort(rows)
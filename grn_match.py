@@ -0,0 +1,165 @@
+"""Pair AVX dispatch challans with TML GRN challans and flag what does not add up.
+
+Challan numbers are normalized (case, spaces, punctuation, leading zeros,
+a trailing ".0" from number cells) and joined on (challan, part). A TML
+challan entered without its AVX challan falls back to the nearest open AVX
+challan of the same part and PO dispatched at most MATCH_WINDOW_DAYS
+earlier. Matching never crosses parts, so a refresh only re-matches the parts
+whose rows changed (ChallanMatcher).
+"""
+import threading
+
+import pandas as pd
+
+from grn_index import text_values
+
+MATCH_WINDOW_DAYS = 7
+
+ISSUE_QTY = "Qty mismatch"
+ISSUE_DUP_AVX = "AVX challan repeated"
+ISSUE_DUP_TML = "TML challan on several AVX challans"
+ISSUE_NO_AVX = "TML challan without AVX challan"
+ISSUE_BY_DATE = "Paired by date window"
+ISSUE_NO_TML = "No TML challan"
+
+# Normalized-table columns the matching reads
+MATCH_COLUMNS = [
+    "CUSTOMER", "PLANT", "PART_NO", "Inwarding PO", "AVX Challan No.", "AVX_CHALLAN_DATE",
+    "TML Challan No.", "TML_CHALLAN_DATE", "SUPPLIER_QTY", "GRN_QTY",
+]
+ISSUE_COLUMNS = [
+    "ISSUE", "CUSTOMER", "PLANT", "PART_NO", "Inwarding PO", "AVX Challan No.", "AVX_CHALLAN_DATE",
+    "TML Challan No.", "TML_CHALLAN_DATE", "SUPPLIER_QTY", "GRN_QTY", "ROWS",
+]
+
+
+def no_issues():
+    """Empty issue table with the same column types as a filled one."""
+    return pd.DataFrame({col: pd.Series(dtype="datetime64[ns]" if col.endswith("_DATE") else object)
+                         for col in ISSUE_COLUMNS})
+
+
+def challan_number(values):
+    """Comparable challan number: upper-case alphanumerics without leading zeros."""
+    text = values.fillna("").astype(str).str.upper().str.replace(r"\.0$", "", regex=True)
+    return text.str.replace(r"[^0-9A-Z]", "", regex=True).str.lstrip("0")
+
+
+def challan_lines(tml):
+    return pd.DataFrame({
+        "CUSTOMER": tml["CUSTOMER"],
+        "PLANT": text_values(tml, "PLANT"),
+        "PART_NO": tml["PART_NO"],
+        "Inwarding PO": text_values(tml, "Inwarding PO"),
+        "AVX": challan_number(tml["AVX Challan No."]),
+        "AVX Challan No.": text_values(tml, "AVX Challan No."),
+        "AVX_CHALLAN_DATE": tml["AVX_CHALLAN_DATE"],
+        "TML": challan_number(tml["TML Challan No."]),
+        "TML Challan No.": text_values(tml, "TML Challan No."),
+        "TML_CHALLAN_DATE": tml["TML_CHALLAN_DATE"],
+        "SUPPLIER_QTY": tml["SUPPLIER_QTY"],
+        "GRN_QTY": tml["GRN_QTY"],
+    })
+
+
+def _pairs(lines, keys):
+    """Lines summed per key: first of the descriptive columns, totals of the quantities."""
+    first = [c for c in ISSUE_COLUMNS if c in lines.columns and c not in keys + ["SUPPLIER_QTY", "GRN_QTY"]]
+    grouped = lines.groupby(keys, sort=False)
+    out = grouped[first].first()
+    out["SUPPLIER_QTY"] = grouped["SUPPLIER_QTY"].sum()
+    out["GRN_QTY"] = grouped["GRN_QTY"].sum(min_count=1)
+    out["ROWS"] = grouped.size()
+    return out.reset_index()
+
+
+def match_challans(tml):
+    """Issues found for the rows of ``tml`` (every part must come with all of its rows)."""
+    lines = challan_lines(tml)
+    has_avx, has_tml = lines["AVX"] != "", lines["TML"] != ""
+    issues = []
+
+    # Hash join on the challan numbers entered on the same row
+    paired = _pairs(lines[has_avx & has_tml], ["AVX", "TML", "PART_NO"])
+    mismatch = paired["GRN_QTY"].notna() & (paired["GRN_QTY"] != paired["SUPPLIER_QTY"])
+    issues.append(paired[mismatch].assign(ISSUE=ISSUE_QTY))
+    reused = paired.groupby(["TML", "PART_NO"])["AVX"].transform("nunique") > 1
+    issues.append(paired[reused].assign(ISSUE=ISSUE_DUP_TML))
+
+    per_avx = _pairs(lines[has_avx], ["AVX", "PART_NO"])
+    issues.append(per_avx[per_avx["ROWS"] > 1].assign(ISSUE=ISSUE_DUP_AVX))
+
+    # Fallback: TML challans without an AVX challan, nearest open AVX challan inside the window
+    orphans = lines[has_tml & ~has_avx].reset_index(drop=True)
+    open_avx = _pairs(lines[has_avx & ~has_tml], ["AVX", "PART_NO"])
+    candidates = orphans.reset_index(names="ORPHAN").merge(
+        open_avx[["AVX", "PART_NO", "Inwarding PO", "AVX Challan No.", "AVX_CHALLAN_DATE", "SUPPLIER_QTY"]],
+        on=["PART_NO", "Inwarding PO"], suffixes=("", "_OPEN"),
+    )
+    gap = (candidates["TML_CHALLAN_DATE"] - candidates["AVX_CHALLAN_DATE_OPEN"]).dt.days
+    candidates = candidates[(gap >= 0) & (gap <= MATCH_WINDOW_DAYS)].assign(GAP=gap)
+    # Closest first; each orphan and each open challan is used once
+    candidates = candidates.sort_values(["GAP", "ORPHAN"], kind="stable")
+    candidates = candidates.drop_duplicates("ORPHAN").drop_duplicates(["AVX_OPEN", "PART_NO"])
+    by_date = candidates.assign(**{
+        "AVX Challan No.": candidates["AVX Challan No._OPEN"],
+        "AVX_CHALLAN_DATE": candidates["AVX_CHALLAN_DATE_OPEN"],
+        "SUPPLIER_QTY": candidates["SUPPLIER_QTY_OPEN"],
+        "ROWS": 1,
+    })
+    issues.append(by_date.assign(ISSUE=ISSUE_BY_DATE))
+    unmatched = orphans.drop(index=candidates["ORPHAN"]).assign(ROWS=1)
+    issues.append(unmatched.assign(ISSUE=ISSUE_NO_AVX))
+
+    still_open = ~open_avx.set_index(["AVX", "PART_NO"]).index.isin(
+        pd.MultiIndex.from_frame(candidates[["AVX_OPEN", "PART_NO"]]))
+    issues.append(open_avx[still_open].assign(ISSUE=ISSUE_NO_TML))
+
+    issues = [i for i in issues if not i.empty]
+    if not issues:
+        return no_issues()
+    return pd.concat(issues, ignore_index=True)[ISSUE_COLUMNS]
+
+
+def open_issues(issues, today):
+    """Drop "No TML challan" entries still inside the matching window on ``today``."""
+    if issues.empty:
+        return issues
+    waiting = (issues["ISSUE"] == ISSUE_NO_TML) & (
+        (pd.Timestamp(today) - issues["AVX_CHALLAN_DATE"]).dt.days <= MATCH_WINDOW_DAYS)
+    return issues[~waiting]
+
+
+def part_fingerprints(tml):
+    """One hash per part over the columns matching reads; equal when the part's rows are."""
+    cols = [c for c in MATCH_COLUMNS if c in tml.columns]
+    hashes = pd.util.hash_pandas_object(tml[cols], index=False)
+    return pd.Series(hashes.to_numpy(), index=tml["PART_NO"].to_numpy()).groupby(level=0).sum()
+
+
+class ChallanMatcher:
+    """Matches the newest table, re-running match_challans only for parts whose rows changed."""
+
+    def __init__(self):
+        self.prints = None
+        self.issues = no_issues()
+        self.last_delta = None
+        self._lock = threading.Lock()
+
+    def update(self, tml):
+        with self._lock:
+            prints = part_fingerprints(tml)
+            if self.prints is None:
+                changed = prints.index
+            else:
+                common = prints.index.intersection(self.prints.index)
+                same = common[self.prints[common].to_numpy() == prints[common].to_numpy()]
+                changed = prints.index.difference(same)
+
+            keep = self.issues[self.issues["PART_NO"].isin(prints.index.difference(changed))]
+            fresh = match_challans(tml[tml["PART_NO"].isin(changed)]) if len(changed) else keep.iloc[:0]
+            parts = [issues for issues in (keep, fresh) if len(issues)]
+            self.issues = pd.concat(parts, ignore_index=True) if parts else fresh.reset_index(drop=True)
+            self.prints = prints
+            self.last_delta = {"parts": len(changed), "of": len(prints)}
+            return self.issues
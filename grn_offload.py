@@ -0,0 +1,143 @@
+"""Heavy aggregations and table HTML in a bounded process pool.
+
+Every session's script thread shares one GIL, so one user's "All / All" pivot
+or a long to_html slows everybody down. Offloaded calls ship only their
+arguments: the normalized table reaches the workers as an Arrow file (the one
+grn_shared published, or one spilled here once per dataset version) that each
+worker memory-maps, and a worker keeps its backends and receipt rollups per
+(file, engine, day) for the next call. A call that runs past the timeout
+raises OffloadTimeout; identical calls wait on the same future, and a future
+stays until a call collects its result, so a retry after a timeout picks up
+the result of the first run. release() ends a file's life in the pool: its
+uncollected results go and, if it was spilled here, the file is deleted.
+"""
+import collections
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from grn_calendar import WorkCalendar
+from grn_data import PandasBackend, add_today_columns
+from grn_index import FilterIndex
+from grn_rollup import ReceiptRollup
+from grn_shared import read_table, write_table
+
+WORKER_CACHE = 8  # tables, backends, rollups and calendars a worker keeps
+
+
+class OffloadTimeout(Exception):
+    pass
+
+
+# Worker side: module state lives in each worker process
+
+_cache = collections.OrderedDict()
+
+
+def _cached(key, build):
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    value = _cache[key] = build()
+    while len(_cache) > WORKER_CACHE:
+        _cache.popitem(last=False)
+    return value
+
+
+def _calendar(path):
+    return _cached(("calendar", path), lambda: WorkCalendar.from_file(path) if path else None)
+
+
+def _backend(path, engine, day, calendar_path):
+    def build():
+        tml, calendar = _cached(("table", path), lambda: read_table(path)), _calendar(calendar_path)
+        if engine == "polars":
+            from grn_polars import PolarsBackend
+            return PolarsBackend(tml, calendar=calendar)
+        if engine in ("duckdb", "sqlite"):
+            from grn_sql import SqlBackend
+            return SqlBackend(tml, engine=engine, calendar=calendar)
+        return PandasBackend(add_today_columns(tml, day, calendar), day, index=FilterIndex(tml), calendar=calendar)
+    return _cached(("backend", path, engine, day), build)
+
+
+def html_table(frame):
+    return frame.to_html(escape=False, index=False)
+
+
+def query_task(path, engine, day, calendar_path, name, kwargs, html=False):
+    result = getattr(_backend(path, engine, day, calendar_path), name)(**dict(kwargs))
+    return html_table(result) if html else result
+
+
+def receipts_task(path, customer, start, end, plant, html=False):
+    rollup = _cached(("rollup", path), lambda: ReceiptRollup(_cached(("table", path), lambda: read_table(path))))
+    result = rollup.matrix(customer, start, end, plant)
+    return html_table(result) if html else result
+
+
+# Page side
+
+class QueryPool:
+    def __init__(self, workers, timeout, spill_dir=None):
+        self.timeout = timeout
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="grn-offload-")
+        # spawn: forking the multi-threaded server process is not safe
+        self._executor = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        self._futures = {}  # (task, args) -> future, until a call collects its result
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+
+    def spill(self, key, tml):
+        """Path of ``tml`` written as an Arrow file for the workers, once per ``key``.
+
+        The file stays until release(path); the page releases it with the cache entry holding the path.
+        """
+        path = os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode()).hexdigest()[:16] + ".arrow")
+        with self._spill_lock:
+            if not os.path.exists(path):
+                write_table(path, tml)
+        return path
+
+    def release(self, path):
+        """Drop the uncollected results computed from ``path``; delete it if it is one of our spills."""
+        with self._lock:
+            for key in [k for k in self._futures if k[1][0] == path]:
+                self._futures.pop(key).cancel()  # only cancels calls no worker has started
+        if os.path.dirname(path) == self.spill_dir:
+            with self._spill_lock:
+                try:
+                    os.remove(path)  # workers still mapping it keep their pages
+                except FileNotFoundError:
+                    pass
+
+    def _run(self, task, *args):
+        key = (task.__name__, args)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self._futures[key] = self._executor.submit(task, *args)
+        try:
+            result = future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            # Left running (or done) for the next identical call to collect
+            raise OffloadTimeout(f"still running after {self.timeout:g} s") from None
+        except Exception:
+            self._collect(key, future)
+            raise
+        self._collect(key, future)
+        return result
+
+    def _collect(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def query(self, path, engine, day, calendar_path, name, kwargs, html=False):
+        return self._run(query_task, path, engine, day, calendar_path, name, tuple(sorted(kwargs.items())), html)
+
+    def receipts(self, path, customer, start, end, plant, html=False):
+        return self._run(receipts_task, path, customer, start, end, plant, html)
@@ -0,0 +1,185 @@
+"""Optional Polars engine: load_tml and the aggregation blocks as lazy queries.
+
+Everything returns the same pandas tables as grn_data so the page and the
+other backends stay interchangeable (``python bench.py`` checks this).
+"""
+import pandas as pd
+
+from grn_data import (
+    AGE_BUCKETS,
+    DATE_KEYS,
+    KEY_CUSTOMER,
+    KEY_GRN_QTY,
+    KEY_PART_NO,
+    KEY_SUPP_QTY,
+    add_today_columns,
+    date_formats,
+    parse_date,
+    receipt_range,
+    row_pending,
+    selection,
+    shape_ageing,
+    shape_kpis,
+    shape_material,
+    shape_part_pending,
+    today_date,
+)
+from grn_calendar import day_number, day_ordinals
+from grn_index import text_values
+
+try:
+    import polars as pl
+except ImportError:  # optional dependency
+    pl = None
+
+def _require_polars():
+    if pl is None:
+        raise ImportError("GRN_BACKEND=polars needs the 'polars' package (pip install polars pyarrow)")
+
+
+def _parse_date(name, fmt):
+    return pl.col(name).str.strip_chars().str.strptime(pl.Datetime("us"), fmt, strict=False).alias(name)
+
+
+def normalize_tml(df, formats=None):
+    """Polars version of grn_data.normalize_tml; same columns, same rows, pandas out."""
+    _require_polars()
+    required_cols = [KEY_CUSTOMER, KEY_PART_NO, KEY_SUPP_QTY, KEY_GRN_QTY]
+    missing = [col for col in required_cols if col not in df.columns]
+    if missing:
+        raise KeyError(f"Missing columns: {missing}")
+
+    raw = pl.from_pandas(df[required_cols + list(DATE_KEYS.values())].astype("string"))
+    # pandas infers one format from the first non-null value; use the same so both paths agree
+    formats = date_formats(df) if formats is None else formats
+
+    part = pl.col(KEY_PART_NO)
+    part_num = part.str.strip_chars().cast(pl.Float64, strict=False)
+    # Columns without a guessable format go through pandas' dayfirst parse below, as in grn_data
+    guessed = {out: key for out, key in DATE_KEYS.items() if formats[key] is not None}
+    lf = raw.lazy().with_row_index("_ROW").with_columns(
+        [_parse_date(key, formats[key]).alias(out) for out, key in guessed.items()]
+        + [
+            pl.col(KEY_SUPP_QTY).str.strip_chars().cast(pl.Float64, strict=False).alias("SUPPLIER_QTY"),
+            pl.col(KEY_GRN_QTY).str.strip_chars().cast(pl.Float64, strict=False).alias("GRN_QTY"),
+            pl.when(part.is_null()).then(pl.lit(""))
+            .when(part_num.is_not_null() & (part_num == part_num.floor()))
+            .then(part_num.cast(pl.Int64).cast(pl.String))
+            .otherwise(part)
+            .alias("PART_NO"),
+            pl.col(KEY_CUSTOMER).fill_null("").replace("nan", "").alias("CUSTOMER"),
+        ]
+    ).filter(pl.col("PART_NO").str.strip_chars() != "")
+
+    derived = ["_ROW", *guessed, "SUPPLIER_QTY", "GRN_QTY", "PART_NO", "CUSTOMER"]
+    out = lf.select(derived).collect().to_pandas()
+
+    tml = df.iloc[out.pop("_ROW").to_numpy()].copy()
+    for col in DATE_KEYS:
+        tml[col] = out[col].to_numpy() if col in guessed else parse_date(tml[DATE_KEYS[col]])
+    for col in ("SUPPLIER_QTY", "GRN_QTY", "PART_NO", "CUSTOMER"):
+        tml[col] = out[col].to_numpy()
+    return tml
+
+
+def load_tml(df, today=None, calendar=None):
+    return add_today_columns(normalize_tml(df), today, calendar)
+
+
+class PolarsBackend:
+    """Same interface as grn_data.PandasBackend, evaluated as Polars lazy queries."""
+
+    name = "polars"
+
+    def __init__(self, tml_full, calendar=None):
+        _require_polars()
+        self.calendar = calendar
+        frame = pd.DataFrame({
+            "CUSTOMER": tml_full["CUSTOMER"].astype(str).to_numpy(),
+            "PART_NO": tml_full["PART_NO"].astype(str).to_numpy(),
+            "PLANT": text_values(tml_full, "PLANT").to_numpy(),
+            "SUPPLIER_QTY": tml_full["SUPPLIER_QTY"].astype(float).to_numpy(),
+            "GRN_QTY": tml_full["GRN_QTY"].astype(float).to_numpy(),
+            "PENDING_QTY": row_pending(tml_full).to_numpy(),
+            # grn_calendar ordinals: ageing is a subtraction of these
+            "PHY_RCPT_ORD": pd.array(day_ordinals(tml_full, "PHY_RCPT_DATE", calendar)).astype("Int64"),
+            "TML_CHALLAN_ORD": pd.array(day_ordinals(tml_full, "TML_CHALLAN_DATE", calendar)).astype("Int64"),
+        })
+        self.plants = sorted(frame["PLANT"].unique())
+        for col in DATE_KEYS:
+            frame[col] = tml_full[col].to_numpy()
+        table = pl.from_pandas(frame)
+        self.nbytes = table.estimated_size()  # held by Polars, out of estimate_bytes' reach
+        self.lf = table.lazy().with_columns(pl.col(list(DATE_KEYS)).cast(pl.Datetime("us")))
+
+    def _today(self, today):
+        """Expression for today's ordinal of each row."""
+        today = today_date() if today is None else today
+        if self.calendar is None:
+            return pl.lit(day_number(today), dtype=pl.Int64)
+        by_plant, default = self.calendar.today_ordinals(today, self.plants)
+        return pl.col("PLANT").replace_strict(by_plant, default=default, return_dtype=pl.Int64)
+
+    def _filtered(self, customer, month, plant="All", dates=None):
+        lf = self.lf
+        for col, values in (("CUSTOMER", selection(customer)), ("PLANT", selection(plant))):
+            if values:
+                lf = lf.filter(pl.col(col).is_in(values))
+        bounds = receipt_range(month, dates)
+        if bounds:
+            lf = lf.filter(pl.col("PHY_RCPT_DATE").is_between(*bounds))
+        return lf
+
+    def row_count(self, customer="All", month="All", plant="All", dates=None):
+        return self._filtered(customer, month, plant, dates).select(pl.len()).collect().item()
+
+    def kpis(self, customer="All", month="All", today=None, plant="All", dates=None):
+        tml_ord, phy_ord = pl.col("TML_CHALLAN_ORD"), pl.col("PHY_RCPT_ORD")
+        row = self._filtered(customer, month, plant, dates).select(
+            pl.col("AVX_CHALLAN_DATE").count().alias("invoice"),
+            pl.col("HANDOVER_DATE").count().alias("handover"),
+            pl.col("TML_CHALLAN_DATE").count().alias("grn"),
+            pl.when(phy_ord.is_not_null()).then(tml_ord.fill_null(self._today(today)) - phy_ord).mean().alias("avg"),
+        ).collect().row(0)
+        return shape_kpis(*row)
+
+    def part_pending(self, customer="All", month="All", plant="All", dates=None):
+        pending = (
+            self._filtered(customer, month, plant, dates)
+            .group_by("PART_NO")
+            .agg(pl.col("PENDING_QTY").cast(pl.Int64).sum())
+            .sort("PART_NO")
+            .collect()
+            .to_pandas()
+        )
+        return shape_part_pending(pending)
+
+    def ageing(self, customer="All", month="All", today=None, plant="All", dates=None):
+        age = pl.col("TML_CHALLAN_ORD").fill_null(self._today(today)) - pl.col("PHY_RCPT_ORD")
+        b0, b1, b2, b3 = AGE_BUCKETS
+        bucket = (
+            pl.when(age <= 7).then(pl.lit(b0))
+            .when(age <= 15).then(pl.lit(b1))
+            .when(age <= 25).then(pl.lit(b2))
+            .otherwise(pl.lit(b3))
+        )
+        counts = (
+            self._filtered(customer, month, plant, dates)
+            .filter(pl.col("PHY_RCPT_DATE").is_not_null())
+            .group_by(bucket.alias("AGE_BUCKET"), "CUSTOMER")
+            .agg(pl.len().alias("COUNT"))
+            .collect()
+            .to_pandas()
+        )
+        return shape_ageing(counts)
+
+    def material(self, customer="All", month="All", today=None, plant="All", dates=None):
+        today = today_date() if today is None else today
+        lf = self._filtered(customer, month, plant, dates)
+        parts, sums = pl.collect_all([
+            lf.select(pl.col("PART_NO").unique(maintain_order=True)),
+            lf.filter(pl.col("PHY_RCPT_DATE").is_not_null() & (pl.col("SUPPLIER_QTY").fill_null(0) > 0))
+            .group_by("PART_NO", pl.col("PHY_RCPT_DATE").dt.day().cast(pl.Int64).alias("RCPT_DAY"))
+            .agg(pl.col("SUPPLIER_QTY").sum()),
+        ])
+        return shape_material(sums.to_pandas(), parts["PART_NO"].to_list(), today)
@@ -0,0 +1,68 @@
+"""FIFO reconciliation of supplier qty against GRN qty per (Inwarding PO, part).
+
+GRNs for one PO and part are often booked against a later row than the
+challan they cover, so a per-row Qty - Qty (GRN) over-reports what is still
+pending. Here every (PO, part) pool adds up its GRN qty and allocates it to
+the pool's receipts in receipt order; a receipt is pending for whatever the
+GRNs do not cover. Rows without an Inwarding PO form a pool of their own.
+Everything is sorts and cumulative sums, no per-row Python.
+"""
+import numpy as np
+import pandas as pd
+
+from grn_index import text_values
+
+POOL_KEY = ["Inwarding PO", "PART_NO"]
+
+
+def pool_keys(tml):
+    """(Inwarding PO, PART_NO) pool of every row; rows without a PO get their own."""
+    po = text_values(tml, "Inwarding PO")
+    keys = po + "|" + tml["PART_NO"].astype(str)
+    return keys.where(po != "", "#" + tml.index.astype(str).to_series(index=tml.index))
+
+
+def _day_numbers(dates):
+    """Dates as sortable integers, missing dates last."""
+    days = dates.to_numpy(dtype="datetime64[D]")
+    return np.where(np.isnat(days), np.iinfo(np.int64).max, days.astype(np.int64))
+
+
+def fifo_allocate(tml, pools=None):
+    """GRN_ALLOCATED and PENDING_QTY per row, aligned with ``tml``.
+
+    Receipts are served oldest first by receipt date, then AVX challan date,
+    then sheet order. GRN qty beyond what a pool received is not carried over.
+    """
+    pools = pool_keys(tml) if pools is None else pools
+    group = pd.factorize(pools.to_numpy())[0]
+    qty = tml["SUPPLIER_QTY"].fillna(0).clip(lower=0).to_numpy(dtype=float)
+    grn = np.bincount(group, weights=tml["GRN_QTY"].fillna(0).clip(lower=0).to_numpy(dtype=float))
+
+    order = np.lexsort((
+        np.arange(len(tml)),
+        _day_numbers(tml["AVX_CHALLAN_DATE"]),
+        _day_numbers(tml["PHY_RCPT_DATE"]),
+        group,
+    ))
+    g, q = group[order], qty[order]
+
+    # Qty received earlier in the same pool: running total minus the total at the pool's first row
+    before = np.cumsum(q) - q
+    first = np.ones(len(g), dtype=bool)
+    first[1:] = g[1:] != g[:-1]
+    before -= before[np.maximum.accumulate(np.where(first, np.arange(len(g)), 0))]
+
+    allocated = np.empty(len(tml))
+    allocated[order] = np.clip(grn[g] - before, 0, q)
+    return pd.DataFrame({
+        "GRN_ALLOCATED": allocated.astype(int),
+        "PENDING_QTY": (qty - allocated).astype(int),
+    }, index=tml.index)
+
+
+def add_pending(tml, pools=None):
+    """``tml`` with the FIFO GRN_ALLOCATED / PENDING_QTY columns (a new frame)."""
+    if len(tml) == 0:
+        return tml.assign(GRN_ALLOCATED=pd.Series(dtype=int), PENDING_QTY=pd.Series(dtype=int))
+    return tml.assign(**fifo_allocate(tml, pools))
@@ -0,0 +1,120 @@
+"""Markup shared by the page and the report packs: KPI cards and the ageing table.
+
+Kept free of the CLI's optional dependencies, so the page and grn_reports
+render the same cards and colors from one place.
+"""
+
+FONTS = ('<link href="https://fonts.googleapis.com/css2?family=Fredoka:wght@400;600;700;900&display=swap" '
+         'rel="stylesheet">')
+
+KPI_CSS = """
+    :root {
+        --blue1: #8ad1ff;
+        --blue2: #4ca0ff;
+        --blue3: #0d6efd;
+    }
+    body {
+        margin: 0;
+        padding: 0;
+        font-family: "Fredoka", sans-serif;
+        background: none !important;
+    }
+    .container {
+        box-sizing: border-box;
+        width: 100%;
+        padding: 20px 20px 0 20px;
+        display: grid;
+        grid-template-columns: 1fr 1fr 1fr 1fr;
+        gap: 20px;
+        max-width: 1700px;
+        margin: auto;
+    }
+    .card {
+        position: relative;
+        border-radius: 20px;
+        padding: 0;
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+        align-items: center;
+        backdrop-filter: blur(12px) saturate(180%);
+        background: rgba(255,255,255,0.08);
+        border: 1px solid rgba(0,0,0,0.15);
+        box-shadow: 0 0 15px rgba(0,0,0,0.28), 0 10px 30px rgba(0,0,0,0.5), inset 0 0 20px rgba(255,255,255,0.12);
+        overflow: hidden;
+        text-align: center;
+    }
+    .value-blue {
+        font-size: 60px !important;
+        font-weight: 1000;
+        background: linear-gradient(180deg, var(--blue1), var(--blue2), var(--blue3));
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        display: block;
+        width: 100%;
+    }
+    .title-black {
+        color: black !important;
+        font-size: 18px;
+        font-weight: 800;
+        margin-top: 6px;
+        text-align: center;
+        width: 100%;
+    }
+"""
+
+AGEING_COLORS = {
+    "0-7": {"bg": "#8ceba7", "color": "#000000"},
+    "8-15": {"bg": "#fae698", "color": "#000000"},
+    "16-25": {"bg": "#f7be99", "color": "#000000"},
+    ">25": {"bg": "#f78e8e", "color": "#000000"}
+}
+
+
+def kpi_cards(kpis, days_label):
+    return f"""<div class="container">
+        <div class="card">
+            <div class="value-blue">{kpis["btst_invoice_qty"]}</div>
+            <div class="title-black">BTST Invoice Qty Rec'd from AVX</div>
+        </div>
+        <div class="card">
+            <div class="value-blue">{kpis["btst_handover_status"]}</div>
+            <div class="title-black">BTST Invoice Handover Status</div>
+        </div>
+        <div class="card">
+            <div class="value-blue">{kpis["btst_tml_grn_status"]}</div>
+            <div class="title-black">BTST TML GRN Status</div>
+        </div>
+        <div class="card">
+            <div class="value-blue">{kpis["avg_days"]}</div>
+            <div class="title-black">TML GRN Average {days_label}</div>
+        </div>
+    </div>"""
+
+
+def ageing_html(age_pivot):
+    """The bucket x customer counts as a colored HTML table."""
+    if age_pivot is None:
+        return "<div style='text-align: center;'>No ageing data</div>"
+
+    html_rows = ""
+    for _, row in age_pivot.iterrows():
+        bucket = row["Bucket"]
+        bgcolor = AGEING_COLORS.get(bucket, {}).get("bg", "#ffffff")
+        txtcolor = AGEING_COLORS.get(bucket, {}).get("color", "#ffffff")
+        html_rows += "<tr style='background-color:{}; color:{}; font-weight: bold;'>".format(bgcolor, txtcolor)
+        html_rows += f"<td style='font-weight: bold; font-size: 14px;'>{bucket}</td>"
+        for col_name in age_pivot.columns[1:]:
+            val = int(row[col_name])
+            html_rows += f"<td style='font-weight: bold; font-size: 14px;'>{val}</td>"
+        html_rows += "</tr>"
+
+    table_html = "<table style='margin:auto; border-collapse: collapse; color:black;'>"
+    table_html += "<tr style='background-color: #4ca0ff; color: white;'>"
+    table_html += "<th style='padding:8px; border:1px solid rgba(0,0,0,0.3); font-weight: bold;'>Bucket</th>"
+    for col in age_pivot.columns[1:]:
+        table_html += f"<th style='padding:8px; border:1px solid rgba(0,0,0,0.3); font-weight: bold;'>{col}</th>"
+    table_html += "</tr>"
+    table_html += html_rows
+    table_html += "</table>"
+    return table_html
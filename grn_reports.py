@@ -0,0 +1,257 @@
+"""Report packs: the KPI cards, pending table and ageing table per supplier, as HTML or PDF files.
+
+    python grn_reports.py OUT [--every-month] [--pdf] [--workers 8] [--tenant NAME]
+
+The sheet is downloaded and normalized once (or, with GRN_SHARED_DIR, the
+refresher's published file is used as is) and written as one Arrow file that a
+spawn-context process pool memory-maps; each worker keeps its backend across
+the suppliers it renders (grn_offload.query_task). Every CUSTOMER value gets
+OUT/<customer>.html, with --every-month also OUT/<customer>-<Mon-YYYY>.html for
+each month it received material in (names that only differ in punctuation or
+case get a short hash of the customer appended, so no two packs share a file).
+OUT/reports.json keeps a fingerprint of the rows behind each file, and a file
+whose fingerprint did not change since the last run is skipped (--force renders
+everything). Ageing and average days of rows without a TML challan move with
+the calendar day, so a pack holding such rows is rendered again every day. PDF
+needs weasyprint.
+
+The card and ageing markup comes from grn_render, as on the page, so a pack
+looks like the dashboard filtered to that supplier.
+"""
+import argparse
+import collections
+import concurrent.futures
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+
+import pandas as pd
+
+from grn_data import normalize_tml, today_date
+from grn_index import text_values
+from grn_offload import html_table, query_task
+from grn_reconcile import add_pending
+from grn_render import KPI_CSS, ageing_html, kpi_cards
+from grn_shared import SharedDataset, write_table
+from grn_sync import row_keys
+from grn_tenants import load_tenants, read_sheet
+
+try:
+    import weasyprint
+except ImportError:  # optional dependency
+    weasyprint = None
+
+MANIFEST = "reports.json"
+
+# The page's glass-table rules, without the fixed height: a file shows every row
+TABLE_CSS = """
+    .glass-table {
+        border-radius: 15px;
+        padding: 20px;
+        margin: 20px;
+        box-shadow: 0 4px 30px rgba(0,0,0,0.1);
+        border: 1px solid rgba(0,0,0,0.1);
+        overflow-x: auto;
+    }
+    .glass-table h3 {
+        color: black;
+        text-align: center;
+    }
+    .glass-table table {
+        width: 100%;
+        border-collapse: collapse;
+        color: black;
+    }
+    .glass-table th, .glass-table td {
+        border: 1px solid rgba(0,0,0,0.3);
+        padding: 10px;
+        text-align: center;
+    }
+    .glass-table th {
+        font-size: 12px;
+    }
+    .glass-table-red table {
+        color: red !important;
+    }
+    h1, .note {
+        text-align: center;
+    }
+    .note {
+        color: #555;
+    }
+"""
+
+def report_html(customer, month, day, kpis, pending, age_pivot, days_label="Days", ageing_note=""):
+    """One supplier's pack as a self-contained page (no scripts, fonts or images fetched)."""
+    title = html.escape(customer) + ("" if month == "All" else f" — {month}")
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>GRN Status — {title}</title>
+<style>{KPI_CSS}{TABLE_CSS}</style></head><body>
+<h1>{title}</h1>
+<p class="note">GRN status as of {day:%d.%m.%Y}</p>
+{kpi_cards(kpis, days_label)}
+<div class="glass-table glass-table-red">
+    <h3>TML Part Wise GRN Pending Qty</h3>
+    <div style='text-align: center;'>{html_table(pending)}</div>
+</div>
+<div class="glass-table">
+    <h3>TML GRN Ageing Day{ageing_note}</h3>
+    {ageing_html(age_pivot)}
+</div>
+</body></html>
+"""
+
+
+def file_stem(customer, month):
+    stem = re.sub(r"[^A-Za-z0-9]+", "-", customer).strip("-") or "blank"
+    return stem if month == "All" else f"{stem}-{month}"
+
+
+def file_stems(jobs):
+    """(customer, month) -> file stem; stems two jobs would share (case aside) get a hash of the customer."""
+    stems = {job: file_stem(*job) for job in jobs}
+    taken = collections.Counter(stem.lower() for stem in stems.values())
+    return {
+        (customer, month): stem if taken[stem.lower()] == 1
+        else f"{stem}-{hashlib.sha1(customer.encode()).hexdigest()[:6]}"
+        for (customer, month), stem in stems.items()
+    }
+
+
+def report_jobs(tml, day, every_month=False):
+    """(customer, month) -> fingerprint of its rows, for every supplier (and month of receipts).
+
+    Groups with open rows (received, no TML challan yet) age with ``day``, so it is part of their fingerprint.
+    """
+    hashes = pd.util.hash_pandas_object(tml, index=True).to_numpy()
+    open_rows = (tml["TML_CHALLAN_DATE"].isna() & tml["PHY_RCPT_DATE"].notna()).to_numpy()
+    customers = text_values(tml, "CUSTOMER").to_numpy()
+    months = tml["PHY_RCPT_DATE"].dt.strftime("%b-%Y").fillna("").to_numpy()
+    groups = [pd.Series(range(len(tml))).groupby(customers).indices]
+    if every_month:
+        by_month = pd.Series(range(len(tml))).groupby([customers, months]).indices
+        groups.append({key: rows for key, rows in by_month.items() if key[1]})
+    jobs = {}
+    for group in groups:
+        for key, rows in group.items():
+            customer, month = (key, "All") if isinstance(key, str) else key
+            if customer:
+                digest = hashlib.sha1(hashes[rows].tobytes())
+                if open_rows[rows].any():
+                    digest.update(f"{day:%Y-%m-%d}".encode())
+                jobs[customer, month] = digest.hexdigest()[:16]
+    return jobs
+
+
+def _require_weasyprint():
+    if weasyprint is None:
+        raise ImportError("--pdf needs the 'weasyprint' package (pip install weasyprint)")
+
+
+def render_task(path, engine, day, calendar_path, customer, month, target, pdf, days_label, ageing_note):
+    """Worker: query the mapped table for one supplier and write its files (``target`` without extension)."""
+    args = (path, engine, day, calendar_path)
+    kwargs = dict(customer=customer, month=month)
+    page = report_html(
+        customer, month, day,
+        query_task(*args, "kpis", {**kwargs, "today": day}.items()),
+        query_task(*args, "part_pending", kwargs.items()),
+        query_task(*args, "ageing", {**kwargs, "today": day}.items()),
+        days_label, ageing_note,
+    )
+    with open(target + ".html", "w", encoding="utf-8") as f:
+        f.write(page)
+    if pdf:
+        weasyprint.HTML(string=page).write_pdf(target + ".pdf")
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out", help="directory for the files and reports.json")
+    parser.add_argument("--tenant", help="tenant of GRN_TENANTS (default: the first)")
+    parser.add_argument("--every-month", action="store_true", help="also one pack per supplier and month")
+    parser.add_argument("--pdf", action="store_true", help="a PDF next to every HTML file")
+    parser.add_argument("--force", action="store_true", help="render unchanged suppliers too")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--sheet-id", help="sheet of the default tenant when GRN_TENANTS is not set")
+    parser.add_argument("--sheet", default="BTST - AVX AND TML")
+    args = parser.parse_args()
+    if args.pdf:
+        _require_weasyprint()
+
+    # Same environment as the page (GRN_TENANTS, GRN_BACKEND, GRN_CALENDAR, GRN_SHARED_DIR)
+    tenants = load_tenants(os.environ.get("GRN_TENANTS", ""), args.sheet_id, args.sheet)
+    name = args.tenant or next(iter(tenants))
+    engine = os.environ.get("GRN_BACKEND", "pandas")
+    calendar_path = os.environ.get("GRN_CALENDAR", "")
+    shared_dir = os.environ.get("GRN_SHARED_DIR", "")
+    days_label, ageing_note = ("Working Days", " (working days)") if calendar_path else ("Days", "")
+    day = today_date()
+    os.makedirs(args.out, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix="grn-reports-")
+    try:
+        if shared_dir:
+            dataset = SharedDataset(shared_dir, name)
+            version = dataset.current()
+            if version is None:
+                raise SystemExit(f"Nothing published for {name} in {shared_dir}")
+            path, tml = dataset.path(version), dataset.load(version)
+        else:
+            raw = read_sheet(tenants[name])
+            tml = add_pending(normalize_tml(raw.set_axis(row_keys(raw)).copy()))
+            path = os.path.join(scratch, "dataset.arrow")
+            write_table(path, tml)
+
+        manifest_path = os.path.join(args.out, MANIFEST)
+        manifest = {}
+        if os.path.exists(manifest_path) and not args.force:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        jobs = report_jobs(tml, day, args.every_month)
+        del tml
+        stems = file_stems(jobs)
+        todo = {
+            job: fingerprint for job, fingerprint in jobs.items()
+            if manifest.get(stems[job]) != fingerprint
+            or not os.path.exists(os.path.join(args.out, stems[job] + ".html"))
+        }
+        print(f"{name}: {len(todo)} of {len(jobs)} packs to render, {len(jobs) - len(todo)} unchanged")
+
+        failed = 0
+        # spawn: like grn_offload, workers map the Arrow file instead of inheriting the table
+        with concurrent.futures.ProcessPoolExecutor(
+                args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                pool.submit(render_task, path, engine, day, calendar_path, *job, os.path.join(args.out, stems[job]),
+                            args.pdf, days_label, ageing_note): job
+                for job in todo
+            }
+            for future in concurrent.futures.as_completed(futures):
+                job = futures[future]
+                try:
+                    future.result()
+                except Exception as e:  # one supplier failing must not stop the others
+                    failed += 1
+                    print(f"{job[0]} {job[1]}: {e}")
+                    continue
+                manifest[stems[job]] = todo[job]
+
+        manifest = {stem: manifest[stem] for stem in stems.values() if stem in manifest}
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        print(f"{name}: {len(todo) - failed} rendered into {args.out}" + (f", {failed} failed" if failed else ""))
+        if failed:
+            raise SystemExit(1)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Per-part daily receipt rollup with prefix sums over calendar days.
+
+Built once per dataset version from the normalized table. Rows are
+(CUSTOMER, PLANT, PART_NO) combinations in first-appearance order, columns
+are calendar days from the earliest receipt to the latest, and the cumulative
+sum along the days turns any date-range total into one subtraction per row.
+"""
+import numpy as np
+import pandas as pd
+
+from grn_data import format_qty_frame, selection
+from grn_index import text_values
+
+PAIR = ["CUSTOMER", "PLANT", "PART_NO"]
+
+
+def day_label_format(days):
+    """Column label format for ``days``: the year is added when the range crosses one."""
+    return "%d-%b-%Y" if len(days) and days[0].year != days[-1].year else "%d-%b"
+
+
+class ReceiptRollup:
+    def __init__(self, tml):
+        tml = tml.assign(PLANT=text_values(tml, "PLANT"))
+        pairs = pd.MultiIndex.from_frame(tml[PAIR].drop_duplicates())
+        self.customers = pairs.get_level_values("CUSTOMER").to_numpy()
+        self.plants = pairs.get_level_values("PLANT").to_numpy()
+        self.parts = pairs.get_level_values("PART_NO").to_numpy()
+
+        rcpt = tml[tml["PHY_RCPT_DATE"].notna() & (tml["SUPPLIER_QTY"].fillna(0) > 0)]
+        if rcpt.empty:
+            self.start, ndays = pd.Timestamp("1970-01-01"), 0
+        else:
+            self.start = rcpt["PHY_RCPT_DATE"].min().normalize()
+            ndays = (rcpt["PHY_RCPT_DATE"].max().normalize() - self.start).days + 1
+
+        rows = pairs.get_indexer(pd.MultiIndex.from_frame(rcpt[PAIR]))
+        days = (rcpt["PHY_RCPT_DATE"].dt.normalize() - self.start).dt.days.to_numpy()
+        daily = np.bincount(
+            rows * ndays + days,
+            weights=rcpt["SUPPLIER_QTY"].to_numpy(dtype=float),
+            minlength=len(pairs) * ndays,
+        ).reshape(len(pairs), ndays)
+
+        # cum[:, k] = receipts before day k, so days [a, b) total cum[:, b] - cum[:, a]
+        self.cum = np.zeros((len(pairs), ndays + 1))
+        np.cumsum(daily, axis=1, out=self.cum[:, 1:])
+
+    def _pos(self, days):
+        """Prefix-sum column for each day, clipped so days outside the data sum to zero."""
+        pos = (pd.DatetimeIndex(days).normalize() - self.start).days.to_numpy()
+        return np.clip(pos, 0, self.cum.shape[1] - 1)
+
+    def _rows(self, customer, plant):
+        rows = np.ones(len(self.parts), dtype=bool)
+        for values, wanted in ((self.customers, selection(customer)), (self.plants, selection(plant))):
+            if wanted:
+                rows &= np.isin(values, wanted)
+        return rows
+
+    def totals(self, customer="All", start=None, end=None, plant="All"):
+        """Receipt qty per part between start and end (inclusive)."""
+        lo, hi = self._pos([pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)])
+        rows = self._rows(customer, plant)
+        sums = pd.Series(self.cum[rows, hi] - self.cum[rows, lo], index=self.parts[rows])
+        return sums.groupby(level=0, sort=False).sum()
+
+    def matrix(self, customer="All", start=None, end=None, plant="All"):
+        """Calendar-day receipt matrix for the range; parts with no receipts in it are left out."""
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize())
+        lo = self._pos(days)
+        hi = self._pos(days + pd.Timedelta(days=1))
+        rows = self._rows(customer, plant)
+        cum = self.cum[rows]
+
+        mat_pivot = pd.DataFrame(
+            cum[:, hi] - cum[:, lo],
+            index=pd.Index(self.parts[rows], name="PART_NO"),
+            columns=days.strftime(day_label_format(days)),
+        ).groupby(level=0, sort=False).sum()
+        mat_pivot["Total"] = self.totals(customer, start, end, plant)
+        mat_pivot = mat_pivot[mat_pivot["Total"] > 0]
+
+        mat_pivot = format_qty_frame(mat_pivot)
+        return mat_pivot.reset_index()
@@ -0,0 +1,108 @@
+"""Search over part, PO and challan numbers, with the rows behind each match.
+
+Built once per dataset version. Every distinct value of the searched fields
+gets an id; the ids are kept sorted by value for prefix lookups, and a sorted
+(trigram, id) list answers substring queries by intersecting the ids of the
+query's trigrams. The sheet positions of each value are grouped up front, so
+drilling into a match is a dictionary lookup rather than a scan.
+"""
+import numpy as np
+import pandas as pd
+
+from grn_index import text_values
+
+SEARCH_FIELDS = {
+    "PART_NO": "Part No",
+    "Inwarding PO": "Inwarding PO",
+    "AVX Challan No.": "AVX Challan No.",
+    "TML Challan No.": "TML Challan No.",
+}
+# What a drill-down shows (available for snapshots too)
+DRILL_COLUMNS = [
+    "CUSTOMER", "PLANT", "Inwarding PO", "PART_NO", "AVX Challan No.", "AVX_CHALLAN_DATE",
+    "PHY_RCPT_DATE", "HANDOVER_DATE", "TML Challan No.", "TML_CHALLAN_DATE", "SUPPLIER_QTY", "GRN_QTY",
+    "GRN_ALLOCATED", "PENDING_QTY",
+]
+
+
+class SearchIndex:
+    def __init__(self, tml):
+        fields, values, starts, counts, members = [], [], [], [], []
+        for col in SEARCH_FIELDS:
+            codes, uniques = pd.factorize(text_values(tml, col).to_numpy())
+            count = np.bincount(codes, minlength=len(uniques))
+            start = len(tml) * len(members) + np.cumsum(count) - count
+            keep = uniques != ""
+            fields.append(np.full(keep.sum(), col, dtype=object))
+            values.append(uniques[keep])
+            starts.append(start[keep])
+            counts.append(count[keep])
+            members.append(np.argsort(codes, kind="stable"))
+
+        # Value id -> its rows are members[start:start + count]
+        self.fields = np.concatenate(fields)
+        self.values = np.concatenate(values)
+        self.starts = np.concatenate(starts)
+        self.counts = np.concatenate(counts)
+        self.members = np.concatenate(members)
+        self.ids = {(f, v): i for i, (f, v) in enumerate(zip(self.fields, self.values))}
+        upper = pd.Series(self.values, dtype=object).str.upper()
+
+        # Prefix: ids ordered by (upper-cased) value
+        self.by_value = np.argsort(upper.to_numpy(dtype=str), kind="stable")
+        self.sorted_values = upper.to_numpy(dtype=str)[self.by_value]
+
+        # Substring: every (trigram, id) pair as one integer per trigram, sorted
+        chars = upper.to_numpy(dtype=str)
+        width = chars.dtype.itemsize // 4
+        codes = chars.view(np.uint32).reshape(len(chars), width).astype(np.int64)
+        grams = (codes[:, :-2] << 42) | (codes[:, 1:-1] << 21) | codes[:, 2:]
+        ids = np.broadcast_to(np.arange(len(chars))[:, None], grams.shape)
+        present = codes[:, 2:] != 0  # shorter values are zero-padded
+        grams, ids = grams[present], ids[present]
+        order = np.argsort(grams, kind="stable")
+        grams, ids = grams[order], ids[order]
+        first = np.ones(len(grams), dtype=bool)
+        first[1:] = (grams[1:] != grams[:-1]) | (ids[1:] != ids[:-1])
+        self.grams, self.gram_ids = grams[first], ids[first]
+
+    def _prefix(self, text):
+        lo = np.searchsorted(self.sorted_values, text, "left")
+        hi = np.searchsorted(self.sorted_values, text + "\uffff", "right")
+        return self.by_value[lo:hi]
+
+    def _substring(self, text):
+        ids = None
+        for gram in sorted({text[i:i + 3] for i in range(len(text) - 2)}):
+            gram = (ord(gram[0]) << 42) | (ord(gram[1]) << 21) | ord(gram[2])
+            lo, hi = np.searchsorted(self.grams, gram, "left"), np.searchsorted(self.grams, gram, "right")
+            ids = self.gram_ids[lo:hi] if ids is None else np.intersect1d(ids, self.gram_ids[lo:hi], assume_unique=True)
+            if not len(ids):
+                break
+        # Trigrams only narrow it down; confirm the whole text is in the value
+        found = pd.Series(self.values[ids], dtype=object).str.upper().str.contains(text, regex=False).to_numpy()
+        return ids[found]
+
+    def search(self, text, limit=50):
+        """Matches as Field / Value / Rows, prefix matches first; blank text finds nothing."""
+        text = text.strip().upper()
+        if not text:
+            ids = np.array([], dtype=int)
+        else:
+            ids = self._prefix(text)
+            if len(text) >= 3 and len(ids) < limit:
+                ids = np.concatenate([ids, np.setdiff1d(self._substring(text), ids)])
+        ids = ids[:limit]
+        return pd.DataFrame({
+            "Field": [SEARCH_FIELDS[f] for f in self.fields[ids]],
+            "Value": self.values[ids],
+            "Rows": self.counts[ids],
+        })
+
+    def rows(self, field, value):
+        """Sheet positions of the rows where ``field`` (a display name or column) equals ``value``."""
+        col = next((c for c, label in SEARCH_FIELDS.items() if field in (c, label)), field)
+        i = self.ids.get((col, value))
+        if i is None:
+            return np.array([], dtype=int)
+        return self.members[self.starts[i]:self.starts[i] + self.counts[i]]
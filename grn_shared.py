@@ -0,0 +1,190 @@
+"""One refresher publishes each normalized dataset version; every replica maps it read-only.
+
+Layout of the shared directory (a tmpfs such as /dev/shm keeps it in RAM):
+
+    DIR/TENANT/VERSION.arrow   normalized table (index = row keys), uncompressed Arrow IPC file
+    DIR/TENANT/CURRENT.json    {"version": ..., "previous": ..., "switch_at": unix seconds}
+
+The refresher (``python grn_shared.py DIR``) downloads every tenant's sheet,
+keeps it normalized with DeltaSync, writes a file when the version changes and
+records the day's snapshot and ageing alerts, which replicas then leave alone.
+Replicas memory-map the file instead of downloading and normalizing: its pages
+sit in the page cache once per host, and string and numeric columns stay views
+into them (date columns are copied, with their nulls). A new version is
+announced SWITCH_DELAY seconds ahead and replicas keep serving the previous
+one until then, so they all switch on the same second. Files older than the
+last KEEP_FILES versions are unlinked; a replica still mapping one keeps its
+pages until it lets go.
+"""
+import argparse
+import json
+import os
+import time
+
+from grn_alerts import AlertMonitor, make_sink
+from grn_calendar import WorkCalendar
+from grn_data import today_date
+from grn_snapshots import SnapshotStore
+from grn_sync import DeltaSync
+from grn_tenants import alert_sinks, load_tenants, read_sheet, tenant_path
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional dependency
+    pa = None
+
+SWITCH_DELAY = 10
+KEEP_FILES = 3
+CURRENT = "CURRENT.json"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("GRN_SHARED_DIR needs the 'pyarrow' package (pip install pyarrow)")
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def write_table(path, tml):
+    """``tml`` (index included) as an uncompressed Arrow IPC file, replaced atomically."""
+    _require_pyarrow()
+    table = pa.Table.from_pandas(tml, preserve_index=True)
+
+    def write(tmp):
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    _write_atomic(path, write)
+
+
+def read_table(path):
+    """The frame write_table wrote, backed by a read-only mapping of the file."""
+    _require_pyarrow()
+    return pa.ipc.open_file(pa.memory_map(path)).read_all().to_pandas(split_blocks=True)
+
+
+def publish(directory, tenant, version, tml, delay=SWITCH_DELAY):
+    """Write ``tml`` as ``version`` and announce it for ``delay`` seconds from now."""
+    folder = os.path.join(directory, tenant)
+    os.makedirs(folder, exist_ok=True)
+    write_table(os.path.join(folder, f"{version}.arrow"), tml)
+    current = SharedDataset(directory, tenant).manifest()
+    manifest = {"version": version, "previous": current.get("version"), "switch_at": time.time() + delay}
+
+    def write_manifest(path):
+        with open(path, "w") as f:
+            json.dump(manifest, f)
+
+    _write_atomic(os.path.join(folder, CURRENT), write_manifest)
+
+    keep = {f"{v}.arrow" for v in (manifest["version"], manifest["previous"])}
+    files = sorted((f for f in os.listdir(folder) if f.endswith(".arrow")),
+                   key=lambda f: os.path.getmtime(os.path.join(folder, f)), reverse=True)
+    for name in files[KEEP_FILES:]:
+        if name not in keep:
+            os.remove(os.path.join(folder, name))
+
+
+class SharedDataset:
+    """A replica's read-only view of one tenant's published versions."""
+
+    def __init__(self, directory, tenant):
+        _require_pyarrow()
+        self.folder = os.path.join(directory, tenant)
+        self._manifest = {}
+        self._mtime = None
+
+    def manifest(self):
+        path = os.path.join(self.folder, CURRENT)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self._mtime:
+            with open(path) as f:
+                self._manifest, self._mtime = json.load(f), mtime
+        return self._manifest
+
+    def current(self, now=None):
+        """Version to serve now: the announced one once its switch time has come, else the one before."""
+        manifest = self.manifest()
+        if not manifest:
+            return None
+        now = time.time() if now is None else now
+        if now >= manifest["switch_at"] or manifest.get("previous") is None:
+            return manifest["version"]
+        return manifest["previous"]
+
+    def path(self, version):
+        return os.path.join(self.folder, f"{version}.arrow")
+
+    def load(self, version):
+        """The normalized table of ``version``, backed by the mapped file."""
+        return read_table(self.path(version))
+
+
+def refresh(directory, tenants, syncs, monitors, snapshots, published):
+    """One round over every tenant; publishes the ones whose version changed (noted in ``published``)."""
+    for name, tenant in tenants.items():
+        try:
+            raw = read_sheet(tenant)
+        except Exception as e:  # one tenant's sheet being down must not stop the others
+            print(f"{name}: sheet loading failed: {e}")
+            continue
+        sync = syncs[name]
+        version = sync.update(raw)
+        tml = sync.normalized(version)
+        day = today_date()
+        if name in snapshots:
+            snapshots[name].compact(day)
+            snapshots[name].record(tml, day, version)
+        if name in monitors:
+            monitor = monitors[name]
+            monitor.update(tml, day, sync.changed_since(monitor.version), version)
+        if published.get(name) != version:
+            publish(directory, name, version, tml)
+            published[name] = version
+            print(f"{name}: published {version} ({len(tml)} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="shared directory, e.g. /dev/shm/grn (GRN_SHARED_DIR of the replicas)")
+    parser.add_argument("--every", type=int, default=300, help="seconds between sheet downloads")
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--sheet-id", help="sheet of the default tenant when GRN_TENANTS is not set")
+    parser.add_argument("--sheet", default="BTST - AVX AND TML")
+    args = parser.parse_args()
+
+    # Same environment as the page (GRN_TENANTS, GRN_CALENDAR, GRN_SNAPSHOT_DB, GRN_ALERTS, ...)
+    tenants = load_tenants(os.environ.get("GRN_TENANTS", ""), args.sheet_id, args.sheet)
+    calendar_path = os.environ.get("GRN_CALENDAR", "")
+    calendar = WorkCalendar.from_file(calendar_path) if calendar_path else None
+    snapshot_db = os.environ.get("GRN_SNAPSHOT_DB", "grn_snapshots.db")
+    retention = int(os.environ.get("GRN_SNAPSHOT_RETENTION_DAYS", 400))
+    sinks = [s.strip() for s in os.environ.get("GRN_ALERTS", "file:grn_alerts.jsonl").split(",") if s.strip()]
+    stale_days = int(os.environ.get("GRN_ALERT_STALE_DAYS", 14))
+
+    syncs = {name: DeltaSync(calendar=calendar) for name in tenants}
+    snapshots = {name: SnapshotStore(tenant_path(snapshot_db, name), retention_days=retention)
+                 for name in tenants} if snapshot_db else {}
+    monitors = {
+        name: AlertMonitor([make_sink(spec) for spec in alert_sinks(name, tenant, sinks)], stale_days, calendar)
+        for name, tenant in tenants.items() if alert_sinks(name, tenant, sinks)
+    }
+    published = {name: SharedDataset(args.directory, name).manifest().get("version") for name in tenants}
+    while True:
+        refresh(args.directory, tenants, syncs, monitors, snapshots, published)
+        if args.once:
+            for monitor in monitors.values():
+                monitor.flush()
+            return
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
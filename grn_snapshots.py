@@ -0,0 +1,163 @@
+"""Daily snapshot store of the normalized table for "as of" views.
+
+Each row version is stored once with the day range it was valid for
+(valid_from inclusive, valid_to exclusive, NULL while current), so a day on
+which nothing changed costs nothing and a refresh only writes changed rows.
+Several refreshes on the same day replace that day's versions. Any past state
+is one indexed range query away, without re-fetching the sheet.
+"""
+import sqlite3
+import threading
+
+import pandas as pd
+
+from grn_data import row_hashes
+
+DATE_COLUMNS = ["AVX_CHALLAN_DATE", "HANDOVER_DATE", "TML_CHALLAN_DATE", "PHY_RCPT_DATE"]
+TEXT_COLUMNS = ["CUSTOMER", "PART_NO", "PLANT", "Inwarding PO", "AVX Challan No.", "TML Challan No."]
+NUMBER_COLUMNS = ["SUPPLIER_QTY", "GRN_QTY"]
+STORED_COLUMNS = TEXT_COLUMNS + NUMBER_COLUMNS + DATE_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS row_versions (
+    row_key TEXT NOT NULL,
+    row_hash TEXT NOT NULL,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT,
+    pos INTEGER,
+    CUSTOMER TEXT, PART_NO TEXT, PLANT TEXT, "Inwarding PO" TEXT,
+    "AVX Challan No." TEXT, "TML Challan No." TEXT,
+    SUPPLIER_QTY REAL, GRN_QTY REAL,
+    AVX_CHALLAN_DATE TEXT, HANDOVER_DATE TEXT, TML_CHALLAN_DATE TEXT, PHY_RCPT_DATE TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_versions_open ON row_versions (valid_to, row_key);
+CREATE INDEX IF NOT EXISTS idx_versions_from ON row_versions (valid_from);
+CREATE TABLE IF NOT EXISTS snapshot_days (
+    day TEXT PRIMARY KEY,
+    version TEXT,
+    rows INTEGER,
+    changed INTEGER
+);
+"""
+
+
+def _day(ts):
+    return pd.Timestamp(ts).strftime("%Y-%m-%d")
+
+
+def to_store_frame(tml):
+    """Stored columns as text/real, plus row key, content hash and sheet position."""
+    out = pd.DataFrame(index=tml.index)
+    for col in TEXT_COLUMNS:
+        out[col] = tml[col].astype(str).where(tml[col].notna(), None) if col in tml.columns else None
+    for col in NUMBER_COLUMNS:
+        out[col] = tml[col].astype(float)
+    for col in DATE_COLUMNS:
+        out[col] = tml[col].dt.strftime("%Y-%m-%d")
+    out["row_hash"] = row_hashes(out).astype(str).to_numpy()
+    out.insert(0, "row_key", tml.index.astype(str).to_numpy())
+    out["pos"] = range(len(out))
+    return out.reset_index(drop=True)
+
+
+def from_store_frame(stored):
+    """Back to the normalized layout the backends expect (time-independent columns)."""
+    tml = stored.set_index("row_key")
+    tml.index.name = None
+    for col in DATE_COLUMNS:
+        tml[col] = pd.to_datetime(tml[col], format="%Y-%m-%d")
+    for col in NUMBER_COLUMNS:
+        tml[col] = tml[col].astype(float)
+    tml["CUSTOMER"] = tml["CUSTOMER"].fillna("")
+    tml["PART_NO"] = tml["PART_NO"].fillna("")
+    return tml
+
+
+class SnapshotStore:
+    def __init__(self, path, retention_days=400):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        self.con.executescript(SCHEMA)
+
+    def record(self, tml, day, version=None):
+        """Store ``tml`` (indexed by row key) as the state on ``day``; returns rows written."""
+        day = _day(day)
+        frame = to_store_frame(tml)
+        cols = ", ".join(f'"{c}"' for c in frame.columns)
+        with self._lock, self.con:
+            cur = self.con.cursor()
+            cur.execute("DROP TABLE IF EXISTS temp.incoming")
+            cur.execute(f"CREATE TEMP TABLE incoming ({cols})")
+            cur.executemany(
+                f"INSERT INTO temp.incoming VALUES ({', '.join('?' * len(frame.columns))})",
+                frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None),
+            )
+            cur.execute("CREATE INDEX temp.idx_incoming ON incoming (row_key, row_hash)")
+
+            # Open versions that no longer match the sheet: same-day ones are
+            # replaced, older ones are closed at this day.
+            gone = """valid_to IS NULL AND NOT EXISTS (
+                SELECT 1 FROM temp.incoming i WHERE i.row_key = row_versions.row_key AND i.row_hash = row_versions.row_hash)"""
+            cur.execute(f"DELETE FROM row_versions WHERE valid_from = ? AND {gone}", (day,))
+            # An edit reverted later the same day: reopen the version closed today
+            cur.execute(
+                """
+                UPDATE row_versions SET valid_to = NULL
+                WHERE valid_to = ?
+                AND EXISTS (SELECT 1 FROM temp.incoming i
+                            WHERE i.row_key = row_versions.row_key AND i.row_hash = row_versions.row_hash)
+                AND NOT EXISTS (SELECT 1 FROM row_versions o
+                                WHERE o.valid_to IS NULL AND o.row_key = row_versions.row_key)
+                """,
+                (day,),
+            )
+            cur.execute(f"UPDATE row_versions SET valid_to = ? WHERE valid_from < ? AND {gone}", (day, day))
+            cur.execute(
+                f"""
+                INSERT INTO row_versions ({cols}, valid_from)
+                SELECT {cols}, ? FROM temp.incoming i
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM row_versions v
+                    WHERE v.valid_to IS NULL AND v.row_key = i.row_key AND v.row_hash = i.row_hash)
+                """,
+                (day,),
+            )
+            changed = cur.rowcount
+            cur.execute(
+                "INSERT OR REPLACE INTO snapshot_days (day, version, rows, changed) VALUES (?, ?, ?, "
+                "COALESCE((SELECT changed FROM snapshot_days WHERE day = ?), 0) + ?)",
+                (day, version, len(frame), day, changed),
+            )
+            cur.execute("DROP TABLE temp.incoming")
+        return changed
+
+    def days(self):
+        with self._lock:
+            return [row[0] for row in self.con.execute("SELECT day FROM snapshot_days ORDER BY day")]
+
+    def as_of(self, day):
+        """Normalized table as it stood at the end of ``day``."""
+        day = _day(day)
+        with self._lock:
+            stored = pd.read_sql_query(
+                f"""
+                SELECT row_key, {", ".join(f'"{c}"' for c in STORED_COLUMNS)}
+                FROM row_versions
+                WHERE valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+                ORDER BY pos
+                """,
+                self.con,
+                params=(day, day),
+            )
+        return from_store_frame(stored)
+
+    def compact(self, today):
+        """Drop versions that ended before the retention window and reclaim the space."""
+        cutoff = _day(pd.Timestamp(today) - pd.Timedelta(days=self.retention_days))
+        with self._lock:
+            with self.con:
+                self.con.execute("DELETE FROM row_versions WHERE valid_to IS NOT NULL AND valid_to <= ?", (cutoff,))
+                self.con.execute("DELETE FROM snapshot_days WHERE day < ?", (cutoff,))
+            self.con.execute("VACUUM")
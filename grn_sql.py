@@ -0,0 +1,200 @@
+"""Optional embedded SQL backend (DuckDB when installed, SQLite otherwise).
+
+The normalized frame is loaded once into a table indexed on customer, part
+and receipt date; backends built with a ``version`` get a table of their own
+(``tml_<version>``), so versions sharing a database file never replace each
+other's rows. close() drops the backend's table, and the page calls it when
+the cache entry holding the backend goes. Dates are stored as integer day
+numbers so both engines share the same SQL, and the month filter becomes a
+range on the receipt-date index. Ageing subtracts the grn_calendar ordinals
+(PHY_RCPT_ORD / TML_CHALLAN_ORD), which are plain day numbers unless a
+working-day calendar is configured.
+"""
+import re
+import sqlite3
+import threading
+
+import pandas as pd
+
+from grn_data import (
+    AGE_BUCKETS,
+    receipt_range,
+    row_pending,
+    selection,
+    shape_ageing,
+    shape_kpis,
+    shape_material,
+    shape_part_pending,
+    today_date,
+)
+from grn_calendar import day_number, day_ordinals
+from grn_index import text_values
+
+try:
+    import duckdb
+except ImportError:  # optional dependency
+    duckdb = None
+
+EPOCH = pd.Timestamp("1970-01-01")
+
+DATE_COLUMNS = {
+    "AVX_CHALLAN_DAY": "AVX_CHALLAN_DATE",
+    "HANDOVER_DAY": "HANDOVER_DATE",
+    "TML_CHALLAN_DAY": "TML_CHALLAN_DATE",
+    "PHY_RCPT_DAY": "PHY_RCPT_DATE",
+}
+
+
+def table_name(version=None):
+    return "tml" if version is None else "tml_" + re.sub(r"\W", "_", str(version))
+
+
+def to_sql_frame(tml_full, calendar=None):
+    out = pd.DataFrame({
+        "ROW_ID": range(len(tml_full)),
+        "CUSTOMER": tml_full["CUSTOMER"].astype(str).to_numpy(),
+        "PART_NO": tml_full["PART_NO"].astype(str).to_numpy(),
+        "PLANT": text_values(tml_full, "PLANT").to_numpy(),
+        "SUPPLIER_QTY": tml_full["SUPPLIER_QTY"].astype(float).to_numpy(),
+        "GRN_QTY": tml_full["GRN_QTY"].astype(float).to_numpy(),
+    })
+    # Per-row truncation to int happens here, same as the pandas path
+    out["PENDING_QTY"] = row_pending(tml_full).to_numpy()
+    for day_col, date_col in DATE_COLUMNS.items():
+        out[day_col] = (tml_full[date_col] - EPOCH).dt.days.astype("Int64").to_numpy()
+    out["RCPT_DAY"] = tml_full["PHY_RCPT_DATE"].dt.day.astype("Int64").to_numpy()
+    out["PHY_RCPT_ORD"] = pd.array(day_ordinals(tml_full, "PHY_RCPT_DATE", calendar)).astype("Int64")
+    out["TML_CHALLAN_ORD"] = pd.array(day_ordinals(tml_full, "TML_CHALLAN_DATE", calendar)).astype("Int64")
+    return out
+
+
+class SqlBackend:
+    """Same interface as grn_data.PandasBackend, answered with SQL over an embedded DB."""
+
+    def __init__(self, tml_full, engine="duckdb", path=":memory:", calendar=None, version=None):
+        if engine == "duckdb" and duckdb is None:
+            engine = "sqlite"
+        self.name = engine
+        self.calendar = calendar
+        self.table = table_name(version)
+        # One connection shared by every session using this dataset version
+        self._lock = threading.Lock()
+        frame = to_sql_frame(tml_full, calendar)
+        self.plants = sorted(frame["PLANT"].unique())
+        self.nbytes = int(frame.memory_usage(deep=True).sum())  # about what the engine holds for the table
+
+        if engine == "duckdb":
+            self.con = duckdb.connect(path)
+            self.con.register("tml_src", frame)
+            self.con.execute(f"CREATE OR REPLACE TABLE {self.table} AS SELECT * FROM tml_src")
+            self.con.unregister("tml_src")
+        else:
+            self.con = sqlite3.connect(path, check_same_thread=False)
+            frame.to_sql(self.table, self.con, if_exists="replace", index=False)
+
+        for col in ("CUSTOMER", "PART_NO", "PLANT", "PHY_RCPT_DAY"):
+            self.con.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_{col.lower()} ON {self.table} ({col})")
+
+    def close(self):
+        """Drop this backend's table and close its connection; the backend is unusable after."""
+        with self._lock:
+            self.con.execute(f"DROP TABLE IF EXISTS {self.table}")
+            if self.name == "sqlite":
+                self.con.commit()
+            self.con.close()
+
+    def _fetch(self, sql, params=()):
+        with self._lock:
+            cur = self.con.execute(sql, list(params))
+            return [d[0] for d in cur.description], cur.fetchall()
+
+    def _query(self, sql, params=()):
+        cols, rows = self._fetch(sql, params)
+        return pd.DataFrame(rows, columns=cols)
+
+    def _where(self, customer, month, plant="All", dates=None, extra=()):
+        clauses, params = list(extra), []
+        for col, values in (("CUSTOMER", selection(customer)), ("PLANT", selection(plant))):
+            if values:
+                clauses.append(f"{col} IN ({', '.join('?' * len(values))})")
+                params += values
+        bounds = receipt_range(month, dates)
+        if bounds:
+            clauses.append("PHY_RCPT_DAY BETWEEN ? AND ?")
+            params += [day_number(bounds[0]), day_number(bounds[1])]
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+
+    def _today(self, today):
+        """SQL expression (and its params) for today's ordinal of each row."""
+        today = today_date() if today is None else today
+        if self.calendar is None:
+            return "?", [day_number(today)]
+        by_plant, default = self.calendar.today_ordinals(today, self.plants)
+        if not by_plant:
+            return "?", [default]
+        cases = " ".join("WHEN ? THEN ?" for _ in by_plant)
+        return f"CASE PLANT {cases} ELSE ? END", [v for item in by_plant.items() for v in item] + [default]
+
+    def row_count(self, customer="All", month="All", plant="All", dates=None):
+        where, params = self._where(customer, month, plant, dates)
+        return int(self._fetch(f"SELECT COUNT(*) FROM {self.table}{where}", params)[1][0][0])
+
+    def kpis(self, customer="All", month="All", today=None, plant="All", dates=None):
+        today, today_params = self._today(today)
+        where, params = self._where(customer, month, plant, dates)
+        _, rows = self._fetch(
+            f"""
+            SELECT COUNT(AVX_CHALLAN_DAY), COUNT(HANDOVER_DAY), COUNT(TML_CHALLAN_DAY),
+                   AVG(CASE WHEN PHY_RCPT_ORD IS NULL THEN NULL
+                            WHEN TML_CHALLAN_ORD IS NOT NULL THEN TML_CHALLAN_ORD - PHY_RCPT_ORD
+                            ELSE {today} - PHY_RCPT_ORD END)
+            FROM {self.table}{where}
+            """,
+            today_params + params,
+        )
+        return shape_kpis(*rows[0])
+
+    def part_pending(self, customer="All", month="All", plant="All", dates=None):
+        where, params = self._where(customer, month, plant, dates)
+        pending = self._query(
+            f"SELECT PART_NO, SUM(PENDING_QTY) AS PENDING_QTY FROM {self.table}{where} GROUP BY PART_NO ORDER BY PART_NO",
+            params,
+        )
+        return shape_part_pending(pending)
+
+    def ageing(self, customer="All", month="All", today=None, plant="All", dates=None):
+        today, today_params = self._today(today)
+        where, params = self._where(customer, month, plant, dates, ["PHY_RCPT_DAY IS NOT NULL"])
+        b0, b1, b2, b3 = AGE_BUCKETS
+        counts = self._query(
+            f"""
+            SELECT CASE WHEN a <= 7 THEN '{b0}' WHEN a <= 15 THEN '{b1}'
+                        WHEN a <= 25 THEN '{b2}' ELSE '{b3}' END AS AGE_BUCKET,
+                   CUSTOMER, COUNT(*) AS COUNT
+            FROM (
+                SELECT CUSTOMER, COALESCE(TML_CHALLAN_ORD, {today}) - PHY_RCPT_ORD AS a
+                FROM {self.table}{where}
+            ) t
+            GROUP BY 1, 2
+            """,
+            today_params + params,
+        )
+        return shape_ageing(counts)
+
+    def material(self, customer="All", month="All", today=None, plant="All", dates=None):
+        today = today_date() if today is None else today
+        where, params = self._where(customer, month, plant, dates)
+        parts = self._query(
+            f"SELECT PART_NO, MIN(ROW_ID) AS FIRST_ROW FROM {self.table}{where} GROUP BY PART_NO ORDER BY FIRST_ROW",
+            params,
+        )
+        where, params = self._where(customer, month, plant, dates, ["PHY_RCPT_DAY IS NOT NULL", "SUPPLIER_QTY > 0"])
+        sums = self._query(
+            f"""
+            SELECT PART_NO, RCPT_DAY, SUM(SUPPLIER_QTY) AS SUPPLIER_QTY
+            FROM {self.table}{where} GROUP BY PART_NO, RCPT_DAY
+            """,
+            params,
+        )
+        return shape_material(sums, parts["PART_NO"].tolist(), today)
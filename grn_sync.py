@@ -0,0 +1,179 @@
+"""Delta sync: keep the normalized table in step with the sheet by row fingerprint.
+
+The sheet is append-mostly: new challans land at the bottom and older rows get
+their TML Challan Date or Qty (GRN) filled in. Rows are keyed on
+AVX Challan No. + Part No. + Inwarding PO (plus an occurrence counter for
+repeated keys) and fingerprinted with a content hash, so a refresh only
+re-normalizes appended and modified rows and only adjusts the part-pending
+rollup by their contribution. FIFO pending (grn_reconcile) is pooled per
+(Inwarding PO, part), so every pool that gained, lost or changed a row is
+re-reconciled as a whole, and only those pools' rows move in the rollup.
+The turnaround sketch (grn_turnaround) moves by the changed rows the same way.
+"""
+import threading
+
+import pandas as pd
+
+from grn_data import dataset_version, date_formats, normalize_tml, row_hashes, row_pending
+from grn_reconcile import add_pending, fifo_allocate, pool_keys
+from grn_turnaround import TurnaroundSketch
+
+ROW_KEY = ["AVX Challan No.", "Part No.", "Inwarding PO"]
+ROLLUP_KEY = ["CUSTOMER", "RCPT_MONTH", "PART_NO"]
+CHANGE_LOG = 32  # versions whose changed row keys changed_since() can still combine
+
+
+def row_keys(df):
+    key = df[ROW_KEY[0]].fillna("").astype(str)
+    for col in ROW_KEY[1:]:
+        key = key + "|" + df[col].fillna("").astype(str)
+    occurrence = key.groupby(key).cumcount().astype(str)
+    return pd.Index(key + "#" + occurrence, name="ROW_KEY")
+
+
+def pending_contributions(tml):
+    """Per-row contribution to the part-pending rollup, same arithmetic as the backends."""
+    return pd.DataFrame({
+        "CUSTOMER": tml["CUSTOMER"].to_numpy(),
+        "RCPT_MONTH": tml["PHY_RCPT_DATE"].dt.strftime("%b-%Y").fillna("").to_numpy(),
+        "PART_NO": tml["PART_NO"].to_numpy(),
+        "PENDING_QTY": row_pending(tml).to_numpy(),
+        "ROWS": 1,
+    })
+
+
+def build_rollup(tml):
+    return pending_contributions(tml).groupby(ROLLUP_KEY).sum()
+
+
+class DeltaSync:
+    """Normalized table, part-pending rollup and dataset version for the newest sheet.
+
+    update() never mutates frames it handed out earlier; every change produces
+    new objects, so sessions still reading the previous version are unaffected.
+    The version and its table, rollup and sketch are published together as one
+    tuple, so readers outside the lock never pair one version with another's data.
+    """
+
+    def __init__(self, normalize=normalize_tml, calendar=None):
+        self.normalize = normalize
+        self.calendar = calendar
+        self._state = (None, None, None, None)  # (version, tml, rollup, sketch)
+        self.last_delta = None
+        self._hashes = None
+        self._formats = None
+        self._pools = None
+        self._changes = []  # (version, row keys touched on the way to it; None = everything)
+        self._lock = threading.Lock()
+
+    def update(self, raw):
+        """Bring the table in step with ``raw``; returns the new dataset version."""
+        with self._lock:
+            raw = raw.reset_index(drop=True)
+            hashes = row_hashes(raw)
+            version = dataset_version(raw, hashes)
+            if version == self.version:
+                return version
+
+            keys = row_keys(raw)
+            hashes.index = keys
+            if self.tml is None:
+                tml, rollup, sketch, touched = self._full(raw, keys, hashes)
+            else:
+                tml, rollup, sketch, touched = self._delta(raw, keys, hashes)
+            self._changes = self._changes[-CHANGE_LOG + 1:] + [(version, touched)]
+            self._state = (version, tml, rollup, sketch)
+            return version
+
+    @property
+    def version(self):
+        return self._state[0]
+
+    @property
+    def tml(self):
+        return self._state[1]
+
+    @property
+    def rollup(self):
+        return self._state[2]
+
+    @property
+    def sketch(self):
+        return self._state[3]
+
+    def _current(self, version, part):
+        state = self._state
+        return state[part] if version == state[0] else None
+
+    def normalized(self, version):
+        return self._current(version, 1)
+
+    def pending_rollup(self, version):
+        return self._current(version, 2)
+
+    def turnaround_sketch(self, version):
+        return self._current(version, 3)
+
+    def changed_since(self, version):
+        """Row keys added, removed or changed (FIFO pending included) between ``version`` and now.
+
+        None when that is no longer known (an older version or a full rebuild in between).
+        """
+        changes = self._changes
+        versions = [v for v, _ in changes]
+        if version not in versions:
+            return None
+        later = [keys for _, keys in changes[versions.index(version) + 1:]]
+        if any(keys is None for keys in later):
+            return None
+        return pd.Index([], dtype=object).append(later).unique() if later else pd.Index([], dtype=object)
+
+    def _full(self, raw, keys, hashes):
+        self._formats = date_formats(raw)
+        tml = self.normalize(raw.set_axis(keys).copy(), self._formats)
+        self._pools = pool_keys(tml)
+        tml = add_pending(tml, self._pools)
+        self._hashes = hashes
+        self.last_delta = {"appended": len(raw), "modified": 0, "removed": 0}
+        return tml, build_rollup(tml), TurnaroundSketch.from_tml(tml, self.calendar), None
+
+    def _delta(self, raw, keys, hashes):
+        old = self._hashes
+        appended = ~keys.isin(old.index)
+        common = keys[~appended]
+        modified = pd.Series(False, index=keys)
+        modified[common] = hashes[common].to_numpy() != old[common].to_numpy()
+        changed = appended | modified.to_numpy()
+        removed = old.index[~old.index.isin(keys)]
+
+        changed_keys = keys[changed]
+        fresh = self.normalize(raw[changed].set_axis(changed_keys).copy(), self._formats)
+        stale = self.tml.index.isin(changed_keys.union(removed))
+
+        # Table: keep untouched rows, swap in the fresh ones, restore sheet order
+        fresh_pools = pool_keys(fresh)
+        order = keys[keys.isin(self.tml.index[~stale].union(fresh.index))]
+        tml = pd.concat([self.tml[~stale], fresh]).reindex(order)
+        pools = pd.concat([self._pools[~stale], fresh_pools]).reindex(order)
+
+        # FIFO: re-allocate every pool that gained, lost or changed a row
+        affected = pd.Index(self._pools[stale]).union(pd.Index(fresh_pools))
+        touched, was_touched = pools.isin(affected), self._pools.isin(affected)
+        allocation = fifo_allocate(tml[touched.to_numpy()], pools[touched])
+        for col in allocation.columns:
+            tml[col] = tml[col].where(~touched, allocation[col]).astype(int)
+
+        # Rollup: take out the touched pools' old contribution, add their new one
+        delta = pd.concat([
+            pending_contributions(self.tml[was_touched.to_numpy()]).assign(
+                PENDING_QTY=lambda d: -d["PENDING_QTY"], ROWS=lambda d: -d["ROWS"]),
+            pending_contributions(tml[touched.to_numpy()]),
+        ]).groupby(ROLLUP_KEY).sum()
+        rollup = self.rollup.add(delta, fill_value=0).astype(int)
+        sketch = self.sketch.updated(self.tml[stale], fresh, self.calendar)
+
+        self._pools = pools
+        self._hashes = hashes
+        self.last_delta = {"appended": int(appended.sum()), "modified": int(modified.sum()), "removed": len(removed)}
+        touched = changed_keys.append([removed, tml.index[touched.to_numpy()]]).unique()
+        return tml, rollup[rollup["ROWS"] > 0], sketch, touched
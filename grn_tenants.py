@@ -0,0 +1,62 @@
+"""Tenants: several sheets served by one dashboard, picked with ?tenant=NAME.
+
+GRN_TENANTS points at a JSON file, one entry per tenant ("sheet" defaults to
+the built-in tab name, "cache_mb" caps the tenant's share of the cache, "url"
+reads the CSV from elsewhere, e.g. loadtest.py's stand-in sheet):
+
+    {
+      "north": {"sheet_id": "1AbC...", "title": "North plants", "cache_mb": 512},
+      "south": {"sheet_id": "1XyZ...", "sheet": "BTST - AVX AND TML"}
+    }
+
+Without it there is one tenant, "default", on the page's built-in sheet.
+"""
+import json
+import os
+import urllib.parse
+
+import pandas as pd
+
+from grn_data import SHEET_COLUMNS
+
+DEFAULT_TENANT = "default"
+
+
+def load_tenants(path, default_sheet_id, default_sheet):
+    if not path:
+        return {DEFAULT_TENANT: {"sheet_id": default_sheet_id, "sheet": default_sheet}}
+    with open(path) as f:
+        spec = json.load(f)
+    if not spec:
+        raise ValueError(f"No tenants in {path}")
+    return {str(name): {"sheet": default_sheet, **config} for name, config in spec.items()}
+
+
+def sheet_url(tenant):
+    if "url" in tenant:
+        return tenant["url"]
+    sheet = urllib.parse.quote(tenant["sheet"])
+    return f"https://docs.google.com/spreadsheets/d/{tenant['sheet_id']}/gviz/tq?tqx=out:csv&sheet={sheet}"
+
+
+def read_sheet(tenant):
+    """The tenant's sheet as raw string cells under SHEET_COLUMNS (title rows dropped)."""
+    df = pd.read_csv(sheet_url(tenant), header=None)
+    df.columns = SHEET_COLUMNS[:len(df.columns)]
+    df = df.iloc[2:].reset_index(drop=True)
+    return df.dropna(how="all")
+
+
+def tenant_path(path, name):
+    """Per-tenant variant of a file path: unchanged for the default tenant, "stem-NAME.ext" otherwise."""
+    if not path or name == DEFAULT_TENANT:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}-{name}{ext}"
+
+
+def alert_sinks(name, tenant, specs):
+    """The tenant's own "alerts" list, else ``specs`` with file sinks moved to per-tenant files."""
+    return tenant.get("alerts", [
+        "file:" + tenant_path(spec[len("file:"):], name) if spec.startswith("file:") else spec for spec in specs
+    ])
@@ -0,0 +1,151 @@
+"""Daily backlog trends: pending qty, ageing-bucket counts and average GRN days.
+
+Built once per dataset version and day from the normalized table. Rows are
+(CUSTOMER, PLANT) cells, columns are calendar days from the earliest receipt
+to today, and every series is a running sum of per-day events:
+
+- a row counts from its receipt day; its GRN qty comes off its pending qty
+  on its TML challan day (on the receipt day when it has none);
+- while open, its age grows by each day's step in grn_calendar ordinals
+  (one per day without a calendar) and moves up a bucket on the day it
+  passes 7, 15 and 25 days.
+
+On the last day the series match the ageing block and GRN average card for
+the rows received by today. They are additive, so a customer/plant filter sums
+the cells it covers. Charts ship at most TREND_POINTS points per series, picked
+with largest-triangle-three-buckets (LTTB).
+"""
+import numpy as np
+import pandas as pd
+
+from grn_calendar import EPOCH, day_number, day_ordinals
+from grn_data import AGE_BUCKETS, AGE_LIMITS, row_pending, selection, today_date
+from grn_index import text_values
+
+CELL = ["CUSTOMER", "PLANT"]
+READ_COLUMNS = ["PHY_RCPT_DATE", "TML_CHALLAN_DATE", "SUPPLIER_QTY", "GRN_QTY", "PENDING_QTY"]
+TREND_POINTS = 300
+PENDING = "Pending Qty"
+AVG_DAYS = "Avg GRN Days"
+
+
+def lttb(y, points=TREND_POINTS):
+    """Indices of the ``points`` samples of ``y`` (evenly spaced) that keep its shape best."""
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+    # First and last sample are kept; the rest is split into points - 2 buckets
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    picked = [0]
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = (hi + edges[i + 2] - 1) / 2, y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = n - 1, y[n - 1]
+        a = picked[-1]
+        x = np.arange(lo, hi)
+        area = np.abs((a - next_x) * (y[lo:hi] - y[a]) - (a - x) * (next_y - y[a]))
+        picked.append(lo + int(np.argmax(area)))
+    picked.append(n - 1)
+    return np.array(picked)
+
+
+def downsample(frame, points=TREND_POINTS):
+    """Long DATE / SERIES / VALUE frame with each column of ``frame`` reduced by LTTB."""
+    parts = []
+    for col in frame.columns:
+        y = frame[col].to_numpy(dtype=float)
+        keep = lttb(y, points)
+        parts.append(pd.DataFrame({"DATE": frame.index[keep], "SERIES": col, "VALUE": y[keep]}))
+    return pd.concat(parts, ignore_index=True)
+
+
+class TrendRollup:
+    def __init__(self, tml, today=None, calendar=None):
+        today = day_number(today_date() if today is None else today)
+        rcpt_day = day_ordinals(tml, "PHY_RCPT_DATE")
+        received = ~np.isnan(rcpt_day) & (rcpt_day <= today)
+        cols = [c for c in CELL + READ_COLUMNS if c in tml.columns]
+        tml, rcpt_day = tml.loc[received, cols], rcpt_day[received]
+        self.start = int(rcpt_day.min()) if len(tml) else today
+        self.days = EPOCH + np.arange(self.start, today + 1)
+        n = len(self.days)
+
+        customers, customer_values = pd.factorize(text_values(tml, "CUSTOMER"))
+        plants, plant_values = pd.factorize(text_values(tml, "PLANT"))
+        width = max(len(plant_values), 1)
+        codes, pairs = pd.factorize(customers * width + plants)
+        self.cells = pd.MultiIndex.from_arrays([customer_values[pairs // width], plant_values[pairs % width]], names=CELL)
+        ncells = len(self.cells)
+        by_cell = np.split(np.argsort(codes, kind="stable"), np.cumsum(np.bincount(codes, minlength=ncells))[:-1])
+
+        # Day index of receipt and of the close (TML challan, not before receipt); open rows close after the axis
+        r = (rcpt_day - self.start).astype(int)
+        close_day = day_ordinals(tml, "TML_CHALLAN_DATE")
+        closed = ~np.isnan(close_day) & (close_day <= today)
+        c = np.where(closed, np.maximum(np.nan_to_num(close_day) - self.start, r), n).astype(int)
+
+        # Age ordinals per cell and axis day, and per row at receipt / close
+        plants = self.cells.get_level_values("PLANT").to_numpy()
+        if calendar is None:
+            axis_ord = np.broadcast_to(np.arange(self.start, today + 1, dtype=float), (ncells, n))
+        else:
+            by_plant = {p: calendar.ordinals(self.days, np.full(n, p, dtype=object)) for p in set(plants)}
+            axis_ord = np.array([by_plant[p] for p in plants]).reshape(ncells, n)
+        rcpt_ord = day_ordinals(tml, "PHY_RCPT_DATE", calendar)
+        final_age = np.where(closed, day_ordinals(tml, "TML_CHALLAN_DATE", calendar) - rcpt_ord, np.inf)
+
+        def daily(day, weights=None):
+            keep = day < n
+            w = None if weights is None else np.broadcast_to(weights, day.shape)[keep]
+            return np.bincount(codes[keep] * n + day[keep], weights=w, minlength=ncells * n).reshape(ncells, n)
+
+        qty = tml["SUPPLIER_QTY"].fillna(0).clip(lower=0).to_numpy(dtype=float)
+        pending = row_pending(tml).to_numpy(dtype=float)
+        covered = np.where(closed, c, r)
+        self.received = daily(r).cumsum(axis=1)
+        self.pending = (daily(r, qty) - daily(covered, qty - pending)).cumsum(axis=1)
+
+        # Age sum: a TML challan before receipt starts negative; open rows add each day's step
+        open_rows = (daily(r) - daily(c)).cumsum(axis=1)
+        step = np.zeros((ncells, n))
+        step[:, 1:] = open_rows[:, :-1] * np.diff(axis_ord, axis=1)
+        self.age_sum = (daily(r, np.minimum(final_age, 0)) + step).cumsum(axis=1)
+
+        # Bucket counts: everyone starts in the first bucket and moves up on the day it passes a limit
+        moves = [daily(r)]
+        for limit in AGE_LIMITS:
+            target = np.where(final_age >= limit + 1, rcpt_ord + limit + 1, np.inf)
+            day = np.empty(len(tml), dtype=int)
+            for i, rows in enumerate(by_cell):
+                day[rows] = np.searchsorted(axis_ord[i], target[rows], "left")
+            moves.append(daily(day))
+        self.buckets = [
+            (moves[k] - (moves[k + 1] if k + 1 < len(moves) else 0)).cumsum(axis=1) for k in range(len(moves))
+        ]
+
+    def _cells(self, customer, plant):
+        rows = np.ones(len(self.cells), dtype=bool)
+        for col, wanted in (("CUSTOMER", selection(customer)), ("PLANT", selection(plant))):
+            if wanted:
+                rows &= self.cells.get_level_values(col).isin(wanted)
+        return rows
+
+    def trend(self, customer="All", plant="All", start=None, end=None):
+        """Daily PENDING / AVG_DAYS / bucket-count series, from the first receipt the filters cover."""
+        rows = self._cells(customer, plant)
+        received = self.received[rows].sum(axis=0)
+        lo = int(np.argmax(received > 0)) if received.any() else len(self.days)
+        if start is not None:
+            lo = max(lo, day_number(start) - self.start)
+        hi = len(self.days) if end is None else min(len(self.days), day_number(end) - self.start + 1)
+        window = slice(lo, max(lo, hi))
+
+        out = pd.DataFrame({
+            PENDING: self.pending[rows].sum(axis=0)[window],
+            AVG_DAYS: (self.age_sum[rows].sum(axis=0) / np.maximum(received, 1))[window],
+        }, index=pd.DatetimeIndex(self.days[window], name="DATE"))
+        for bucket, counts in zip(AGE_BUCKETS, self.buckets):
+            out[bucket] = counts[rows].sum(axis=0)[window]
+        return out
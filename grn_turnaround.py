@@ -0,0 +1,97 @@
+"""GRN turnaround percentiles (P50 / P90 / P99) per customer, plant or part.
+
+Turnaround is whole days from physical receipt to TML challan (working days
+with a grn_calendar calendar), closed GRNs only: an open row's age moves with
+today and is what the ageing block shows. Because the values are whole days,
+a histogram with one bin per day (everything slower in the last bin) is an
+exact quantile sketch: two sketches merge by adding counts and a percentile is
+a cumulative-sum lookup. Counts are kept per (customer, plant, part, receipt
+day) cell, so any filter merges the cells it covers, and a refresh only adds
+and subtracts the changed rows (DeltaSync).
+"""
+import numpy as np
+import pandas as pd
+
+from grn_calendar import day_number, day_ordinals
+from grn_data import receipt_range, selection
+from grn_index import text_values
+
+SKETCH_KEY = ["CUSTOMER", "PLANT", "PART_NO", "RCPT_DAY", "DAYS"]
+MAX_DAYS = 365
+PERCENTILES = (50, 90, 99)
+GROUP_LABELS = {"CUSTOMER": "Customer", "PLANT": "Plant", "PART_NO": "Part No"}
+
+
+def turnaround_counts(tml, calendar=None):
+    """Closed GRNs counted per (customer, plant, part, receipt day, turnaround days)."""
+    days = day_ordinals(tml, "TML_CHALLAN_DATE", calendar) - day_ordinals(tml, "PHY_RCPT_DATE", calendar)
+    closed = ~np.isnan(days)
+    cells = pd.DataFrame({
+        "CUSTOMER": text_values(tml, "CUSTOMER").to_numpy()[closed],
+        "PLANT": text_values(tml, "PLANT").to_numpy()[closed],
+        "PART_NO": tml["PART_NO"].astype(str).to_numpy()[closed],
+        # Calendar day of the receipt, for the date filters
+        "RCPT_DAY": tml["PHY_RCPT_DATE"].to_numpy(dtype="datetime64[D]")[closed].astype(np.int64),
+        "DAYS": np.clip(days[closed], 0, MAX_DAYS).astype(np.int64),
+        "GRNS": 1,
+    })
+    return cells.groupby(SKETCH_KEY)["GRNS"].sum()
+
+
+def histogram_percentiles(hist, percentiles=PERCENTILES):
+    """Nearest-rank percentiles of every row of a (groups, days) histogram."""
+    cum = hist.cumsum(axis=1)
+    rank = np.ceil(cum[:, -1:] * np.array(percentiles) / 100)
+    return (cum[:, None, :] < rank[:, :, None]).sum(axis=2)
+
+
+class TurnaroundSketch:
+    """Per-cell day histograms; immutable, updated() returns a new sketch."""
+
+    def __init__(self, counts):
+        self.counts = counts
+
+    @classmethod
+    def from_tml(cls, tml, calendar=None):
+        return cls(turnaround_counts(tml, calendar))
+
+    def updated(self, removed, added, calendar=None):
+        """Sketch with the ``removed`` rows taken out and the ``added`` rows put in."""
+        delta = turnaround_counts(added, calendar).sub(turnaround_counts(removed, calendar), fill_value=0)
+        counts = self.counts.add(delta, fill_value=0)
+        return TurnaroundSketch(counts[counts > 0].astype(int))
+
+    def _cells(self, customer, month, plant, dates):
+        cells = self.counts.index
+        keep = np.ones(len(cells), dtype=bool)
+        for col, values in (("CUSTOMER", selection(customer)), ("PLANT", selection(plant))):
+            if values:
+                level = cells.names.index(col)
+                wanted = cells.levels[level].get_indexer(values)
+                keep &= np.isin(cells.codes[level], wanted[wanted >= 0])
+        bounds = receipt_range(month, dates)
+        if bounds:
+            days = cells.get_level_values("RCPT_DAY").to_numpy()
+            keep &= (days >= day_number(bounds[0])) & (days <= day_number(bounds[1]))
+        return keep
+
+    def percentiles(self, by="CUSTOMER", customer="All", month="All", plant="All", dates=None):
+        """P50/P90/P99 days per ``by`` value, slowest P90 first, after the merged "All" row."""
+        cells = self.counts.index
+        keep = self._cells(customer, month, plant, dates)
+        level = cells.names.index(by)
+        groups = cells.codes[level][keep].astype(np.int64)
+        days = cells.get_level_values("DAYS").to_numpy()[keep]
+        width = MAX_DAYS + 1
+        hist = np.bincount(groups * width + days, weights=self.counts.to_numpy()[keep],
+                           minlength=len(cells.levels[level]) * width).reshape(-1, width)
+
+        used = hist.sum(axis=1) > 0
+        hist = np.vstack([hist.sum(axis=0, keepdims=True), hist[used]])
+        out = pd.DataFrame(histogram_percentiles(hist), columns=[f"P{p}" for p in PERCENTILES])
+        out.insert(0, GROUP_LABELS[by], ["All"] + cells.levels[level][used].astype(str).tolist())
+        out.insert(1, "GRNs", hist.sum(axis=1).astype(int))
+        if out.at[0, "GRNs"] == 0:
+            return out.iloc[:0]
+        return pd.concat([out.iloc[:1], out.iloc[1:].sort_values(["P90", "GRNs"], ascending=False)],
+                         ignore_index=True)
@@ -0,0 +1,313 @@
+"""Load-test the dashboard with concurrent sessions and fail the run over budget.
+
+    python loadtest.py --sessions 20 --rows 100000 --max-p95-ms 2000 --max-rss-mb 2048
+
+Starts server.py under uvicorn on a synthetic sheet (bench.synthetic_sheet)
+that this process serves over HTTP in place of Google Sheets, then drives
+--sessions headless sessions over Streamlit's websocket protocol, as browsers
+would: each loads the page, then toggles customers and months with a pause
+between steps. Reported: rerun latency (message sent to script finished) for
+the first load and for the toggles, the server's peak RSS with its worker
+processes, and the bytes each session received. Every --max-* budget that is
+exceeded, and any session that saw an error or timed out, fails the run
+(exit status 1). GRN_* variables pass through to the server, so the same run
+compares backends, offload workers or cache sizes. --url drives a server that
+is already running instead (--pid to measure its RSS).
+"""
+import argparse
+import asyncio
+import http.server
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from bench import synthetic_sheet
+
+try:
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+except ImportError:  # optional dependency
+    websockets = None
+
+FINISHED = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR} if websockets else set()
+CUSTOMER_KEY = "customer_filter"
+MONTH_KEY = "month_filter"
+
+
+def _require_websockets():
+    if websockets is None:
+        raise ImportError("loadtest.py needs the 'websockets' and 'streamlit' packages (pip install websockets)")
+
+
+def stand_in_sheet(rows, seed):
+    """HTTP server answering every GET with a sheet CSV shaped like the gviz export; returns (server, url)."""
+    sheet = synthetic_sheet(rows, seed=seed)
+    title = ",".join(["GRN"] + [""] * (len(sheet.columns) - 1))
+    body = (title + "\n" + sheet.to_csv(index=False)).encode()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/sheet.csv"
+
+
+def tree_rss(pid):
+    """Resident bytes of ``pid`` and its descendants (Linux /proc), None elsewhere."""
+    try:
+        children = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as f:
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                except OSError:
+                    continue
+                children.setdefault(ppid, []).append(int(entry))
+        total, todo = 0, [pid]
+        while todo:
+            p = todo.pop()
+            todo += children.get(p, [])
+            try:
+                with open(f"/proc/{p}/statm") as f:
+                    total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+            except OSError:
+                pass
+        return total
+    except OSError:
+        return None
+
+
+def start_server(port, sheet_url, workdir):
+    tenants = os.path.join(workdir, "tenants.json")
+    with open(tenants, "w") as f:
+        json.dump({"default": {"url": sheet_url}}, f)
+    env = {
+        "GRN_SNAPSHOT_DB": os.path.join(workdir, "grn_snapshots.db"),
+        "GRN_ALERTS": "file:" + os.path.join(workdir, "grn_alerts.jsonl"),
+        **os.environ,
+        "GRN_TENANTS": tenants,
+    }
+    here = os.path.dirname(os.path.abspath(__file__))
+    log = open(os.path.join(workdir, "server.log"), "wb")
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--port", str(port)],
+                            cwd=here, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}, see its log above")
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=2):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server not ready after {timeout} s")
+
+
+class Session:
+    """One headless browser tab: reruns the script with widget values and times each run."""
+
+    def __init__(self, ws, timeout):
+        self.ws, self.timeout = ws, timeout
+        self.widgets = {}  # user key -> element proto (options, id)
+        self.states = {}  # widget id -> WidgetState fields
+        self.received = 0
+        self.errors = []
+
+    def _collect(self, msg):
+        if msg.WhichOneof("type") != "delta" or msg.delta.WhichOneof("type") != "new_element":
+            return
+        element = msg.delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors.append(f"{element.exception.type}: {element.exception.message}")
+        elif kind == "alert" and element.alert.format == element.alert.ERROR:
+            self.errors.append(element.alert.body)
+        elif kind in ("multiselect", "selectbox"):
+            widget = getattr(element, kind)
+            self.widgets[widget.id.rsplit("-", 1)[-1]] = widget
+
+    async def rerun(self, query_string=""):
+        back = BackMsg()
+        back.rerun_script.query_string = query_string
+        for widget_id, (field, value) in self.states.items():
+            state = back.rerun_script.widget_states.widgets.add(id=widget_id)
+            if field == "string_array_value":
+                state.string_array_value.data.extend(value)
+            else:
+                setattr(state, field, value)
+        start = time.perf_counter()
+        await self.ws.send(back.SerializeToString())
+        while True:
+            frame = await asyncio.wait_for(self.ws.recv(), self.timeout)
+            self.received += len(frame)
+            msg = ForwardMsg()
+            msg.ParseFromString(frame)
+            self._collect(msg)
+            if msg.WhichOneof("type") == "script_finished" and msg.script_finished in FINISHED:
+                return time.perf_counter() - start
+
+    def toggle(self, key, rng):
+        """Pick new values for the customer or month widget; False if the page has not shown it."""
+        widget = self.widgets.get(key)
+        if widget is None or not widget.options:
+            return False
+        if key == CUSTOMER_KEY:
+            picks = rng.sample(list(widget.options), min(len(widget.options), rng.choice([0, 1, 1, 2])))
+            self.states[widget.id] = ("string_array_value", picks)
+        else:
+            self.states[widget.id] = ("string_value", rng.choice(list(widget.options)))
+        return True
+
+
+async def run_session(ws_url, number, args, results):
+    rng = random.Random(args.seed + number)
+    await asyncio.sleep(args.ramp * number / max(args.sessions - 1, 1))
+    loads, reruns, session = [], [], None
+    try:
+        async with websockets.connect(ws_url, subprotocols=["streamlit"], max_size=None) as ws:
+            session = Session(ws, args.timeout)
+            loads.append(await session.rerun(args.query))
+            for step in range(args.toggles):
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think)
+                if session.toggle(CUSTOMER_KEY if step % 2 == 0 else MONTH_KEY, rng):
+                    reruns.append(await session.rerun(args.query))
+    except (asyncio.TimeoutError, OSError, websockets.ConnectionClosed) as e:
+        results["failures"].append(f"session {number}: {type(e).__name__} {e}")
+    if session is not None:
+        results["failures"] += [f"session {number}: {e}" for e in session.errors]
+        results["bytes"].append(session.received)
+    results["load"] += loads
+    results["rerun"] += reruns
+
+
+async def sample_rss(pid, results, stop):
+    while not stop.is_set():
+        rss = tree_rss(pid)
+        if rss is not None:
+            results["rss"].append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def drive(url, pid, args):
+    results = {"load": [], "rerun": [], "bytes": [], "rss": [], "failures": []}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, results, stop)) if pid else None
+    ws_url = url.replace("http", "ws", 1) + "/_stcore/stream"
+    await asyncio.gather(*(run_session(ws_url, n, args, results) for n in range(args.sessions)))
+    stop.set()
+    if sampler:
+        await sampler
+    return results
+
+
+def report(results, baseline, args):
+    """Print the summary; returns the list of budgets exceeded."""
+    failed = list(results["failures"])
+
+    def ms(values, q):
+        return float(np.percentile(values, q)) * 1000 if values else float("nan")
+
+    for label, values, budgets in (
+        ("first load", results["load"], [(None, args.max_load_ms)]),
+        ("toggle rerun", results["rerun"], [(50, args.max_p50_ms), (95, args.max_p95_ms)]),
+    ):
+        print(f"{label:<22}{ms(values, 50):>10.0f} ms p50{ms(values, 95):>10.0f} ms p95  ({len(values)} runs)")
+        for q, limit in budgets:
+            value = ms(values, 95 if q is None else q)
+            if limit is not None and not value <= limit:
+                failed.append(f"{label} p{95 if q is None else q} {value:.0f} ms > {limit:g} ms")
+
+    if results["rss"]:
+        peak = max(results["rss"]) / 2**20
+        base = f"  (idle {baseline / 2**20:.0f} MB)" if baseline else ""
+        print(f"{'server RSS peak':<22}{peak:>10.0f} MB{base}")
+        if args.max_rss_mb is not None and peak > args.max_rss_mb:
+            failed.append(f"server RSS {peak:.0f} MB > {args.max_rss_mb:g} MB")
+    if results["bytes"]:
+        kb = np.array(results["bytes"]) / 1024
+        print(f"{'received per session':<22}{kb.mean():>10.0f} KB mean{kb.max():>9.0f} KB max")
+        if args.max_kb_per_session is not None and kb.max() > args.max_kb_per_session:
+            failed.append(f"session received {kb.max():.0f} KB > {args.max_kb_per_session:g} KB")
+
+    for line in failed:
+        print(f"FAIL {line}")
+    print("FAILED" if failed else "OK")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--toggles", type=int, default=6, help="customer / month changes per session")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a session's toggles")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which sessions start")
+    parser.add_argument("--rows", type=int, default=50_000, help="rows of the stand-in sheet")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--query", default="", help="query string of every session, e.g. tenant=north")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds one rerun may take")
+    parser.add_argument("--url", help="drive this running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="with --url: server process to measure")
+    parser.add_argument("--max-load-ms", type=float, help="budget: p95 of first loads")
+    parser.add_argument("--max-p50-ms", type=float, help="budget: p50 of toggle reruns")
+    parser.add_argument("--max-p95-ms", type=float, help="budget: p95 of toggle reruns")
+    parser.add_argument("--max-rss-mb", type=float, help="budget: peak server RSS with workers")
+    parser.add_argument("--max-kb-per-session", type=float, help="budget: bytes received by the busiest session")
+    args = parser.parse_args()
+    _require_websockets()
+
+    process, sheet = None, None
+    with tempfile.TemporaryDirectory(prefix="grn-loadtest-") as workdir:
+        try:
+            if args.url:
+                url, pid = args.url.rstrip("/"), args.pid
+            else:
+                sheet, sheet_url = stand_in_sheet(args.rows, args.seed)
+                process = start_server(args.port, sheet_url, workdir)
+                url, pid = f"http://127.0.0.1:{args.port}", process.pid
+            wait_ready(url, process)
+            baseline = tree_rss(pid) if pid else None
+            print(f"{args.sessions} sessions x {args.toggles} toggles against {url}"
+                  + ("" if args.url else f" ({args.rows:,}-row stand-in sheet)"))
+            results = asyncio.run(drive(url, pid, args))
+        except Exception:
+            if process is not None:
+                with open(os.path.join(workdir, "server.log")) as f:
+                    sys.stderr.write(f.read()[-4000:])
+            raise
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(30)
+            if sheet is not None:
+                sheet.shutdown()
+    sys.exit(1 if report(results, baseline, args) else 0)
+
+
+if __name__ == "__main__":
+    main()
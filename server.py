@@ -0,0 +1,24 @@
+"""ASGI entry point: the dashboard plus its HTTP endpoints.
+
+    uvicorn server:app --host 0.0.0.0 --port 8501
+
+GET /metrics returns grn_cache counters (hits, misses, evictions, expired,
+invalidated) and gauges (entries, bytes) per tenant and layer; it is empty
+until the first page load has created the cache. GET /api/... serves the KPIs,
+tables and filtered rows read-only, as JSON or streamed files (see grn_api);
+the page's download buttons link there.
+"""
+import streamlit as st
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+import grn_api
+from grn_cache import current_cache
+
+
+async def metrics(request):
+    cache = current_cache()
+    return PlainTextResponse(cache.metrics() if cache else "", media_type="text/plain; version=0.0.4")
+
+
+app = st.App("final d.py", routes=[Route("/metrics", metrics), *grn_api.routes()])
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# The modules live flat in the repository root, next to the page
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench  # noqa: E402
+from grn_data import add_today_columns, normalize_tml  # noqa: E402
+from grn_reconcile import add_pending  # noqa: E402
+from grn_sync import row_keys  # noqa: E402
+
+TODAY = pd.Timestamp("2026-03-15")
+
+
+@pytest.fixture(scope="session")
+def sheet():
+    """A synthetic sheet with some blank receipt dates and quantities."""
+    raw = bench.synthetic_sheet(3000, parts=60, days=200, seed=7, today=TODAY)
+    raw.loc[raw.index % 17 == 0, "AVX PHY Material Recipt DATE"] = None
+    raw.loc[raw.index % 23 == 0, "Qty"] = None
+    return raw
+
+
+@pytest.fixture(scope="session")
+def tml(sheet):
+    """The normalized table of ``sheet``, keyed and FIFO-reconciled as the page builds it."""
+    return add_pending(normalize_tml(sheet.set_axis(row_keys(sheet)).copy()))
+
+
+@pytest.fixture(scope="session")
+def tml_today(tml):
+    return add_today_columns(tml, TODAY)
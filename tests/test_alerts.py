@@ -0,0 +1,80 @@
+import collections
+import json
+import time
+
+import pandas as pd
+
+from grn_alerts import AlertMonitor, FileSink, schedule
+
+
+def rows(*rows):
+    """Normalized-table rows keyed by row key: (key, receipt date, TML challan date, supplier qty, GRN qty)."""
+    tml = pd.DataFrame(list(rows), columns=["KEY", "PHY_RCPT_DATE", "TML_CHALLAN_DATE", "SUPPLIER_QTY", "GRN_QTY"])
+    for col in ("PHY_RCPT_DATE", "TML_CHALLAN_DATE"):
+        tml[col] = pd.to_datetime(tml[col])
+    return tml.set_index("KEY").assign(**{"CUSTOMER": "TATA MOTORS LTD - PUNE", "PLANT": "1100", "PART_NO": "P1",
+                                          "Inwarding PO": "5500000001", "AVX Challan No.": "AV-1"})
+
+
+def alerts(frame):
+    return [(day.strftime("%Y-%m-%d"), alert, key) for day, alert, key in frame[["DAY", "ALERT", "ROW_KEY"]].values]
+
+
+def test_bucket_timers_chain_across_a_long_gap():
+    tml = rows(("open", "2026-03-01", None, 10.0, None), ("closed", "2026-03-01", "2026-03-03", 10.0, 10.0))
+    monitor = AlertMonitor(stale_days=14)
+    assert monitor.update(tml, pd.Timestamp("2026-03-02")).empty  # the baseline reports nothing
+    assert alerts(monitor.update(tml, pd.Timestamp("2026-04-01"))) == [
+        ("2026-03-09", "Ageing 8-15", "open"),
+        ("2026-03-16", "Pending unchanged 14 days", "open"),
+        ("2026-03-17", "Ageing 16-25", "open"),
+        ("2026-03-27", "Ageing >25", "open"),
+    ]
+    assert monitor.update(tml, pd.Timestamp("2026-05-01")).empty  # each crossing is reported once
+
+
+def test_already_breached_rows_and_closed_rows_stay_quiet():
+    tml = rows(("old", "2026-01-01", None, 10.0, None), ("new", "2026-03-01", None, 10.0, None))
+    monitor = AlertMonitor(stale_days=100)
+    monitor.update(tml, pd.Timestamp("2026-03-02"))
+    closed = tml.copy()
+    closed.loc["new", ["TML_CHALLAN_DATE", "GRN_QTY"]] = [pd.Timestamp("2026-03-05"), 10.0]
+    assert monitor.update(closed, pd.Timestamp("2026-03-06")).empty
+    assert monitor.last_run == {"changed": 1, "alerts": 0}
+    assert monitor.update(closed, pd.Timestamp("2026-03-20")).empty
+
+
+def test_a_changed_row_restarts_its_pending_clock():
+    tml = rows(("a", "2026-03-01", None, 10.0, None))
+    monitor = AlertMonitor(stale_days=5)
+    monitor.update(tml, pd.Timestamp("2026-03-02"))
+    part = tml.assign(GRN_QTY=4.0)
+    assert alerts(monitor.update(part, pd.Timestamp("2026-03-04"))) == []
+    assert alerts(monitor.update(part, pd.Timestamp("2026-03-08"))) == []  # not due 5 days after the baseline
+    assert ("2026-03-09", "Pending unchanged 5 days", "a") in alerts(monitor.update(part, pd.Timestamp("2026-03-10")))
+
+
+def test_sinks_get_the_alerts(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    monitor = AlertMonitor([FileSink(str(path))])
+    tml = rows(("a", "2026-03-01", None, 10.0, None))
+    monitor.update(tml, pd.Timestamp("2026-03-02"))
+    monitor.update(tml, pd.Timestamp("2026-03-09"))
+    monitor.flush()
+    assert [json.loads(line)["ALERT"] for line in path.read_text().splitlines()] == ["Ageing 8-15"]
+
+
+def test_a_failed_round_is_recorded_and_the_schedule_goes_on():
+    errors, rounds = collections.deque(), []
+
+    def check():
+        rounds.append(1)
+        if len(rounds) == 1:
+            raise RuntimeError("sheet unreachable")
+
+    schedule(check, 0.01, errors, "grn-alerts-test")
+    deadline = time.monotonic() + 5
+    while len(rounds) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(rounds) >= 3
+    assert len(errors) == 1 and errors[0].endswith("alert check: sheet unreachable")
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import urllib.parse
+
+import pytest
+
+pytest.importorskip("starlette")
+from starlette.requests import Request  # noqa: E402
+
+import grn_api  # noqa: E402
+
+
+def get(name, params=(), headers=()):
+    """grn_api.endpoint's answer to GET /api/<name>?<params>, without a server."""
+    scope = {
+        "type": "http", "method": "GET", "path": f"/api/{name}", "path_params": {"name": name},
+        "query_string": urllib.parse.urlencode(list(params)).encode(),
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers],
+    }
+    return asyncio.run(grn_api.endpoint(Request(scope)))
+
+
+@pytest.fixture
+def served(monkeypatch):
+    """Tenant "t" on dataset version v1, recording the queries the endpoint runs."""
+    monkeypatch.setattr(grn_api, "_providers", {})
+    state = {"version": "v1", "queries": []}
+
+    def query(name, filters):
+        state["queries"].append((name, filters["customer"]))
+        return {"btst_invoice_qty": 3, "avg_days": 4}
+
+    grn_api.register("t", lambda: state["version"], query)
+    return state
+
+
+def test_an_unchanged_answer_is_a_304_without_a_query(served):
+    params = [("tenant", "t"), ("customer", "A"), ("format", "json")]
+    first = get("kpis", params)
+    assert first.status_code == 200 and json.loads(first.body) == {"btst_invoice_qty": 3, "avg_days": 4}
+    etag = first.headers["etag"]
+
+    again = get("kpis", params, [("If-None-Match", f'"other", {etag}')])
+    assert again.status_code == 304 and again.headers["etag"] == etag
+    assert served["queries"] == [("kpis", ("A",))]
+
+
+def test_the_etag_moves_with_the_version_and_the_request(served):
+    params = [("tenant", "t"), ("format", "json")]
+    etag = get("kpis", params).headers["etag"]
+    assert get("kpis", params + [("customer", "A")]).headers["etag"] != etag
+    assert get("ageing", params).headers["etag"] != etag
+
+    served["version"] = "v2"
+    moved = get("kpis", params, [("If-None-Match", etag)])
+    assert moved.status_code == 200 and moved.headers["etag"] != etag
+    assert moved.headers["x-dataset-version"] == "v2"
+
+
+def test_bad_requests(served):
+    assert get("nope", [("tenant", "t")]).status_code == 404
+    assert get("rows", [("tenant", "t"), ("format", "json")]).status_code == 400
+    assert get("kpis", [("tenant", "t"), ("start", "not a date"), ("end", "2026-01-31")]).status_code == 400
+    assert get("kpis", [("tenant", "elsewhere")]).status_code == 503
+    served["version"] = None
+    assert get("kpis", [("tenant", "t")]).status_code == 503
+    assert served["queries"] == []
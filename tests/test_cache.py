@@ -0,0 +1,92 @@
+import threading
+import time
+
+import numpy as np
+
+from grn_cache import TenantCache, estimate_bytes
+from grn_polars import PolarsBackend, pl
+from grn_sql import SqlBackend
+
+
+def block(kb):
+    return np.zeros(kb * 128)  # kb kilobytes of float64
+
+
+def test_least_recently_used_entries_go_first():
+    cache = TenantCache(10 * 1024 + 500)
+    released = []
+    for name in "abac":  # the hit on a leaves b the oldest when c comes in
+        cache.get("t", "aggregate", name, (), lambda: block(4), release=lambda value, name=name: released.append(name))
+    assert cache.stats()["evictions"].tolist() == [1]
+    assert released == ["b"]
+    assert isinstance(cache.get("t", "aggregate", "a", (), lambda: "rebuilt"), np.ndarray)
+    assert cache.get("t", "aggregate", "b", (), lambda: "rebuilt") == "rebuilt"
+
+
+def test_a_tenant_over_its_budget_evicts_its_own_entries_only():
+    cache = TenantCache(10 ** 9, tenant_budgets={"small": 6 * 1024})
+    cache.get("big", "aggregate", "x", (), lambda: block(8))
+    for name in "ab":
+        cache.get("small", "aggregate", name, (), lambda: block(4))
+    stats = cache.stats().set_index("Tenant")
+    assert stats.loc["small", "Entries"] == 1 and stats.loc["small", "evictions"] == 1
+    assert stats.loc["big", "Entries"] == 1
+
+
+def test_pinned_builds_once_outside_the_cache_lock():
+    cache = TenantCache(10 ** 9)
+    started, finish, builds = threading.Event(), threading.Event(), []
+
+    def build():
+        builds.append(1)
+        started.set()
+        finish.wait(5)
+        # Building may use the cache itself
+        return cache.get("t", "aggregate", "inner", (), lambda: "inner")
+
+    threads = [threading.Thread(target=cache.pinned, args=("t", "monitor", (), build)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    began = time.monotonic()
+    assert cache.get("t", "aggregate", "other", (), lambda: 1) == 1  # not held up by the build
+    assert time.monotonic() - began < 1
+    finish.set()
+    for thread in threads:
+        thread.join(5)
+    assert builds == [1]
+    assert cache.pinned("t", "monitor", (), lambda: "again") == "inner"
+
+
+def test_retired_versions_and_expired_entries_go():
+    cache = TenantCache(10 ** 9)
+    released = []
+    for version in ("v1", "v2"):
+        cache.new_version("t", version)
+        cache.get("t", "normalize", "tml", (("version", version),), lambda: version, version=version,
+                  release=released.append)
+    cache.get("t", "fetch", "sheet", (), lambda: "sheet", ttl=0.01)
+    cache.new_version("t", "v3")  # the last two versions stay
+    assert released == ["v1"]
+    time.sleep(0.02)
+    assert cache.get("t", "fetch", "sheet", (), lambda: "fetched again") == "fetched again"
+    stats = cache.stats().set_index("Layer")
+    assert stats.loc["normalize", "invalidated"] == 1 and stats.loc["fetch", "expired"] == 1
+
+
+def test_a_layer_over_its_budget_evicts_within_the_layer():
+    cache = TenantCache(10 ** 9, layer_budgets={"render": 6 * 1024})
+    cache.get("t", "aggregate", "index", (), lambda: block(8))
+    for name in "ab":
+        cache.get("t", "render", name, (), lambda: block(4))
+    stats = cache.stats().set_index("Layer")
+    assert stats.loc["render", "Entries"] == 1 and stats.loc["aggregate", "Entries"] == 1
+
+
+def test_backends_report_the_memory_their_engines_hold(tml):
+    frame_bytes = estimate_bytes(tml[["CUSTOMER", "PART_NO", "SUPPLIER_QTY", "GRN_QTY"]])
+    backend = SqlBackend(tml, engine="sqlite")
+    assert estimate_bytes(backend) > frame_bytes
+    backend.close()
+    if pl is not None:
+        assert estimate_bytes(PolarsBackend(tml)) > frame_bytes / 2
@@ -0,0 +1,102 @@
+import gzip
+import json
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import grn_client
+from grn_data import PandasBackend, add_today_columns, row_pending
+from grn_index import text_values
+
+from conftest import TODAY
+
+
+def decode(payload):
+    """The payload's header and columns, NaN where a column's missing marker stands."""
+    data = gzip.decompress(payload)
+    assert data[:4] == grn_client.MAGIC
+    length = int.from_bytes(data[4:8], "little")
+    header = json.loads(data[8:8 + length])
+    body = data[8 + length:]
+    columns = {}
+    for name, (dtype, offset, count, marker) in header["columns"].items():
+        values = np.frombuffer(body, "<" + dtype, count, offset).astype(float)
+        columns[name] = np.where(values == marker, np.nan, values) if marker is not None else values
+    return header, columns
+
+
+def test_round_trip(tml_today):
+    header, columns = decode(grn_client.encode(tml_today, "v1", TODAY))
+    assert header["rows"] == len(tml_today) and header["day"] == "2026-03-15"
+    names = np.array(header["customers"])[columns["customer"].astype(int)]
+    assert (names == text_values(tml_today, "CUSTOMER").to_numpy()).all()
+    parts = np.array(header["parts"])[columns["part"].astype(int)]
+    assert (parts == tml_today["PART_NO"].astype(str).to_numpy()).all()
+
+    received = tml_today["PHY_RCPT_DATE"]
+    days = (received - pd.Timestamp("1970-01-01")).dt.days.to_numpy(dtype=float, na_value=np.nan)
+    assert np.array_equal(columns["rcpt"] + header["day0"], days, equal_nan=True)
+    assert np.array_equal(columns["age"], tml_today["Q_MINUS_N_DAYS"].to_numpy(dtype=float, na_value=np.nan),
+                          equal_nan=True)
+    assert np.array_equal(columns["pending"], row_pending(tml_today).to_numpy(dtype=float))
+    assert columns["flags"].astype(int).tolist() == (
+        tml_today["AVX_CHALLAN_DATE"].notna() * 1 + tml_today["HANDOVER_DATE"].notna() * 2
+        + tml_today["TML_CHALLAN_DATE"].notna() * 4).tolist()
+    assert header["months"] == sorted(received.dropna().dt.strftime("%b-%Y").unique(),
+                                      key=lambda month: pd.to_datetime(month, format="%b-%Y"))
+
+
+def test_empty_table(tml_today):
+    header, columns = decode(grn_client.encode(tml_today.iloc[:0], "v1", TODAY))
+    assert header["rows"] == 0 and header["customers"] == [] and header["months"] == []
+    assert all(len(values) == 0 for values in columns.values())
+
+
+def test_columns_widen_to_fit(tml):
+    rows = tml.iloc[:4].copy()
+    rows["PHY_RCPT_DATE"] = pd.to_datetime(["1900-01-01", "2026-03-01", None, "2026-03-02"])
+    rows["SUPPLIER_QTY"] = [0.5, 70000.0, None, -3.0]
+    today = add_today_columns(rows, TODAY)
+    header, columns = decode(grn_client.encode(today, "v1", TODAY))
+    assert header["columns"]["rcpt"][0] == "u2"  # 46 000 days apart
+    assert header["columns"]["age"][0] == "i4"
+    assert header["columns"]["qty"][0] == "f8"
+    assert np.isnan(columns["rcpt"][2]) and np.isnan(columns["age"][2])
+    assert columns["age"][0] == today["Q_MINUS_N_DAYS"].iloc[0]
+    assert columns["qty"].tolist() == [0.5, 70000.0, 0.0, 0.0]  # the receipt matrix only counts qty > 0
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_browser_totals_match_the_pandas_backend(tml, tml_today, tmp_path):
+    payload = tmp_path / "payload.gz"
+    payload.write_bytes(grn_client.encode(tml_today, "v1", TODAY))
+    module = tmp_path / "grn_client.mjs"
+    module.write_text(grn_client.JS + "\nexport { decode, summarize };\n")
+    script = tmp_path / "check.mjs"
+    script.write_text(f"""
+        import fs from "fs";
+        const {{ decode, summarize }} = await import({json.dumps(str(module))});
+        const payload = fs.readFileSync({json.dumps(str(payload))}).toString("base64");
+        const ds = await decode({{ payload }});
+        const filters = JSON.parse(process.argv[2]);
+        console.log(JSON.stringify(filters.map((f) => summarize(ds, f))));
+    """)
+    customer = sorted(tml["CUSTOMER"].unique())[0]
+    cases = [
+        dict(customer=[], plant=[], month="All", dates=None),
+        dict(customer=[customer], plant=[], month="Feb-2026", dates=None),
+        dict(customer=[], plant=[], month="All", dates=["2026-01-10", "2026-02-20"]),
+    ]
+    out = subprocess.run(["node", str(script), json.dumps(cases)], capture_output=True, text=True, check=True,
+                         env={**os.environ, "NODE_NO_WARNINGS": "1"})
+    backend = PandasBackend(tml_today, TODAY)
+    for case, got in zip(cases, json.loads(out.stdout)):
+        kwargs = dict(customer=tuple(case["customer"]) or "All", month=case["month"],
+                      dates=tuple(map(pd.Timestamp, case["dates"])) if case["dates"] else None)
+        assert got["rows"] == backend.row_count(**kwargs)
+        assert got["kpis"] == {k: int(v) for k, v in backend.kpis(**kwargs, today=TODAY).items()}
+        assert got["pending"] == backend.part_pending(**kwargs).values.tolist()
@@ -0,0 +1,61 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import grn_export
+from grn_export import Rows, available, stream
+
+
+def read(data, fmt):
+    if fmt == "csv":
+        return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    if fmt == "xlsx":
+        return pd.read_excel(io.BytesIO(data), dtype=str).fillna("")
+    if fmt == "parquet":
+        return pd.read_parquet(io.BytesIO(data))
+    import pyarrow as pa
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+def expected(rows):
+    frame = rows.tml[rows.columns].iloc[rows.positions]
+    return frame.reset_index(drop=True)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx", "parquet", "arrow"])
+def test_chunked_rows_read_back_whole(fmt, tml, monkeypatch):
+    if not available(fmt):
+        pytest.skip(f"{fmt} needs an optional package")
+    monkeypatch.setattr(Rows.chunks, "__defaults__", (400,))  # several chunks per file
+    rows = Rows(tml, np.flatnonzero(tml["CUSTOMER"] == sorted(tml["CUSTOMER"].unique())[0]))
+    assert len(list(rows.chunks())) == -(-len(rows) // 400) > 1
+    got = read(b"".join(stream(rows, fmt)), fmt)
+    want = expected(rows)
+    assert list(got.columns) == [str(col) for col in want.columns] and len(got) == len(want)
+    if fmt in ("csv", "xlsx"):
+        assert got["PART_NO"].tolist() == want["PART_NO"].astype(str).tolist()
+    else:
+        pd.testing.assert_series_equal(got["SUPPLIER_QTY"], want["SUPPLIER_QTY"], check_dtype=False)
+        assert (got["PHY_RCPT_DATE"].isna() == want["PHY_RCPT_DATE"].isna()).all()
+
+
+def test_no_rows_still_write_a_header(tml):
+    data = b"".join(stream(Rows(tml, np.array([], dtype=int)), "csv"))
+    assert data.decode().strip().split(",")[0] == Rows(tml, []).columns[0]
+
+
+def test_kpis_and_tables_are_one_chunk():
+    kpis = {"btst_invoice_qty": 3, "avg_days": 4}
+    assert b"".join(stream(kpis, "csv")).decode().splitlines() == ["btst_invoice_qty,avg_days", "3,4"]
+    assert b"".join(stream(None, "csv")) == b"\n"
+
+
+def test_xlsx_refuses_more_rows_than_a_sheet_holds(tml, monkeypatch):
+    if not available("xlsx"):
+        pytest.skip("xlsx needs openpyxl")
+    monkeypatch.setattr(grn_export, "XLSX_MAX_ROWS", 10)
+    with pytest.raises(ValueError, match="do not fit"):
+        stream(Rows(tml, np.arange(20)), "xlsx")
+    assert b"".join(stream(Rows(tml, np.arange(10)), "xlsx"))
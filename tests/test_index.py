@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from grn_index import FilterIndex, text_values
+
+
+def scan(tml, customers=None, plants=None, start=None, end=None):
+    keep = np.ones(len(tml), dtype=bool)
+    if customers is not None:
+        keep &= text_values(tml, "CUSTOMER").isin(customers).to_numpy()
+    if plants is not None:
+        keep &= text_values(tml, "PLANT").isin(plants).to_numpy()
+    if start is not None or end is not None:
+        received = tml["PHY_RCPT_DATE"]
+        keep &= received.between(start or received.min(), end or received.max()).to_numpy()
+    return np.flatnonzero(keep)
+
+
+def test_positions_match_a_scan(tml):
+    index = FilterIndex(tml)
+    customers = index.values("CUSTOMER")
+    cases = [
+        dict(),
+        dict(customers=customers[:2]),
+        dict(plants=index.values("PLANT")[:1], start=pd.Timestamp("2026-01-01")),
+        dict(customers=customers[2:3], start=pd.Timestamp("2026-01-01"), end=pd.Timestamp("2026-01-31")),
+        dict(end=pd.Timestamp("2025-12-31")),
+    ]
+    for case in cases:
+        assert np.array_equal(index.positions(**case), scan(tml, **case)), case
+
+
+def test_undated_rows_only_without_date_bounds(tml):
+    index = FilterIndex(tml)
+    undated = np.flatnonzero(tml["PHY_RCPT_DATE"].isna())
+    assert len(undated)
+    assert np.isin(undated, index.positions()).all()
+    assert not np.isin(undated, index.positions(start=pd.Timestamp("1900-01-01"))).any()
+
+
+def test_empty_and_unknown_selections(tml):
+    index = FilterIndex(tml)
+    assert len(index.positions(customers=[])) == 0
+    assert len(index.positions(customers=["NO SUCH CUSTOMER"])) == 0
+    assert len(index.positions(start=pd.Timestamp("2026-02-10"), end=pd.Timestamp("2026-02-01"))) == 0
+    assert len(FilterIndex(tml.iloc[:0]).positions(customers=["X"], start=pd.Timestamp("2026-01-01"))) == 0
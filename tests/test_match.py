@@ -0,0 +1,78 @@
+import pandas as pd
+
+from grn_match import (
+    ISSUE_BY_DATE,
+    ISSUE_COLUMNS,
+    ISSUE_NO_TML,
+    ISSUE_QTY,
+    ChallanMatcher,
+    match_challans,
+    open_issues,
+)
+
+
+def challans(*rows):
+    """Normalized-table rows: (part, AVX challan, AVX date, TML challan, TML date, supplier qty, GRN qty)."""
+    columns = ["PART_NO", "AVX Challan No.", "AVX_CHALLAN_DATE", "TML Challan No.", "TML_CHALLAN_DATE",
+               "SUPPLIER_QTY", "GRN_QTY"]
+    tml = pd.DataFrame(list(rows), columns=columns)
+    for col in ("AVX_CHALLAN_DATE", "TML_CHALLAN_DATE"):
+        tml[col] = pd.to_datetime(tml[col])
+    return tml.assign(**{"CUSTOMER": "TATA MOTORS LTD - PUNE", "PLANT": "1100", "Inwarding PO": "5500000001"})
+
+
+def test_clean_sheet_has_no_open_issues():
+    tml = challans(("P1", "AV-001", "2026-01-02", "TM 9", "2026-01-05", 10.0, 10.0))
+    issues = match_challans(tml)
+    assert issues.empty
+    assert list(issues.columns) == ISSUE_COLUMNS
+    assert open_issues(issues, pd.Timestamp("2026-02-01")).empty
+
+
+def test_empty_table():
+    tml = challans().iloc[:0]
+    assert open_issues(match_challans(tml), pd.Timestamp("2026-02-01")).empty
+    assert open_issues(ChallanMatcher().update(tml), pd.Timestamp("2026-02-01")).empty
+
+
+def test_challan_numbers_are_normalized_before_joining():
+    tml = challans(
+        ("P1", "001234", "2026-01-02", "TM9.0", "2026-01-05", 10.0, 8.0),
+        ("P1", "12/34", "2026-01-02", "tm-9", "2026-01-05", 5.0, 5.0),
+    )
+    issues = match_challans(tml)
+    mismatch = issues[issues["ISSUE"] == ISSUE_QTY]
+    assert len(mismatch) == 1
+    assert mismatch[["SUPPLIER_QTY", "GRN_QTY", "ROWS"]].iloc[0].tolist() == [15.0, 13.0, 2]
+
+
+def test_orphan_pairs_by_date_inside_the_window_only():
+    tml = challans(
+        ("P1", "AV-1", "2026-01-02", None, None, 10.0, None),
+        ("P1", None, None, "TM-1", "2026-01-06", 10.0, 10.0),
+        ("P2", "AV-2", "2026-01-02", None, None, 10.0, None),
+        ("P2", None, None, "TM-2", "2026-01-20", 10.0, 10.0),
+    )
+    issues = match_challans(tml).set_index("PART_NO")
+    assert issues.loc["P1", "ISSUE"] == ISSUE_BY_DATE
+    assert sorted(issues.loc["P2", "ISSUE"]) == sorted([ISSUE_NO_TML, "TML challan without AVX challan"])
+
+
+def test_unmatched_avx_challan_waits_for_the_window():
+    tml = challans(("P1", "AV-1", "2026-01-02", None, None, 10.0, None))
+    issues = match_challans(tml)
+    assert open_issues(issues, pd.Timestamp("2026-01-05")).empty
+    assert open_issues(issues, pd.Timestamp("2026-01-20"))["ISSUE"].tolist() == [ISSUE_NO_TML]
+
+
+def test_matcher_rematches_changed_parts_only():
+    tml = challans(
+        ("P1", "AV-1", "2026-01-02", "TM-1", "2026-01-05", 10.0, 10.0),
+        ("P2", "AV-2", "2026-01-02", "TM-2", "2026-01-05", 10.0, 10.0),
+    )
+    matcher = ChallanMatcher()
+    assert matcher.update(tml).empty
+    tml.loc[1, "GRN_QTY"] = 7.0
+    issues = matcher.update(tml)
+    assert matcher.last_delta == {"parts": 1, "of": 2}
+    assert issues[["ISSUE", "PART_NO"]].values.tolist() == [[ISSUE_QTY, "P2"]]
@@ -0,0 +1,59 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from grn_data import PandasBackend
+from grn_offload import OffloadTimeout, QueryPool
+
+from conftest import TODAY
+
+pytest.importorskip("pyarrow")  # spilled tables are Arrow files
+
+
+def slow(path, seconds):
+    """A task keyed on ``path`` that takes ``seconds``; workers import it from this module."""
+    time.sleep(seconds)
+    return path
+
+
+@pytest.fixture(scope="module")
+def pool(tmp_path_factory):
+    pool = QueryPool(2, 30, spill_dir=str(tmp_path_factory.mktemp("spills")))
+    yield pool
+    pool._executor.shutdown(cancel_futures=True)
+
+
+def test_queries_match_the_pandas_backend(pool, tml, tml_today):
+    path = pool.spill(("t", "v1"), tml)
+    assert pool.spill(("t", "v1"), tml) == path  # written once per key
+    backend = PandasBackend(tml_today, TODAY)
+    kwargs = {"customer": sorted(tml["CUSTOMER"].unique())[0], "month": "Feb-2026", "today": TODAY}
+    assert pool.query(path, "pandas", TODAY, "", "kpis", kwargs) == backend.kpis(**kwargs)
+    pd.testing.assert_frame_equal(pool.query(path, "pandas", TODAY, "", "ageing", kwargs), backend.ageing(**kwargs))
+    assert pool.query(path, "pandas", TODAY, "", "part_pending", {}, html=True) == \
+        backend.part_pending().to_html(escape=False, index=False)
+    assert not pool._futures  # collected results are not kept
+
+
+def test_a_retry_after_a_timeout_collects_the_first_run(pool, monkeypatch):
+    monkeypatch.setattr(pool, "timeout", 0.2)
+    for _ in range(2):  # identical calls wait on the same future
+        with pytest.raises(OffloadTimeout):
+            pool._run(slow, "a", 1.0)
+        assert len(pool._futures) == 1
+    next(iter(pool._futures.values())).result()  # finishes while nobody waits
+    started = time.monotonic()
+    assert pool._run(slow, "a", 1.0) == "a"
+    assert time.monotonic() - started < 0.5 and not pool._futures
+
+
+def test_release_drops_uncollected_results_and_the_spill(pool, tml, monkeypatch):
+    path = pool.spill(("t", "v2"), tml.iloc[:10])
+    monkeypatch.setattr(pool, "timeout", 0.01)
+    with pytest.raises(OffloadTimeout):
+        pool._run(slow, path, 0.5)
+    pool.release(path)
+    assert not pool._futures and not os.path.exists(path)
+    pool.release(path)  # a second release is harmless
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from grn_reconcile import add_pending, fifo_allocate, pool_keys
+
+
+def receipts(*rows):
+    """Normalized-table rows: (PO, part, receipt date, supplier qty, GRN qty)."""
+    tml = pd.DataFrame(list(rows), columns=["Inwarding PO", "PART_NO", "PHY_RCPT_DATE", "SUPPLIER_QTY", "GRN_QTY"])
+    tml["PHY_RCPT_DATE"] = pd.to_datetime(tml["PHY_RCPT_DATE"])
+    tml["AVX_CHALLAN_DATE"] = tml["PHY_RCPT_DATE"]
+    return tml
+
+
+def test_empty_table_gets_integer_columns():
+    out = add_pending(receipts())
+    assert out.empty
+    assert out["GRN_ALLOCATED"].dtype == int and out["PENDING_QTY"].dtype == int
+
+
+def test_grn_booked_on_a_later_row_covers_the_oldest_receipt_first():
+    tml = receipts(
+        ("PO1", "P1", "2026-01-05", 10.0, 15.0),
+        ("PO1", "P1", "2026-01-01", 10.0, None),
+    )
+    out = fifo_allocate(tml)
+    assert out["GRN_ALLOCATED"].tolist() == [5, 10]
+    assert out["PENDING_QTY"].tolist() == [5, 0]
+
+
+def test_undated_receipts_are_served_last():
+    tml = receipts(
+        ("PO1", "P1", None, 10.0, None),
+        ("PO1", "P1", "2026-01-01", 10.0, 12.0),
+    )
+    assert fifo_allocate(tml)["GRN_ALLOCATED"].tolist() == [2, 10]
+
+
+def test_surplus_grn_is_not_carried_to_other_pools():
+    tml = receipts(
+        ("PO1", "P1", "2026-01-01", 10.0, 25.0),
+        ("PO1", "P2", "2026-01-01", 10.0, None),
+        ("PO2", "P1", "2026-01-01", 10.0, None),
+    )
+    out = fifo_allocate(tml)
+    assert out["GRN_ALLOCATED"].tolist() == [10, 0, 0]
+    assert out["PENDING_QTY"].tolist() == [0, 10, 10]
+
+
+def test_rows_without_po_form_their_own_pools():
+    tml = receipts(
+        ("", "P1", "2026-01-01", 10.0, None),
+        (None, "P1", "2026-01-02", 10.0, 10.0),
+    )
+    assert pool_keys(tml).nunique() == 2
+    assert fifo_allocate(tml)["PENDING_QTY"].tolist() == [10, 0]
+
+
+def test_blank_and_negative_quantities_count_as_zero():
+    tml = receipts(
+        ("PO1", "P1", "2026-01-01", None, 5.0),
+        ("PO1", "P1", "2026-01-02", -4.0, None),
+        ("PO1", "P1", "2026-01-03", 10.0, -3.0),
+    )
+    out = fifo_allocate(tml)
+    assert out["GRN_ALLOCATED"].tolist() == [0, 0, 5]
+    assert out["PENDING_QTY"].tolist() == [0, 0, 5]
+
+
+def test_pool_totals_match_the_sheet(tml):
+    pools = pool_keys(tml)
+    received = tml["SUPPLIER_QTY"].fillna(0).clip(lower=0).groupby(pools).sum()
+    booked = tml["GRN_QTY"].fillna(0).clip(lower=0).groupby(pools).sum()
+    allocated = tml["GRN_ALLOCATED"].groupby(pools).sum()
+    pending = tml["PENDING_QTY"].groupby(pools).sum()
+    assert (tml["PENDING_QTY"] >= 0).all()
+    assert (allocated == np.minimum(received, booked)).all()  # whole quantities: no truncation
+    assert (allocated + pending == received).all()
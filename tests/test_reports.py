@@ -0,0 +1,33 @@
+import pandas as pd
+
+from grn_reports import file_stems, report_jobs
+
+from conftest import TODAY
+
+
+def test_stems_differing_only_in_punctuation_or_case_get_a_hash():
+    jobs = [("A&B", "All"), ("A-B", "All"), ("a b", "All"), ("A&B", "Jan-2026"), ("TATA MOTORS LTD - PUNE", "All")]
+    stems = file_stems(jobs)
+    assert len({stem.lower() for stem in stems.values()}) == len(jobs)
+    assert stems["TATA MOTORS LTD - PUNE", "All"] == "TATA-MOTORS-LTD-PUNE"
+    assert stems["A&B", "Jan-2026"] == "A-B-Jan-2026"
+    assert stems["A&B", "All"].startswith("A-B-") and stems["A&B", "All"] != stems["A-B", "All"]
+
+
+def test_stems_are_stable_between_runs():
+    jobs = [("A&B", "All"), ("A-B", "All")]
+    assert file_stems(jobs) == file_stems(list(reversed(jobs)))
+
+
+def test_packs_with_open_rows_change_with_the_day(tml):
+    customers = sorted(tml["CUSTOMER"].unique())
+    closed = tml[tml["CUSTOMER"] != customers[0]].assign(TML_CHALLAN_DATE=pd.Timestamp("2026-03-01"))
+    tml = pd.concat([tml[tml["CUSTOMER"] == customers[0]], closed])
+    today = report_jobs(tml, TODAY, every_month=True)
+    tomorrow = report_jobs(tml, TODAY + pd.Timedelta(days=1), every_month=True)
+    changed = {job for job in today if today[job] != tomorrow[job]}
+    assert {customer for customer, _ in changed} == {customers[0]}
+    assert (customers[0], "All") in changed
+    assert report_jobs(tml, TODAY, every_month=True) == today
+    edited = report_jobs(tml.assign(GRN_QTY=tml["GRN_QTY"].fillna(0) + 1), TODAY)
+    assert all(edited[customer, "All"] != today[customer, "All"] for customer in customers)
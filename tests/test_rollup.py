@@ -0,0 +1,44 @@
+import pandas as pd
+
+from grn_rollup import ReceiptRollup
+
+
+def expected_totals(tml, start, end, customer=None):
+    rows = tml[tml["PHY_RCPT_DATE"].between(start, end) & (tml["SUPPLIER_QTY"].fillna(0) > 0)]
+    if customer is not None:
+        rows = rows[rows["CUSTOMER"] == customer]
+    return rows.groupby("PART_NO")["SUPPLIER_QTY"].sum()
+
+
+def test_totals_match_a_scan(tml):
+    rollup = ReceiptRollup(tml)
+    customer = sorted(tml["CUSTOMER"].unique())[1]
+    for start, end, picked in [("2025-09-01", "2026-03-15", None), ("2026-02-01", "2026-02-28", customer),
+                               ("2026-03-10", "2026-03-10", None)]:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        got = rollup.totals(picked or "All", start, end)
+        expected = expected_totals(tml, start, end, picked)
+        pd.testing.assert_series_equal(got[got > 0].sort_index(), expected.sort_index(),
+                                       check_names=False, check_index_type=False)
+
+
+def test_range_outside_the_data_is_empty(tml):
+    rollup = ReceiptRollup(tml)
+    matrix = rollup.matrix("All", pd.Timestamp("2020-01-01"), pd.Timestamp("2020-01-31"))
+    assert matrix.empty
+    assert list(matrix.columns) == ["PART_NO", *pd.date_range("2020-01-01", "2020-01-31").strftime("%d-%b"), "Total"]
+
+
+def test_table_without_receipts(tml):
+    rollup = ReceiptRollup(tml.assign(PHY_RCPT_DATE=pd.NaT))
+    assert rollup.matrix("All", pd.Timestamp("2026-03-01"), pd.Timestamp("2026-03-31")).empty
+    assert (rollup.totals("All", pd.Timestamp("2026-03-01"), pd.Timestamp("2026-03-31")) == 0).all()
+
+
+def test_ranges_crossing_a_year_label_days_with_it(tml):
+    rollup = ReceiptRollup(tml)
+    matrix = rollup.matrix("All", pd.Timestamp("2025-03-01"), pd.Timestamp("2026-03-15"))
+    days = pd.date_range("2025-03-01", "2026-03-15")
+    assert list(matrix.columns) == ["PART_NO", *days.strftime("%d-%b-%Y"), "Total"]
+    assert matrix.columns.is_unique
+    assert "15-Mar-2026" in rollup.matrix("All", pd.Timestamp("2025-12-20"), pd.Timestamp("2026-03-15")).columns
@@ -0,0 +1,40 @@
+import numpy as np
+
+from grn_index import text_values
+from grn_search import SEARCH_FIELDS, SearchIndex
+
+
+def test_prefix_and_substring_matches(tml):
+    index = SearchIndex(tml)
+    part = tml["PART_NO"].iloc[0]
+    prefix = index.search(part[:8], limit=1000)
+    assert (prefix["Value"].str.startswith(part[:8])).all()
+    assert part in prefix.loc[prefix["Field"] == "Part No", "Value"].tolist()
+
+    middle = index.search(part[4:9], limit=1000)
+    assert part in middle["Value"].tolist()
+    assert middle["Value"].str.contains(part[4:9], regex=False).all()
+
+
+def test_rows_of_a_match(tml):
+    index = SearchIndex(tml)
+    po = text_values(tml, "Inwarding PO").iloc[5]
+    expected = np.flatnonzero(text_values(tml, "Inwarding PO").to_numpy() == po)
+    assert np.array_equal(np.sort(index.rows("Inwarding PO", po)), expected)
+    found = index.search(po)
+    assert found.loc[found["Value"] == po, "Rows"].tolist() == [len(expected)]
+
+
+def test_blank_short_and_unknown_queries(tml):
+    index = SearchIndex(tml)
+    assert index.search("   ").empty
+    assert index.search("ZZZZZZ").empty
+    assert len(index.rows("Part No", "no such part")) == 0
+    assert list(index.search("27", limit=5).columns) == ["Field", "Value", "Rows"]
+    assert len(index.search("27", limit=5)) == 5
+
+
+def test_empty_table(tml):
+    index = SearchIndex(tml.iloc[:0])
+    assert index.search("278").empty
+    assert len(index.rows(SEARCH_FIELDS["PART_NO"], "278")) == 0
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from grn_snapshots import STORED_COLUMNS, SnapshotStore
+
+
+def same_rows(got, expected):
+    expected = expected[STORED_COLUMNS].copy()
+    expected["PLANT"] = expected["PLANT"].astype(str)
+    pd.testing.assert_frame_equal(got[STORED_COLUMNS], expected, check_dtype=False, check_index_type=False,
+                                  check_names=False)
+
+
+def test_as_of_returns_each_day_as_recorded(tml, tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"))
+    monday = tml.iloc[:-5]
+    tuesday = tml.copy()
+    tuesday.loc[tuesday.index[:3], "GRN_QTY"] = 1.0
+    assert store.record(monday, "2026-03-09") == len(monday)
+    assert store.record(tuesday, "2026-03-10") == 3 + 5  # only edited and new rows are written
+    assert store.record(tuesday, "2026-03-12") == 0  # nothing changed: nothing stored
+
+    same_rows(store.as_of("2026-03-09"), monday)
+    same_rows(store.as_of("2026-03-11"), tuesday)
+    assert store.as_of("2026-03-08").empty
+    assert store.days() == ["2026-03-09", "2026-03-10", "2026-03-12"]
+
+
+def test_a_second_refresh_replaces_the_days_versions(tml, tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"))
+    store.record(tml, "2026-03-09")
+    edited = tml.copy()
+    edited.loc[edited.index[0], "GRN_QTY"] = 1.0
+    store.record(edited, "2026-03-10")
+    store.record(tml, "2026-03-10")  # the edit was undone the same day
+    same_rows(store.as_of("2026-03-10"), tml)
+    versions = store.con.execute("SELECT COUNT(*) FROM row_versions WHERE row_key = ?", (tml.index[0],))
+    assert versions.fetchone()[0] == 1
+
+
+def test_compact_keeps_the_retention_window(tml, tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"), retention_days=10)
+    edited = tml.copy()
+    edited.loc[edited.index[:4], "GRN_QTY"] = 1.0
+    store.record(tml, "2026-01-01")
+    store.record(edited, "2026-01-05")
+    store.compact("2026-03-15")
+    same_rows(store.as_of("2026-03-15"), edited)
+    assert store.days() == []
+    assert store.con.execute("SELECT COUNT(*) FROM row_versions").fetchone()[0] == len(tml)
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from grn_data import PandasBackend
+from grn_sql import SqlBackend, duckdb, table_name
+
+from conftest import TODAY
+
+ENGINES = ["sqlite", pytest.param("duckdb", marks=pytest.mark.skipif(duckdb is None, reason="needs duckdb"))]
+
+
+def tables(engine, path):
+    if engine == "duckdb":
+        with duckdb.connect(str(path)) as con:
+            return {name for (name,) in con.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+    with sqlite3.connect(path) as con:
+        return {name for (name,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_answers_match_the_pandas_backend(engine, tml, tml_today):
+    sql = SqlBackend(tml, engine=engine, version="v1")
+    pandas = PandasBackend(tml_today, TODAY)
+    customer = sorted(tml["CUSTOMER"].unique())[0]
+    for kwargs in [dict(), dict(customer=customer, month="Feb-2026"),
+                   dict(dates=(pd.Timestamp("2026-01-10"), pd.Timestamp("2026-02-20")))]:
+        assert sql.row_count(**kwargs) == pandas.row_count(**kwargs)
+        assert sql.kpis(**kwargs, today=TODAY) == pandas.kpis(**kwargs, today=TODAY)
+        pd.testing.assert_frame_equal(sql.part_pending(**kwargs), pandas.part_pending(**kwargs), check_dtype=False)
+        pd.testing.assert_frame_equal(sql.ageing(**kwargs, today=TODAY), pandas.ageing(**kwargs, today=TODAY),
+                                      check_dtype=False)
+    sql.close()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_versions_sharing_a_file_keep_their_tables(engine, tml, tmp_path):
+    path = tmp_path / f"grn.{engine}"
+    live = SqlBackend(tml, engine=engine, path=str(path), version="v1")
+    as_of = [SqlBackend(tml.iloc[:n], engine=engine, path=str(path), version=f"as-of 2026-03-0{n}")
+             for n in (1, 2)]
+    assert live.row_count() == len(tml)  # opening As-of days leaves the live table alone
+    assert [backend.row_count() for backend in as_of] == [1, 2]
+
+    as_of[0].close()
+    assert live.row_count() == len(tml) and as_of[1].row_count() == 2
+    live.close()
+    as_of[1].close()
+    assert not tables(engine, path) & {table_name("v1"), *(table_name(f"as-of 2026-03-0{n}") for n in (1, 2))}
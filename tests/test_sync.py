@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bench
+import grn_polars
+from grn_data import normalize_tml
+from grn_reconcile import add_pending
+from grn_sync import DeltaSync, build_rollup, row_keys
+
+from conftest import TODAY
+
+COLUMNS = ["PART_NO", "CUSTOMER", "SUPPLIER_QTY", "GRN_QTY", "PHY_RCPT_DATE", "TML_CHALLAN_DATE",
+           "GRN_ALLOCATED", "PENDING_QTY"]
+NORMALIZERS = [
+    normalize_tml,
+    pytest.param(grn_polars.normalize_tml, marks=pytest.mark.skipif(grn_polars.pl is None, reason="needs polars")),
+]
+
+
+def edited(sheet):
+    """The sheet after a refresh: GRN booked on some rows, a few rows gone and new ones appended."""
+    out = sheet.copy()
+    picked = np.random.default_rng(3).choice(len(out), 120, replace=False)
+    out.loc[picked, "Qty (GRN)"] = "61"  # no sheet quantity is 61, so every picked row changes
+    out.loc[picked[:40], "TML Challan Date"] = "01.03.2026"
+    extra = bench.synthetic_sheet(50, parts=60, days=30, seed=9, today=TODAY)
+    return pd.concat([out.drop(index=picked[-10:]), extra], ignore_index=True)
+
+
+def rebuilt(sheet, normalize):
+    return add_pending(normalize(sheet.set_axis(row_keys(sheet)).copy()))
+
+
+@pytest.mark.parametrize("normalize", NORMALIZERS)
+def test_a_delta_matches_a_full_rebuild(sheet, normalize):
+    sync = DeltaSync(normalize)
+    first = sync.update(sheet)
+    assert sync.update(sheet) == first and sync.last_delta["appended"] == len(sheet)
+
+    refreshed = edited(sheet)
+    version = sync.update(refreshed)
+    assert sync.last_delta == {"appended": 50, "modified": 110, "removed": 10}
+    full = rebuilt(refreshed, normalize)
+    pd.testing.assert_frame_equal(sync.normalized(version)[COLUMNS], full[COLUMNS], check_dtype=False)
+    pd.testing.assert_frame_equal(sync.pending_rollup(version).sort_index(), build_rollup(full).sort_index(),
+                                  check_dtype=False)
+    assert sync.normalized(first) is None  # only the newest version is served
+
+
+def test_grn_on_a_later_row_reallocates_its_whole_pool(sheet):
+    sync = DeltaSync()
+    first = sync.update(sheet)
+    tml = sync.normalized(first)
+    pools = tml.groupby(["Inwarding PO", "PART_NO"]).size()
+    po, part = pools[pools > 2].index[0]
+    pool = tml.index[(tml["Inwarding PO"] == po) & (tml["PART_NO"] == part)]
+    last = sheet.index[row_keys(sheet).get_loc(pool[-1])]
+
+    refreshed = sheet.copy()
+    refreshed.loc[last, "Qty (GRN)"] = str(int(tml.loc[pool, "SUPPLIER_QTY"].fillna(0).sum()))
+    version = sync.update(refreshed)
+    assert sync.last_delta["modified"] == 1
+    assert (sync.normalized(version).loc[pool, "PENDING_QTY"] == 0).all()
+    assert set(sync.changed_since(first)) == set(pool)
+    assert sync.changed_since("unknown") is None